@@ -0,0 +1,26 @@
+"""add budgets keyset index
+
+Revision ID: 32917c86e14c
+Revises: a9c200e913cb
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '32917c86e14c'
+down_revision: Union[str, None] = 'a9c200e913cb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serves `GET /budget`: user_id equality + keyset on (start_date, id)
+    op.create_index('ix_budgets_user_id_start_date_id', 'budgets', ['user_id', 'start_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_budgets_user_id_start_date_id', table_name='budgets')
@@ -0,0 +1,60 @@
+"""add default categories natural key
+
+Revision ID: 5c0d2e7b9a41
+Revises: 32917c86e14c
+Create Date: 2026-10-18 14:02:17.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c0d2e7b9a41'
+down_revision: Union[str, None] = '32917c86e14c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ADMIN_PREDICATE = "user_id = '00000000-0000-0000-0000-000000000000'"
+
+# Default trees seeded twice by racing workers: point every reference at the oldest
+# copy of each (parent, name), then drop the other copies
+MERGE_DUPLICATES = [
+    f"""
+    CREATE TEMPORARY TABLE duplicate_categories AS
+    SELECT id, keep_id FROM (
+        SELECT id, min(id) OVER (PARTITION BY coalesce(parent_category_id, 0), name) AS keep_id
+        FROM categories WHERE {ADMIN_PREDICATE}
+    ) ranked WHERE id <> keep_id
+    """,
+    """
+    UPDATE categories SET parent_category_id = d.keep_id
+    FROM duplicate_categories d WHERE categories.parent_category_id = d.id
+    """,
+    """
+    UPDATE envelop_budgets SET category_id = d.keep_id
+    FROM duplicate_categories d WHERE envelop_budgets.category_id = d.id
+    """,
+    "DELETE FROM categories USING duplicate_categories d WHERE categories.id = d.id",
+    "DROP TABLE duplicate_categories",
+]
+
+
+def upgrade() -> None:
+    # Main categories first: merging them turns their subcategories into duplicates
+    for _ in range(2):
+        for statement in MERGE_DUPLICATES:
+            op.execute(statement)
+    op.create_index(
+        'uq_categories_default_key',
+        'categories',
+        [sa.text('coalesce(parent_category_id, 0)'), 'name'],
+        unique=True,
+        postgresql_where=sa.text(ADMIN_PREDICATE)
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_categories_default_key', table_name='categories')
@@ -0,0 +1,43 @@
+"""add user and envelope indexes
+
+Revision ID: 69d28f3caa90
+Revises: 5c0d2e7b9a41
+Create Date: 2026-10-18 17:20:09.412387
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '69d28f3caa90'
+down_revision: Union[str, None] = '5c0d2e7b9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY can't run in a transaction: each statement runs in an
+# autocommit block so writes to the tables are not blocked while the index is built.
+# A failed concurrent build leaves an INVALID index behind, drop it before retrying.
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Serves `CategoryService.get` and the default categories: user_id equality, ordered by id
+        op.create_index(
+            'ix_categories_user_id_id', 'categories', ['user_id', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        # Serves envelope loading by budget_id (= and = ANY) ordered by id, index-only
+        op.create_index(
+            'ix_envelop_budgets_budget_id_id', 'envelop_budgets', ['budget_id', 'id'],
+            unique=False, postgresql_include=['category_id', 'allocated_amount'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_envelop_budgets_budget_id_id', table_name='envelop_budgets',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_categories_user_id_id', table_name='categories',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""add collection versions
+
+Revision ID: 7e4b1f0c2d85
+Revises: 69d28f3caa90
+Create Date: 2026-10-18 21:05:41.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e4b1f0c2d85'
+down_revision: Union[str, None] = '69d28f3caa90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bumped by every write to a user's budgets or categories, read by primary key for ETags,
+    # cache keys and read-your-writes routing of every worker
+    op.create_table(
+        'collection_versions',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('collection', sa.String(length=20), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default=sa.text('1'), nullable=False),
+        sa.Column('written_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'collection')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('collection_versions')
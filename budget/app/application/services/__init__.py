@@ -1,2 +1,5 @@
 from .categories_service import CategoryServiceDep, CategoryService
-from .budget_service import BudgetService, BudgetServiceDep
\ No newline at end of file
+from .budget_service import BudgetService, BudgetServiceDep
+from .default_categories import DefaultCategoriesCache, DefaultCategories
+from .export_service import ExportService, ExportServiceDep
+from .import_service import ImportService, ImportServiceDep
\ No newline at end of file
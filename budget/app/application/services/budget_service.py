@@ -1,34 +1,120 @@
 from ...domain.ports import Repository
-from ...domain.specifications import AuthorSpec
-from ...domain.schemas import BudgetBase, SimpleBudget, CategoryBudget, PercentageBudget
-from ...infrastructure.database.repositories import BudgetRepository
+from ...domain.specifications import AuthorSpec, budget_filter_spec
+from ...domain.schemas import BudgetBase, SimpleBudget, CategoryBudget, PercentageBudget, Pagination, BudgetFilterParams
+from ...infrastructure.database.repositories import BudgetRepository, get_read_budget_repository
+from ...infrastructure.database.models.budget import BudgetType
+from ...domain.exceptions import NotFoundError
 from ...infrastructure import NamedLogger
+from ...domain.schemas.adapters import budget_adapter, budget_base_list_adapter, budget_list_adapter, budget_page_adapter
+from ...infrastructure.cache import CollectionVersions, get_collection_versions, BUDGETS, CacheKey, ResponseCache, get_response_cache, record_write
 
 from fastapi import Depends
-from typing import Annotated, List, Union
+from typing import Annotated, Any, Awaitable, Callable, Iterable, List, Union
 from uuid import UUID
 
+def envelope_category_ids(budgets: Iterable[BudgetBase]) -> set[int]:
+    return {c.category_id for budget in budgets if budget.type == BudgetType.ENVELOPE for c in budget.categories}
+
+async def owned_category_ids(
+        budgets: List[BudgetBase], existing: Callable[[UUID, set[int]], Awaitable[set[int]]]) -> dict[UUID, set[int]]:
+    """Per owner, the envelope categories of its budgets that it may use, see `existing_category_ids`"""
+    known = {}
+    for user_id in {budget.user_id for budget in budgets if budget.user_id is not None}:
+        known[user_id] = await existing(user_id, envelope_category_ids(b for b in budgets if b.user_id == user_id))
+    return known
+
+def unknown_category_errors(budget: BudgetBase, known: set[int]) -> list[dict[str, Any]]:
+    """Validation errors, in pydantic's layout, of the envelope categories missing from `known`"""
+    if budget.type != BudgetType.ENVELOPE:
+        return []
+    return [
+        {'type': 'not_found', 'loc': ['categories', index, 'category_id'], 'msg': f'Category {c.category_id} does not exist'}
+        for index, c in enumerate(budget.categories) if c.category_id not in known
+    ]
+
 class BudgetService:
-    def __init__(self, budget_repository: Repository[BudgetBase] = Depends(BudgetRepository), logger = Depends(NamedLogger('budget_service'))):
+    def __init__(self,
+                 budget_repository: Repository[BudgetBase] = Depends(BudgetRepository),
+                 logger = Depends(NamedLogger('budget_service')),
+                 versions: CollectionVersions = Depends(get_collection_versions),
+                 budget_reader: Annotated[Repository[BudgetBase], Depends(get_read_budget_repository)] = None,
+                 cache: Annotated[ResponseCache, Depends(get_response_cache)] = None):
         self.budget_repository = budget_repository
+        # Reads go to a replica when one can serve the user, see `get_read_db`
+        self.budget_reader = budget_reader if budget_reader is not None else budget_repository
         self.logger = logger
-    
-    async def create_budget(self, budget: BudgetBase) -> BudgetBase:
-        response = await self.budget_repository.create(budget)
+        self.versions = versions
+        self.cache = cache if cache is not None else ResponseCache(None)
+
+    async def collection_version(self, user_id: UUID) -> str:
+        """Version of the user's budgets, changes on every write made through this service"""
+        return await self.versions.get(user_id, BUDGETS)
+
+    async def _cache_key(self, user_id: UUID, query: str) -> CacheKey:
+        return CacheKey(user_id, BUDGETS, await self.collection_version(user_id), query)
+
+    async def create_budget(self, budget: BudgetBase) -> Union[SimpleBudget, CategoryBudget, PercentageBudget]:
+        async with record_write(self.versions, self.cache, [budget.user_id], BUDGETS):
+            response = await self.budget_repository.create(budget)
         await self.logger.ainfo('END create', budget_result = response)
         return response
     
-    async def get_all_budgets(self, user_id: UUID) -> List[BudgetBase]:
-        response = await self.budget_repository.find(AuthorSpec(user_id))
-        await self.logger.ainfo('END get_all_budgets', budgets_count=len(response))
+    async def category_errors(self, budgets: List[BudgetBase]) -> List[list[dict[str, Any]]]:
+        """Errors of each budget referencing categories its owner can't use, empty when it can be created"""
+        known = await owned_category_ids(budgets, self.budget_repository.existing_category_ids)
+        return [unknown_category_errors(budget, known.get(budget.user_id, set())) for budget in budgets]
+
+    async def create_budgets(self, budgets: List[Union[SimpleBudget, CategoryBudget, PercentageBudget]]) -> List[Union[SimpleBudget, CategoryBudget, PercentageBudget]]:
+        async with record_write(self.versions, self.cache, [budget.user_id for budget in budgets], BUDGETS):
+            response = await self.budget_repository.create_many(budgets)
+        await self.logger.ainfo('END create_budgets', budgets_count=len(response))
+        return response
+
+    async def get_all_budgets(self, user_id: UUID) -> bytes:
+        """The user's budgets serialized as JSON, from the response cache when it has them"""
+        response = await self.cache.get_or_load(
+            await self._cache_key(user_id, 'all'), budget_base_list_adapter,
+            lambda: self.budget_reader.find(AuthorSpec(user_id))
+        )
+        await self.logger.ainfo('END get_all_budgets', response_bytes=len(response))
+        return response
+
+    async def get_budgets_page(self, user_id: UUID, filters: BudgetFilterParams) -> bytes:
+        """A `Pagination` of the user's budgets serialized as JSON"""
+        response = await self.cache.get_or_load(
+            await self._cache_key(user_id, f'page:{filters.model_dump_json(exclude_defaults=True)}'), budget_page_adapter,
+            lambda: self.budget_reader.find_page(budget_filter_spec(user_id, filters), filters)
+        )
+        await self.logger.ainfo('END get_budgets_page', response_bytes=len(response))
+        return response
+
+    async def get_all_budgets_detailed(self, user_id: UUID) -> bytes:
+        """The user's budgets with their type specific data serialized as JSON"""
+        response = await self.cache.get_or_load(
+            await self._cache_key(user_id, 'detailed'), budget_list_adapter,
+            lambda: self.budget_reader.find_detailed(AuthorSpec(user_id))
+        )
+        await self.logger.ainfo('END get_all_budgets_detailed', response_bytes=len(response))
+        return response
+
+    async def get_budget_by_id(self, user_id: UUID, id: int) -> bytes | None:
+        """The budget serialized as JSON, None when the user is not its author"""
+        # Only the author's reads are cached, under the author's key
+        response = await self.cache.get_or_load(
+            await self._cache_key(user_id, f'id:{id}'), budget_adapter,
+            lambda: self._get_own_budget(user_id, id)
+        )
+        if response is not None:
+            await self.logger.ainfo('END get_budget_by_id')
         return response
 
-    async def get_budget_by_id(self, user_id: UUID, id: int) -> Union[SimpleBudget, CategoryBudget, PercentageBudget]:
-        response = await self.budget_repository.get_by_id(id)
+    async def _get_own_budget(self, user_id: UUID, id: int) -> Union[SimpleBudget, CategoryBudget, PercentageBudget, None]:
+        response = await self.budget_reader.get_by_id(id)
+        if response is None:
+            raise NotFoundError(f'Budget {id} not found')
         if response.user_id != user_id:
             await self.logger.awarn('WARN not an author get_budget_by_id', budget_result = response, user_id = user_id, id = id)
             return None
-        await self.logger.ainfo('END get_budget_by_id')
         return response
     
 BudgetServiceDep = Annotated[BudgetService, Depends(BudgetService)]
\ No newline at end of file
@@ -1,32 +1,78 @@
 from typing import List, Annotated
 from fastapi import Depends
+from sqlalchemy import bindparam
 from sqlalchemy.future import select
 from ...infrastructure import db_session_dep, NamedLogger
+from ...infrastructure.database.routing import read_db_session_dep
+from ...infrastructure.cache import CollectionVersions, get_collection_versions, CATEGORIES, CacheKey, ResponseCache, get_response_cache, record_write
 from ...domain.schemas.category import CategoryCreate, CategoryResponse
 from ...domain.configs.categories_init import ADMIN_USER_ID
 from ...infrastructure.database.models.category import Category
+from .default_categories import DefaultCategoriesCache, get_default_categories_cache, join_json_arrays
+from ...domain.schemas.adapters import category_list_adapter
 from uuid import UUID
 
+SELECT_USER_CATEGORIES = select(Category).where(Category.user_id == bindparam('user_id')).order_by(Category.id)
+
 class CategoryService:
-    def __init__(self, db: db_session_dep, logger = Depends(NamedLogger('category_service'))):
+    def __init__(self,
+                 db: db_session_dep,
+                 logger = Depends(NamedLogger('category_service')),
+                 defaults: DefaultCategoriesCache = Depends(get_default_categories_cache),
+                 versions: CollectionVersions = Depends(get_collection_versions),
+                 read_db: read_db_session_dep = None,
+                 cache: Annotated[ResponseCache, Depends(get_response_cache)] = None):
         self.db = db
+        # Listings read from a replica when one can serve the user, see `get_read_db`
+        self.read_db = read_db if read_db is not None else db
         self.logger = logger
+        self.defaults = defaults
+        self.versions = versions
+        self.cache = cache if cache is not None else ResponseCache(None)
+
+    async def collection_version(self, user_id: UUID) -> str:
+        """Version of the categories visible to user: default tree hash plus the user's write counter"""
+        defaults = await self.defaults.get(self.db)
+        return f'{defaults.version}.{await self.versions.get(user_id, CATEGORIES)}'
 
     async def create(self, category: CategoryCreate, user_id: UUID) -> CategoryResponse:
         """Create a new category"""
         db_category = Category(**category.model_dump(), user_id=user_id)
-        self.db.add(db_category)
-        await self.db.commit()
+        async with record_write(self.versions, self.cache, [user_id], CATEGORIES):
+            self.db.add(db_category)
+            await self.db.commit()
         await self.db.refresh(db_category)
         response = CategoryResponse.model_validate(db_category)
+        if user_id == ADMIN_USER_ID:
+            self.defaults.invalidate()
         await self.logger.ainfo('END create', response=response, user_id=user_id)
         return response
 
     async def get(self, user_id: UUID) -> List[CategoryResponse]:
-        """Get all categories"""
-        result = await self.db.execute(select(Category).where(Category.user_id.in_([user_id, ADMIN_USER_ID])))
+        """Get default categories followed by those created by user"""
+        defaults = await self.defaults.get(self.db)
+        return [*defaults.items, *await self._load_user_categories(user_id)]
+
+    async def get_json(self, user_id: UUID) -> bytes:
+        """Same as `get` but serialized, joining the pre-serialized default tree and the
+        cached user categories"""
+        defaults = await self.defaults.get(self.db)
+        return join_json_arrays(defaults.json, await self._get_user_categories_json(user_id))
+
+    async def _get_user_categories_json(self, user_id: UUID) -> bytes:
+        if user_id == ADMIN_USER_ID:
+            return b'[]'
+        # The default tree has its own cache, only the user's categories are cached here
+        return await self.cache.get_or_load(
+            CacheKey(user_id, CATEGORIES, await self.versions.get(user_id, CATEGORIES), 'own'), category_list_adapter,
+            lambda: self._load_user_categories(user_id)
+        )
+
+    async def _load_user_categories(self, user_id: UUID) -> List[CategoryResponse]:
+        if user_id == ADMIN_USER_ID:
+            return []
+        result = await self.read_db.execute(SELECT_USER_CATEGORIES, {'user_id': user_id})
         categories = result.scalars().all()
-        response = [CategoryResponse.model_validate(category) for category in categories]
-        return response
+        return [CategoryResponse.model_validate(category) for category in categories]
 
 CategoryServiceDep = Annotated[CategoryService, Depends(CategoryService)]
\ No newline at end of file
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ...domain.configs.categories_init import ADMIN_USER_ID
+from ...domain.schemas.category import CategoryResponse
+from ...domain.schemas.adapters import category_list_adapter
+from ...infrastructure.database.models.category import Category
+from ...infrastructure.tracing import cache_span
+
+SELECT_DEFAULT_CATEGORIES = select(Category).where(Category.user_id == ADMIN_USER_ID).order_by(Category.id)
+
+def join_json_arrays(*arrays: bytes) -> bytes:
+    """Concatenate already serialized JSON arrays without parsing them again"""
+    items = [array[1:-1] for array in arrays if len(array) > 2]
+    return b'[' + b','.join(items) + b']'
+
+@dataclass(frozen=True)
+class DefaultCategories:
+    version: str
+    items: tuple[CategoryResponse, ...]
+    json: bytes
+
+class DefaultCategoriesCache:
+    """Per-worker snapshot of the ADMIN default category tree.
+
+    The tree is loaded once, validated and serialized, and then shared by every
+    request until it is invalidated by an admin write or gets older than `max_age`
+    (which picks up writes made by other workers).
+    """
+    def __init__(self, max_age: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.max_age = max_age
+        self._clock = clock
+        self._snapshot: DefaultCategories | None = None
+        self._loaded_at = 0.0
+        # Bumped by `invalidate`, a load that overlapped it is not kept
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def snapshot(self) -> DefaultCategories | None:
+        return self._snapshot
+
+    def _is_fresh(self) -> bool:
+        return self._snapshot is not None and self._clock() - self._loaded_at < self.max_age
+
+    async def get(self, db: AsyncSession) -> DefaultCategories:
+        with cache_span('default_categories') as span:
+            if self._is_fresh():
+                self.hits += 1
+                span.set_attribute('cache.hit', True)
+                return self._snapshot
+            self.misses += 1
+            span.set_attribute('cache.hit', False)
+            async with self._lock:
+                if self._is_fresh():
+                    return self._snapshot
+                generation = self._generation
+                snapshot = await self._load(db)
+                if self._generation == generation:
+                    self._snapshot = snapshot
+                    self._loaded_at = self._clock()
+                return snapshot
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    @staticmethod
+    async def _load(db: AsyncSession) -> DefaultCategories:
+        result = await db.execute(SELECT_DEFAULT_CATEGORIES)
+        items = tuple(CategoryResponse.model_validate(category) for category in result.scalars().all())
+        json = category_list_adapter.dump_json(list(items))
+        return DefaultCategories(version=hashlib.sha256(json).hexdigest()[:16], items=items, json=json)
+
+def get_default_categories_cache(request: Request) -> DefaultCategoriesCache:
+    return request.app.state.default_categories
@@ -0,0 +1,76 @@
+from typing import Annotated, AsyncIterator, Union
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.future import select
+
+from ...domain.configs.config import Settings, get_settings
+from ...domain.configs.categories_init import ADMIN_USER_ID
+from ...domain.ports import SpecificationResolver
+from ...domain.schemas import SimpleBudget, CategoryBudget, PercentageBudget
+from ...domain.schemas.category import CategoryResponse
+from ...domain.specifications import AuthorSpec
+from ...infrastructure import NamedLogger, get_resolver
+from ...infrastructure.database.routing import get_read_session_maker
+from ...infrastructure.database.models import Budget
+from ...infrastructure.database.models.category import Category
+from ...infrastructure.database.repositories import BudgetRepository
+from .default_categories import DefaultCategoriesCache, get_default_categories_cache
+
+class ExportService:
+    """Streams every budget or category of a user for the export endpoints.
+
+    Streaming response bodies are sent after request scoped dependencies are closed,
+    so each export opens its own session, which lives exactly as long as the stream.
+    Exports are read-only and run on a replica when one can serve the user.
+    """
+    def __init__(self,
+                 session_maker: async_sessionmaker = Depends(get_read_session_maker),
+                 budget_resolver: SpecificationResolver = Depends(get_resolver(Budget)),
+                 defaults: DefaultCategoriesCache = Depends(get_default_categories_cache),
+                 settings: Settings = Depends(get_settings),
+                 logger = Depends(NamedLogger('export_service'))):
+        self.session_maker = session_maker
+        self.budget_resolver = budget_resolver
+        self.defaults = defaults
+        self.batch_size = settings.export_batch_size
+        self.logger = logger
+
+    async def export_budgets(self, user_id: UUID) -> AsyncIterator[Union[SimpleBudget, CategoryBudget, PercentageBudget]]:
+        count = 0
+        try:
+            async with self.session_maker() as db:
+                async for budget in BudgetRepository(db, self.budget_resolver).stream(AuthorSpec(user_id), self.batch_size):
+                    count += 1
+                    yield budget
+        finally:
+            await self.logger.ainfo('END export_budgets', user_id=user_id, budgets_count=count)
+
+    async def export_categories(self, user_id: UUID) -> AsyncIterator[CategoryResponse]:
+        """Default categories followed by those created by user, same order as `CategoryService.get`"""
+        count = 0
+        try:
+            async with self.session_maker() as db:
+                defaults = await self.defaults.get(db)
+                for category in defaults.items:
+                    count += 1
+                    yield category
+                if user_id == ADMIN_USER_ID:
+                    return
+                result = await db.stream_scalars(
+                    select(Category)
+                    .where(Category.user_id == user_id)
+                    .order_by(Category.id)
+                    .execution_options(yield_per=self.batch_size)
+                )
+                try:
+                    async for category in result:
+                        count += 1
+                        yield CategoryResponse.model_validate(category)
+                finally:
+                    await result.close()
+        finally:
+            await self.logger.ainfo('END export_categories', user_id=user_id, categories_count=count)
+
+ExportServiceDep = Annotated[ExportService, Depends(ExportService)]
@@ -0,0 +1,199 @@
+import codecs
+import csv
+import json
+from collections import defaultdict, deque
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable
+from uuid import UUID
+
+from fastapi import Depends
+from pydantic import ValidationError
+
+from ...domain.configs.config import Settings, get_settings
+from ...domain.schemas import FileFormat, ImportRejection, ImportReport
+from ...domain.schemas.adapters import budget_list_adapter
+from ...domain.schemas.budget_import import MAX_REPORTED_REJECTIONS
+from ...infrastructure import db_session_dep, NamedLogger
+from ...infrastructure.cache import CollectionVersions, get_collection_versions, BUDGETS, ResponseCache, get_response_cache, record_write
+from ...infrastructure.database.bulk_import import BudgetImporter
+from .budget_service import owned_category_ids, unknown_category_errors
+from ...infrastructure.database.loader import TypedBudget
+
+RejectionSink = Callable[[ImportRejection], Awaitable[None]]
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of UTF-8 byte chunks into lines without reading it all"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+class _PendingLines:
+    """Lines handed to the CSV reader as complete records arrive, one reader for the whole stream"""
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+async def parse_records(lines: AsyncIterator[str], format: FileFormat) -> AsyncIterator[tuple[int, dict[str, Any] | None, list | None]]:
+    """Yield `(line, record, errors)` for every non-blank record, one of record/errors is None.
+
+    NDJSON has one record per line. CSV files use the export layout: a header row, one
+    budget per record, empty cells for missing values and envelope categories as a
+    JSON array. A quoted CSV field may span lines, the record is then reported at its
+    first line.
+    """
+    if format == FileFormat.NDJSON:
+        async for line_no, record, errors in _parse_ndjson(lines):
+            yield line_no, record, errors
+        return
+
+    pending = _PendingLines()
+    reader = csv.reader(pending)
+    header = None
+    record_lines: list[str] = []
+    first_line = line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not record_lines:
+            if not line.strip():
+                continue
+            first_line = line_no
+        record_lines.append(line + '\n')
+        # Quotes inside quoted fields are doubled: an odd count means a field is still open
+        if sum(part.count('"') for part in record_lines) % 2:
+            continue
+        pending.lines.extend(record_lines)
+        record_lines = []
+        try:
+            row = next(reader)
+            if header is None:
+                header = row
+                continue
+            if len(row) != len(header):
+                raise ValueError(f'Expected {len(header)} fields, got {len(row)}')
+            record = {field: value for field, value in zip(header, row) if value != ''}
+            if 'categories' in record:
+                record['categories'] = json.loads(record['categories'])
+        except (ValueError, csv.Error) as e:
+            yield first_line, None, [{'type': 'parse_error', 'loc': [], 'msg': str(e)}]
+            continue
+        record.pop('id', None)
+        yield first_line, record, None
+    if record_lines:
+        yield first_line, None, [{'type': 'parse_error', 'loc': [], 'msg': 'Unterminated quoted field'}]
+
+async def _parse_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[tuple[int, dict[str, Any] | None, list | None]]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('Expected a JSON object')
+        except ValueError as e:
+            yield line_no, None, [{'type': 'parse_error', 'loc': [], 'msg': str(e)}]
+            continue
+        record.pop('id', None)
+        yield line_no, record, None
+
+def validate_batch(records: list[dict[str, Any]]) -> tuple[list[int], list[TypedBudget], dict[int, list]]:
+    """Validate a whole batch in one call, re-validating only the valid part when some fail.
+
+    Returns the positions and schemas of valid records and the errors of the others.
+    """
+    try:
+        return list(range(len(records))), budget_list_adapter.validate_python(records), {}
+    except ValidationError as e:
+        errors: dict[int, list] = defaultdict(list)
+        for error in e.errors(include_url=False, include_context=False, include_input=False):
+            index, *loc = error['loc']
+            errors[index].append({**error, 'loc': loc})
+    positions = [index for index in range(len(records)) if index not in errors]
+    return positions, budget_list_adapter.validate_python([records[index] for index in positions]), errors
+
+class ImportService:
+    def __init__(self,
+                 db: db_session_dep,
+                 settings: Settings = Depends(get_settings),
+                 logger = Depends(NamedLogger('import_service')),
+                 versions: CollectionVersions = Depends(get_collection_versions),
+                 cache: Annotated[ResponseCache, Depends(get_response_cache)] = None):
+        self.importer = BudgetImporter(db)
+        self.batch_size = settings.import_batch_size
+        self.logger = logger
+        self.versions = versions
+        self.cache = cache if cache is not None else ResponseCache(None)
+
+    async def import_budgets(self,
+                             lines: AsyncIterator[str],
+                             format: FileFormat,
+                             on_reject: RejectionSink | None = None,
+                             user_id: UUID | None = None) -> ImportReport:
+        """Import budgets from `lines`, `user_id` overrides the owner given in the records.
+
+        Valid records are committed batch by batch; rejected ones are counted, the first
+        of them kept in the report and every one of them passed to `on_reject`.
+        """
+        report = ImportReport()
+
+        async def reject(line: int, errors: list) -> None:
+            rejection = ImportRejection(line=line, errors=errors)
+            report.rejected += 1
+            if len(report.errors) < MAX_REPORTED_REJECTIONS:
+                report.errors.append(rejection)
+            if on_reject is not None:
+                await on_reject(rejection)
+
+        batch: list[tuple[int, dict[str, Any]]] = []
+        async for line, record, errors in parse_records(lines, format):
+            if errors is not None:
+                await reject(line, errors)
+                continue
+            if user_id is not None:
+                record['user_id'] = user_id
+            batch.append((line, record))
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch, report, reject)
+                batch = []
+        if batch:
+            await self._import_batch(batch, report, reject)
+
+        await self.logger.ainfo('END import_budgets', imported=report.imported, rejected=report.rejected)
+        return report
+
+    async def _import_batch(self, batch: list[tuple[int, dict[str, Any]]], report: ImportReport,
+                            reject: Callable[[int, list], Awaitable[None]]) -> None:
+        positions, budgets, errors = validate_batch([record for _, record in batch])
+
+        known_categories = await owned_category_ids(budgets, self.importer.existing_category_ids)
+        valid = []
+        for position, budget in zip(positions, budgets):
+            problems = []
+            if budget.user_id is None:
+                problems.append({'type': 'missing', 'loc': ['user_id'], 'msg': 'Field required'})
+            problems.extend(unknown_category_errors(budget, known_categories.get(budget.user_id, set())))
+            if problems:
+                errors[position] = problems
+            else:
+                valid.append(budget)
+
+        for position in sorted(errors):
+            await reject(batch[position][0], errors[position])
+        async with record_write(self.versions, self.cache, [budget.user_id for budget in valid], BUDGETS):
+            report.imported += await self.importer.import_batch(valid)
+
+ImportServiceDep = Annotated[ImportService, Depends(ImportService)]
@@ -1,10 +1,11 @@
 ﻿from functools import lru_cache
-from typing import Annotated
+from typing import Annotated, Literal
 from fastapi import Depends
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str | None
+    DATABASE_REPLICA_URLS: list[str] = []
     SERVICE_NAME: str = "budget-service"
     echo_sql: bool = False
     debug_logs: bool = False
@@ -12,8 +13,48 @@ class Settings(BaseSettings):
     auth_token_url: str | None
     auth_url: str | None
     auth_audience: str | None
+    # Realm or client role, or scope, of the token allowed on the admin endpoints
+    auth_admin_role: str = 'budget-admin'
     jwks_url: str | None
+    jwks_cache_ttl: float = 300
+    jwks_refresh_margin: float = 60
+    jwks_min_refetch_interval: float = 10
+    jwks_fetch_timeout: float = 5
+    claims_cache_size: int = 10_000
+    claims_cache_max_ttl: float = 300
     json_logs: bool = False
+    log_queue_size: int = 10_000
+    log_overflow: Literal['drop', 'block'] = 'drop'
+    log_batch_size: int = 256
+    access_log_sample_rate: float = 1.0
+    access_log_sample_rates: dict[str, float] = {}
+    slow_request_ms: float = 500
+    query_repeat_limit: int = 10
+    query_repeat_mode: Literal['off', 'warn', 'raise'] = 'off'
+    event_loop_lag_interval: float = 0.5
+    tracing_exporter: Literal['none', 'console', 'file', 'otlp'] = 'none'
+    tracing_sample_ratio: float = 1.0
+    tracing_file: str = 'traces.jsonl'
+    otlp_endpoint: str | None = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_warmup: int = 5
+    db_statement_cache_size: int = 100
+    replica_max_lag: float = 2
+    replica_check_interval: float = 5
+    replica_check_timeout: float = 2
+    read_your_writes_window: float = 10
+    default_categories_max_age: float = 300
+    response_cache_backend: Literal['none', 'memory'] = 'memory'
+    response_cache_ttl: float = 60
+    response_cache_max_entries: int = 10_000
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    export_batch_size: int = 500
+    export_chunk_size: int = 64 * 1024
+    import_batch_size: int = 5000
 
     model_config = SettingsConfigDict(env_file=".env")
 
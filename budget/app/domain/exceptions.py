@@ -1,2 +1,5 @@
 class RepositoryError(Exception):
-    """Base exception for repository issues"""
\ No newline at end of file
+    """Base exception for repository issues"""
+
+class NotFoundError(RepositoryError):
+    """Requested entity does not exist"""
\ No newline at end of file
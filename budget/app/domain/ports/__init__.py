@@ -1,2 +1,2 @@
 from .repository import Repository
-from .specification import Specification, SpecificationResolver
\ No newline at end of file
+from .specification import Specification, SpecificationResolver, AndSpec, OrSpec, NotSpec
\ No newline at end of file
@@ -1,15 +1,86 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from dataclasses import dataclass, fields
+from typing import Any, Hashable
 
 class Specification(ABC):
-    """Abstract base class for query specifications"""
+    """Abstract base class for query specifications.
+
+    Specifications are frozen dataclasses, so equal structures with equal values are
+    equal and hashable. `shape` leaves the values out: two specs with the same shape
+    compile to the same SQL and differ only in bind parameters, see `parameters`.
+    Specs combine with `&`, `|` and `~`.
+    """
     @abstractmethod
     def resolve(self, resolver: 'SpecificationResolver') -> Any:
         pass
 
+    @property
+    def shape(self) -> Hashable:
+        return (type(self), *(_shape_of(getattr(self, field.name)) for field in fields(self)))
+
+    def parameters(self) -> list[Any]:
+        """Values in field order, depth first, None skipped; resolvers bind them in the same order"""
+        values = []
+        for field in fields(self):
+            _collect(getattr(self, field.name), values)
+        return values
+
+    def __and__(self, other: 'Specification') -> 'AndSpec':
+        return AndSpec((self, other))
+
+    def __or__(self, other: 'Specification') -> 'OrSpec':
+        return OrSpec((self, other))
+
+    def __invert__(self) -> 'NotSpec':
+        return NotSpec(self)
+
+def _shape_of(value: Any) -> Hashable:
+    if isinstance(value, Specification):
+        return value.shape
+    if isinstance(value, tuple):
+        return tuple(_shape_of(item) for item in value)
+    # Only whether a value is given changes the SQL, not the value itself
+    return value is not None
+
+def _collect(value: Any, values: list[Any]) -> None:
+    if isinstance(value, Specification):
+        values.extend(value.parameters())
+    elif isinstance(value, tuple):
+        for item in value:
+            _collect(item, values)
+    elif value is not None:
+        values.append(value)
+
+@dataclass(frozen=True)
+class AndSpec(Specification):
+    specs: tuple[Specification, ...]
+
+    def __and__(self, other: Specification) -> 'AndSpec':
+        return AndSpec((*self.specs, other))
+
+    def resolve(self, resolver: 'SpecificationResolver'):
+        return resolver.resolve_and(self.specs)
+
+@dataclass(frozen=True)
+class OrSpec(Specification):
+    specs: tuple[Specification, ...]
+
+    def __or__(self, other: Specification) -> 'OrSpec':
+        return OrSpec((*self.specs, other))
+
+    def resolve(self, resolver: 'SpecificationResolver'):
+        return resolver.resolve_or(self.specs)
+
+@dataclass(frozen=True)
+class NotSpec(Specification):
+    spec: Specification
+
+    def resolve(self, resolver: 'SpecificationResolver'):
+        return resolver.resolve_not(self.spec)
+
 
 class SpecificationResolver(ABC):
     """Translates specifications to ORM-specific constructs"""
     @abstractmethod
     def resolve(self, spec: Specification):
-        pass
\ No newline at end of file
+        pass
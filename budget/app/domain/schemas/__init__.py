@@ -1,3 +1,7 @@
 from .category import CategoryResponse, CategoryCreate, CategoryType
 from .user import User
-from .budget import BudgetCreatePayload, SimpleBudget, PercentageBudget, CategoryBudget, BudgetBase
\ No newline at end of file
+from .budget import BudgetCreatePayload, SimpleBudget, PercentageBudget, CategoryBudget, BudgetBase, BudgetBatchItemResult
+from .pagination import Pagination
+from .filter_params import FilterParams, BudgetFilterParams
+from .file_format import FileFormat
+from .budget_import import ImportRejection, ImportReport
\ No newline at end of file
@@ -0,0 +1,16 @@
+from typing import List
+from pydantic import TypeAdapter
+
+from .budget import BudgetBase, BudgetCreatePayload, BudgetBatchItemResult
+from .category import CategoryResponse
+from .pagination import Pagination
+
+# Building a TypeAdapter compiles its validator and serializer, so they are created
+# once here and shared instead of per call
+budget_adapter = TypeAdapter(BudgetCreatePayload)
+budget_list_adapter = TypeAdapter(List[BudgetCreatePayload])
+budget_base_list_adapter = TypeAdapter(List[BudgetBase])
+budget_page_adapter = TypeAdapter(Pagination[BudgetBase])
+batch_result_list_adapter = TypeAdapter(List[BudgetBatchItemResult])
+category_adapter = TypeAdapter(CategoryResponse)
+category_list_adapter = TypeAdapter(List[CategoryResponse])
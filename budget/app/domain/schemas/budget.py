@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Literal, List, Union, Annotated, Optional
+from typing import Any, Literal, List, Union, Annotated, Optional
 from pydantic import BaseModel, ConfigDict, model_validator, Field
 from uuid import UUID
 from ...infrastructure.database.models.budget import BudgetType
@@ -92,4 +92,11 @@ class PercentageBudget(BudgetBase):
 BudgetCreatePayload = Annotated[
     Union[SimpleBudget, PercentageBudget, CategoryBudget],
     Field(discriminator='type')
-]
\ No newline at end of file
+]
+
+MAX_BATCH_SIZE = 100
+
+class BudgetBatchItemResult(BaseModel):
+    index: int
+    budget: Optional[Union[SimpleBudget, PercentageBudget, CategoryBudget]] = None
+    errors: Optional[List[dict[str, Any]]] = None
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Any, List
+
+MAX_REPORTED_REJECTIONS = 100
+
+class ImportRejection(BaseModel):
+    line: int = Field(..., description="1-based line of the rejected record in the source file")
+    errors: List[dict[str, Any]]
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    rejected: int = 0
+    errors: List[ImportRejection] = Field(default_factory=list, description="First rejected records, see `rejected` for the total")
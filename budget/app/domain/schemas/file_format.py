@@ -0,0 +1,5 @@
+from enum import Enum
+
+class FileFormat(str, Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
@@ -1,20 +1,56 @@
-﻿from typing import Literal
+﻿from datetime import date
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from .pagination import decode_cursor
+from ...infrastructure.database.models.budget import BudgetType
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
 
 class FilterParams(BaseModel):
-    limit: int = Field(100, gt=0, le=100)
-    offset: int = Field(0, ge=0)
-    order_by: Literal["created_at", "updated_at"] = "created_at"
-    tags: list[str] = []
+    limit: int = Field(DEFAULT_PAGE_SIZE, gt=0, le=MAX_PAGE_SIZE)
+    cursor: Optional[str] = None
 
     model_config = {
         "json_schema_extra": {
             "example": {
-                "limit": 100,
-                "offset": 0,
-                "order_by": "created_at",
-                "tags": ["tag1", "tag2"]
+                "limit": 20,
+                "cursor": None
             }
         }
-    }
\ No newline at end of file
+    }
+
+class BudgetFilterParams(FilterParams):
+    type: Optional[BudgetType] = None
+    currency: Optional[Literal['USD', 'HUF', 'UAH']] = None
+    date_from: Optional[date] = Field(None, description="Budgets ending on or after this date")
+    date_to: Optional[date] = Field(None, description="Budgets starting on or before this date")
+
+    @field_validator('cursor')
+    @classmethod
+    def validate_cursor(cls, value):
+        if value is not None:
+            cls.decode_after(value)
+        return value
+
+    @model_validator(mode='after')
+    def validate_dates(self):
+        if self.date_from and self.date_to and self.date_to < self.date_from:
+            raise ValueError('date_to must be after date_from')
+        return self
+
+    @staticmethod
+    def decode_after(cursor: str) -> tuple[date, int]:
+        values = decode_cursor(cursor)
+        try:
+            start_date, id = values
+            return date.fromisoformat(start_date), int(id)
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid cursor') from e
+
+    @property
+    def after(self) -> tuple[date, int] | None:
+        """Keyset `(start_date, id)` of the last budget on the previous page"""
+        return self.decode_after(self.cursor) if self.cursor else None
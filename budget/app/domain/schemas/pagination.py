@@ -1,17 +1,30 @@
+import base64
+import binascii
+import json
+from datetime import date
+from typing import Any, Generic, TypeVar
 from pydantic import BaseModel
 
-class Pagination:
-    page: int
-    per_page: int
-    next_page: str
-    prev_page: str | None = None
-    items: list[BaseModel]
-    def __init__(self, page: int, per_page: int, items: list[BaseModel], url = None):
-        self.page = page
-        self.per_page = per_page
-        self.items = items
-        if page == 0:
-            pass
-        else:
-            self.prev_page = '{}?page={}&per_page={}'.format(url, page - 1, per_page)
-        self.next_page = '{}?page={}&per_page={}'.format(url, page + 1, per_page)
+T = TypeVar('T')
+
+class Pagination(BaseModel, Generic[T]):
+    items: list[T]
+    limit: int
+    next_cursor: str | None = None
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque url-safe cursor from the keyset values of the last returned row"""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, date) else value for value in values],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
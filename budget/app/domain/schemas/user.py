@@ -3,4 +3,5 @@ from uuid import UUID
 
 class User(BaseModel):
     email: str
-    user_id: UUID
\ No newline at end of file
+    user_id: UUID
+    roles: frozenset[str] = frozenset()
\ No newline at end of file
@@ -1 +1,3 @@
-from .author_spec import AuthorSpec
\ No newline at end of file
+from .author_spec import AuthorSpec
+from .budget_specs import DateRangeSpec, ActiveOnDateSpec, BudgetTypeSpec, CurrencySpec, budget_filter_spec
+from ..ports import AndSpec, OrSpec, NotSpec
\ No newline at end of file
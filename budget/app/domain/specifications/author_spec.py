@@ -1,10 +1,11 @@
+from dataclasses import dataclass
 from uuid import UUID
 
 from ..ports import Specification, SpecificationResolver
 
+@dataclass(frozen=True)
 class AuthorSpec(Specification):
-    def __init__(self, user_id: UUID):
-        self.user_id = user_id
+    user_id: UUID
 
     def resolve(self, resolver: SpecificationResolver):
         return resolver.resolve_author(self.user_id)
\ No newline at end of file
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from ..ports import Specification, SpecificationResolver
+from ..schemas.budget import BudgetType
+from ..schemas.filter_params import BudgetFilterParams
+from .author_spec import AuthorSpec
+
+@dataclass(frozen=True)
+class DateRangeSpec(Specification):
+    """Budgets whose period overlaps [date_from, date_to], either bound may be open"""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    def resolve(self, resolver: SpecificationResolver):
+        return resolver.resolve_date_range(self.date_from, self.date_to)
+
+@dataclass(frozen=True)
+class ActiveOnDateSpec(Specification):
+    """Budgets whose period contains `on`"""
+    on: date
+
+    def resolve(self, resolver: SpecificationResolver):
+        return resolver.resolve_active_on(self.on)
+
+@dataclass(frozen=True)
+class BudgetTypeSpec(Specification):
+    type: BudgetType
+
+    def resolve(self, resolver: SpecificationResolver):
+        return resolver.resolve_budget_type(self.type)
+
+@dataclass(frozen=True)
+class CurrencySpec(Specification):
+    currency: str
+
+    def resolve(self, resolver: SpecificationResolver):
+        return resolver.resolve_currency(self.currency)
+
+def budget_filter_spec(user_id, filters: BudgetFilterParams) -> Specification:
+    """Budgets of user matching the query filters of `GET /budget`"""
+    spec = AuthorSpec(user_id)
+    if filters.type is not None:
+        spec = spec & BudgetTypeSpec(filters.type)
+    if filters.currency is not None:
+        spec = spec & CurrencySpec(filters.currency)
+    if filters.date_from is not None or filters.date_to is not None:
+        spec = spec & DateRangeSpec(filters.date_from, filters.date_to)
+    return spec
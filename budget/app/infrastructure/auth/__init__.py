@@ -1 +1,3 @@
-from .auth import current_user_dep
\ No newline at end of file
+from .auth import current_user_dep, admin_user_dep
+from .jwks import JWKSCache
+from .claims_cache import ClaimsCache
\ No newline at end of file
@@ -1,12 +1,14 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2AuthorizationCodeBearer
 from uuid import UUID
 import jwt
-from jwt import PyJWKClient
 from typing import Annotated
 from ...domain.configs.config import settings_dep, get_settings
 from ...domain.schemas.user import User
 from .. import NamedLogger
+from .jwks import JWKSCache
+from .claims_cache import ClaimsCache
+from ..tracing import tracer, cache_span
 from structlog.stdlib import BoundLogger
 
 settings = get_settings()
@@ -16,21 +18,51 @@ auth_scheme = OAuth2AuthorizationCodeBearer(
         refreshUrl=settings.auth_token_url
     )
 
-def get_jwks_client(settings: settings_dep) -> PyJWKClient:
-    return PyJWKClient(settings.jwks_url)
+def get_jwks_cache(request: Request) -> JWKSCache:
+    return request.app.state.jwks_cache
+
+def get_claims_cache(request: Request) -> ClaimsCache:
+    return request.app.state.claims_cache
+
+def token_roles(claims: dict, client_id: str | None) -> frozenset[str]:
+    """Keycloak realm roles, roles of this client and the granted scopes"""
+    roles = set(claims.get("realm_access", {}).get("roles", []))
+    if client_id:
+        roles.update(claims.get("resource_access", {}).get(client_id, {}).get("roles", []))
+    roles.update(claims.get("scope", "").split())
+    return frozenset(roles)
 
 async def get_current_user(
         settings: settings_dep, 
         logger: BoundLogger =  Depends(NamedLogger('auth')),
         token:str = Depends(auth_scheme),
-        jwks_client: PyJWKClient = Depends(get_jwks_client)) -> User:
+        jwks_cache: JWKSCache = Depends(get_jwks_cache),
+        claims_cache: ClaimsCache = Depends(get_claims_cache)) -> User:
+    with cache_span('claims') as span:
+        user = claims_cache.get(token)
+        span.set_attribute('cache.hit', user is not None)
+    if user is not None:
+        return user
     try:
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
-        claims = jwt.decode(token, signing_key.key, algorithms=["RS256"], audience=settings.auth_audience)
-        user = User(email=claims["email"], user_id=UUID(claims["sub"]))
+        with tracer.start_as_current_span('jwt.verify') as span:
+            signing_key = await jwks_cache.get_signing_key_from_jwt(token)
+            claims = jwt.decode(token, signing_key.key, algorithms=["RS256"], audience=settings.auth_audience)
+            span.set_attribute('enduser.id', claims["sub"])
+        user = User(
+            email=claims["email"],
+            user_id=UUID(claims["sub"]),
+            roles=token_roles(claims, settings.auth_audience))
+        claims_cache.put(token, user, claims.get("exp"))
         return user
     except Exception as e:
         await logger.aexception("Invalid token", exc_info=e)
         raise HTTPException(status_code=401, detail="Invalid token") from e
     
-current_user_dep = Annotated[User, Depends(get_current_user)]
\ No newline at end of file
+current_user_dep = Annotated[User, Depends(get_current_user)]
+
+def get_admin_user(settings: settings_dep, user: current_user_dep) -> User:
+    if settings.auth_admin_role not in user.roles:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return user
+
+admin_user_dep = Annotated[User, Depends(get_admin_user)]
\ No newline at end of file
@@ -0,0 +1,70 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from ...domain.schemas.user import User
+
+class ClaimsCache:
+    """Bounded LRU of already verified tokens.
+
+    Entries are keyed by the SHA-256 digest of the raw token (the token itself is
+    never stored) and expire at the token's `exp`, capped by `max_ttl` seconds.
+    """
+    def __init__(self, max_size: int = 10_000, max_ttl: float = 300, clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[User, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> User | None:
+        key = self._digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: User, exp: float | None) -> None:
+        if exp is None or self.max_size <= 0:
+            return
+        expires_at = min(float(exp), self._clock() + self.max_ttl)
+        if expires_at <= self._clock():
+            return
+        key = self._digest(token)
+        self._entries[key] = (user, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Any
+
+import httpx
+import jwt
+import structlog
+from jwt import PyJWK, PyJWKSet
+from jwt.exceptions import PyJWKClientError
+
+from ...domain.configs.config import Settings
+from ..tracing import cache_span
+
+logger = structlog.stdlib.get_logger('jwks')
+
+class JWKSCache:
+    """Process-wide cache of the IdP signing keys indexed by `kid`.
+
+    Keys are refreshed in the background before `ttl` runs out. An unknown `kid`
+    triggers at most one refetch at a time (and not more often than
+    `min_refetch_interval`). When the IdP is unreachable the last good keys are kept.
+    """
+    def __init__(self,
+                 jwks_url: str,
+                 ttl: float = 300,
+                 refresh_margin: float = 60,
+                 min_refetch_interval: float = 10,
+                 fetch_timeout: float = 5,
+                 client: httpx.AsyncClient | None = None):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl)
+        self.min_refetch_interval = min_refetch_interval
+        self._client = client or httpx.AsyncClient(timeout=fetch_timeout)
+        self._owns_client = client is None
+        self._keys: dict[str, PyJWK] = {}
+        self._fetched_at: float | None = None
+        self._last_attempt: float | None = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+        # Lookups served from the cached keys, and those that had to refetch or failed
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'JWKSCache':
+        return cls(
+            settings.jwks_url,
+            ttl=settings.jwks_cache_ttl,
+            refresh_margin=settings.jwks_refresh_margin,
+            min_refetch_interval=settings.jwks_min_refetch_interval,
+            fetch_timeout=settings.jwks_fetch_timeout
+        )
+
+    @property
+    def keys(self) -> dict[str, PyJWK]:
+        return self._keys
+
+    async def start(self) -> None:
+        """Load the keys and start the background refresh task"""
+        await self.refresh()
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(), name='jwks-refresh')
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def get_signing_key_from_jwt(self, token: str) -> PyJWK:
+        header = jwt.get_unverified_header(token)
+        return await self.get_signing_key(header.get('kid'))
+
+    async def get_signing_key(self, kid: str | None) -> PyJWK:
+        with cache_span('jwks') as span:
+            key = self._keys.get(kid)
+            span.set_attribute('cache.hit', key is not None)
+            if key is not None:
+                self.hits += 1
+                return key
+            self.misses += 1
+            await self._refetch_unknown(kid)
+        key = self._keys.get(kid)
+        if key is None:
+            raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    async def refresh(self) -> bool:
+        """Refetch the key set. Returns False and keeps the current keys on failure"""
+        async with self._lock:
+            return await self._fetch()
+
+    async def _refetch_unknown(self, kid: str | None) -> None:
+        async with self._lock:
+            if kid in self._keys:
+                return
+            if self._last_attempt is not None and time.monotonic() - self._last_attempt < self.min_refetch_interval:
+                return
+            await self._fetch()
+
+    async def _fetch(self) -> bool:
+        self._last_attempt = time.monotonic()
+        try:
+            response = await self._client.get(self.jwks_url)
+            response.raise_for_status()
+            keys = self._parse(response.json())
+        except Exception as e:
+            await logger.awarning('JWKS refresh failed, serving cached keys',
+                                  jwks_url=self.jwks_url, cached_keys=len(self._keys), exc_info=e)
+            return False
+
+        self._keys = keys
+        self._fetched_at = self._last_attempt
+        return True
+
+    @staticmethod
+    def _parse(data: dict[str, Any]) -> dict[str, PyJWK]:
+        jwk_set = PyJWKSet.from_dict(data)
+        keys = {
+            key.key_id: key
+            for key in jwk_set.keys
+            if key.public_key_use in ['sig', None] and key.key_id
+        }
+        if not keys:
+            raise PyJWKClientError('The JWKS endpoint did not contain any signing keys')
+        return keys
+
+    def _next_refresh_delay(self) -> float:
+        if self._fetched_at is None or self._fetched_at != self._last_attempt:
+            # Last attempt failed, retry soon but don't hammer the IdP
+            return self.min_refetch_interval
+        return max(self.ttl - self.refresh_margin, self.min_refetch_interval)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_refresh_delay())
+            await self.refresh()
@@ -0,0 +1,3 @@
+from .versions import CollectionVersions, get_collection_versions, BUDGETS, CATEGORIES
+from .single_flight import SingleFlight
+from .response_cache import CacheKey, CacheBackend, LRUBackend, SharedBackend, KeyValueStore, LocalStore, ResponseCache, get_response_cache, record_write
\ No newline at end of file
@@ -0,0 +1,274 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Protocol, TypeVar
+from uuid import UUID
+
+from fastapi import Request
+from pydantic import TypeAdapter
+
+from ...domain.configs.config import Settings
+from ..tracing import cache_span
+from .single_flight import SingleFlight
+from .versions import CollectionVersions
+
+T = TypeVar('T')
+
+@dataclass(frozen=True)
+class CacheKey:
+    """A read of one user's collection at a version; `query` names the read and its arguments"""
+    user_id: UUID
+    collection: str
+    version: str
+    query: str
+
+    @property
+    def scope(self) -> tuple[UUID, str]:
+        """What a write to the collection invalidates"""
+        return self.user_id, self.collection
+
+class CacheBackend(ABC):
+    """Storage of serialized reads, invalidated a whole scope at a time"""
+    @abstractmethod
+    async def get(self, key: CacheKey) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: CacheKey, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, user_id: UUID, collection: str) -> None:
+        ...
+
+    def __len__(self) -> int:
+        return 0
+
+    @property
+    def memory_bytes(self) -> int | None:
+        """Bytes held by the cached values, None when the backend can't tell"""
+        return None
+
+class LRUBackend(CacheBackend):
+    """In-process LRU bounded by entry count and by the bytes of the cached values.
+
+    Each scope keeps the set of its keys, so a write drops exactly the reads of that
+    user's collection made in this worker; those of the other workers are keyed by an
+    older version and age out.
+    """
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, tuple[bytes, float]] = OrderedDict()
+        self._scopes: dict[tuple[UUID, str], set[CacheKey]] = {}
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    async def get(self, key: CacheKey) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: CacheKey, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, self._clock() + ttl)
+        self._scopes.setdefault(key.scope, set()).add(key)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate(self, user_id: UUID, collection: str) -> None:
+        for key in self._scopes.pop((user_id, collection), ()):
+            value, _ = self._entries.pop(key)
+            self._bytes -= len(value)
+
+    def _remove(self, key: CacheKey) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+        keys = self._scopes.get(key.scope)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._scopes[key.scope]
+
+class KeyValueStore(Protocol):
+    """The commands `SharedBackend` needs, a subset of `redis.asyncio.Redis`"""
+    async def get(self, name: str) -> bytes | None: ...
+    async def set(self, name: str, value: bytes, ex: int | None = None) -> object: ...
+    async def delete(self, *names: str) -> int: ...
+    async def sadd(self, name: str, *values: str) -> int: ...
+    async def smembers(self, name: str) -> set: ...
+    async def expire(self, name: str, time: int) -> object: ...
+
+class SharedBackend(CacheBackend):
+    """Backend on a store shared by the workers, e.g. Redis.
+
+    The keys of a scope are tracked in a set next to the values, invalidating deletes
+    them and the set, whichever worker cached them.
+    """
+    def __init__(self, store: KeyValueStore, namespace: str = 'responses'):
+        self.store = store
+        self.namespace = namespace
+
+    def _scope_name(self, user_id: UUID, collection: str) -> str:
+        return f'{self.namespace}:{user_id}:{collection}'
+
+    def _name(self, key: CacheKey) -> str:
+        return f'{self._scope_name(key.user_id, key.collection)}:{key.version}:{key.query}'
+
+    async def get(self, key: CacheKey) -> bytes | None:
+        return await self.store.get(self._name(key))
+
+    async def set(self, key: CacheKey, value: bytes, ttl: float) -> None:
+        seconds = max(int(ttl), 1)
+        scope = self._scope_name(key.user_id, key.collection)
+        await self.store.set(self._name(key), value, ex=seconds)
+        await self.store.sadd(scope, self._name(key))
+        # Outlives every value it lists
+        await self.store.expire(scope, seconds)
+
+    async def invalidate(self, user_id: UUID, collection: str) -> None:
+        scope = self._scope_name(user_id, collection)
+        names = [name.decode() if isinstance(name, bytes) else name for name in await self.store.smembers(scope)]
+        await self.store.delete(scope, *names)
+
+class LocalStore:
+    """In-memory `KeyValueStore` standing in for the shared store in tests and development"""
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._values: dict[str, tuple[object, float | None]] = {}
+
+    def _live(self, name: str):
+        entry = self._values.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._values[name]
+            return None
+        return value
+
+    async def get(self, name: str) -> bytes | None:
+        return self._live(name)
+
+    async def set(self, name: str, value: bytes, ex: int | None = None) -> bool:
+        self._values[name] = (value, None if ex is None else self._clock() + ex)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(self._values.pop(name, None) is not None for name in names)
+
+    async def sadd(self, name: str, *values: str) -> int:
+        members = self._live(name)
+        if members is None:
+            members = set()
+            self._values[name] = (members, None)
+        added = len(set(values) - members)
+        members.update(values)
+        return added
+
+    async def smembers(self, name: str) -> set:
+        return set(self._live(name) or ())
+
+    async def expire(self, name: str, time: int) -> bool:
+        value = self._live(name)
+        if value is None:
+            return False
+        self._values[name] = (value, self._clock() + time)
+        return True
+
+class ResponseCache:
+    """Read-through cache of service reads, keyed by the collection version.
+
+    Reads are returned and stored as JSON from their `TypeAdapter`: hits go to the
+    response as they are, without being validated and serialized again, any backend
+    can hold them and their size is known. The version in the key is taken before the read, a
+    write committed since gives the next reads a new key, in every worker; invalidating
+    only frees the entries of the older versions. Concurrent misses of a key share one
+    `load`. Without a backend nothing is stored, concurrent reads are still coalesced.
+    """
+    def __init__(self, backend: CacheBackend | None, ttl: float = 60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.flights: SingleFlight = SingleFlight()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'ResponseCache':
+        backend = None
+        if settings.response_cache_backend == 'memory':
+            backend = LRUBackend(settings.response_cache_max_entries, settings.response_cache_max_bytes)
+        return cls(backend, ttl=settings.response_cache_ttl)
+
+    def __len__(self) -> int:
+        return len(self.backend) if self.backend is not None else 0
+
+    @property
+    def memory_bytes(self) -> int | None:
+        return self.backend.memory_bytes if self.backend is not None else None
+
+    async def get_or_load(self, key: CacheKey, adapter: TypeAdapter[T],
+                          load: Callable[[], Awaitable[T | None]]) -> bytes | None:
+        """`load()` serialized with `adapter`, None when it returns None, which is not stored"""
+        if self.backend is None:
+            return await self.flights.do(key, lambda: self._load(adapter, load))
+        with cache_span('responses') as span:
+            cached = await self.backend.get(key)
+            span.set_attribute('cache.hit', cached is not None)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        return await self.flights.do(key, lambda: self._load_and_store(key, adapter, load))
+
+    @staticmethod
+    async def _load(adapter: TypeAdapter[T], load: Callable[[], Awaitable[T | None]]) -> bytes | None:
+        value = await load()
+        return None if value is None else adapter.dump_json(value)
+
+    async def _load_and_store(self, key: CacheKey, adapter: TypeAdapter[T],
+                              load: Callable[[], Awaitable[T | None]]) -> bytes | None:
+        value = await self._load(adapter, load)
+        if value is not None:
+            await self.backend.set(key, value, self.ttl)
+        return value
+
+    async def invalidate(self, user_id: UUID, collection: str) -> None:
+        if self.backend is not None:
+            await self.backend.invalidate(user_id, collection)
+
+@asynccontextmanager
+async def record_write(versions: CollectionVersions, cache: ResponseCache,
+                       user_ids: Iterable[UUID], collection: str) -> AsyncIterator[None]:
+    """Wraps every write to the users' collection, which must commit the session of
+    `versions`: new versions in the write's transaction, cached reads dropped after it"""
+    user_ids = set(user_ids)
+    await versions.bump(user_ids, collection)
+    yield
+    for user_id in user_ids:
+        await cache.invalidate(user_id, collection)
+
+def get_response_cache(request: Request) -> ResponseCache:
+    return request.app.state.response_cache
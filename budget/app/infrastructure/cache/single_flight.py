@@ -0,0 +1,52 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar('T')
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls with the same key into one.
+
+    The first caller of a key runs `load`, callers arriving while it is in flight wait
+    for its result or exception instead of running their own. Nothing is kept once the
+    call ends, the next caller loads again. Waiters share the returned object, it must
+    not be mutated. `hits` counts the callers served by another's call, `misses` the
+    calls made.
+    """
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is not None:
+            self.hits += 1
+            try:
+                # A waiter going away must not cancel the call of the others
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The caller running the call was cancelled, not this one: run it again
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.do(key, load)
+                raise
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Retrieved, so asyncio doesn't log it when no one else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._calls[key]
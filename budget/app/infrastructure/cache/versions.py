@@ -0,0 +1,84 @@
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import String, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..database.models import CollectionVersion
+from ..dependency import db_session_dep
+from ...domain.exceptions import RepositoryError
+
+BUDGETS = 'budgets'
+CATEGORIES = 'categories'
+
+# All the collections of a user, a range of the primary key
+SELECT_VERSIONS = select(
+    CollectionVersion.collection,
+    CollectionVersion.version,
+    func.extract('epoch', func.now() - CollectionVersion.written_at)
+).where(CollectionVersion.user_id == bindparam('user_id'))
+
+_bumped = select(
+    func.unnest(bindparam('user_ids', type_=ARRAY(CollectionVersion.user_id.type))),
+    bindparam('collection', type_=String)
+)
+_insert = insert(CollectionVersion).from_select([CollectionVersion.user_id, CollectionVersion.collection], _bumped)
+BUMP_VERSIONS = _insert.on_conflict_do_update(
+    index_elements=[CollectionVersion.user_id, CollectionVersion.collection],
+    set_={'version': CollectionVersion.version + 1, 'written_at': func.now()}
+)
+
+class CollectionVersions:
+    """Version stamp of each user's collections, shared by every worker through the
+    `collection_versions` table.
+
+    The services bump the versions in the transaction of the write, see `record_write`,
+    so a version and the data it stands for commit together. A read must take the
+    version *before* reading the data: a write racing with the read then only produces
+    a tag that never matches again, never a stale 304. A user's versions are read once
+    per request, with the age of their last write, see `DatabaseRouter`.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._users: dict[UUID, dict[str, tuple[int, float]]] = {}
+
+    async def _load(self, user_id: UUID) -> dict[str, tuple[int, float]]:
+        versions = self._users.get(user_id)
+        if versions is None:
+            try:
+                result = await self.db.execute(SELECT_VERSIONS, {'user_id': user_id})
+            except SQLAlchemyError as e:
+                raise RepositoryError("Can't read from the database") from e
+            versions = self._users[user_id] = {collection: (version, float(age)) for collection, version, age in result}
+        return versions
+
+    async def get(self, user_id: UUID, collection: str) -> str:
+        version, _ = (await self._load(user_id)).get(collection, (0, None))
+        return str(version)
+
+    async def seconds_since_write(self, user_id: UUID) -> float | None:
+        """Seconds since the user's last write to any collection, None if they never wrote"""
+        ages = [age for _, age in (await self._load(user_id)).values()]
+        return min(ages) if ages else None
+
+    async def bump(self, user_ids: Iterable[UUID], collection: str) -> None:
+        """Next version of the users' collection, in the open transaction of the session:
+        it only counts once the write commits and is gone if it rolls back"""
+        # Rows are locked in a fixed order, concurrent writes of several users don't deadlock
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        try:
+            await self.db.execute(BUMP_VERSIONS, {'user_ids': user_ids, 'collection': collection})
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise RepositoryError('Database operation failed') from e
+        for user_id in user_ids:
+            self._users.pop(user_id, None)
+
+def get_collection_versions(db: db_session_dep) -> CollectionVersions:
+    """Versions read and bumped on the request's primary session"""
+    return CollectionVersions(db)
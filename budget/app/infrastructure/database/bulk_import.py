@@ -0,0 +1,162 @@
+from decimal import Decimal
+from typing import Iterable, Sequence
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import Column, Integer, MetaData, String, Table, cast, func, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.schema import CreateTable
+
+from .models import Budget, SimpleBudget, PercentageBudget, EnvelopBudget, Category
+from .models.budget import BudgetType
+from .loader import TypedBudget
+from ...domain.configs.categories_init import ADMIN_USER_ID
+from ...domain.exceptions import RepositoryError
+
+staging = MetaData()
+
+budget_staging = Table(
+    'budget_import', staging,
+    Column('id', Integer, nullable=False),
+    Column('user_id', Budget.user_id.type, nullable=False),
+    Column('name', Budget.name.type, nullable=False),
+    Column('type', String(10), nullable=False),
+    Column('currency', Budget.currency.type, nullable=False),
+    Column('start_date', Budget.start_date.type, nullable=False),
+    Column('end_date', Budget.end_date.type, nullable=False),
+    Column('total_amount', SimpleBudget.total_amount.type),
+    Column('needs_percent', PercentageBudget.needs_percent.type),
+    Column('wants_percent', PercentageBudget.wants_percent.type),
+    Column('savings_percent', PercentageBudget.savings_percent.type),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DROP',
+)
+
+envelope_staging = Table(
+    'envelop_budget_import', staging,
+    Column('budget_id', Integer, nullable=False),
+    Column('category_id', EnvelopBudget.category_id.type, nullable=False),
+    Column('allocated_amount', EnvelopBudget.allocated_amount.type, nullable=False),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DROP',
+)
+
+def _decimal(value: float | None) -> Decimal | None:
+    return None if value is None else Decimal(str(value))
+
+def budget_record(id: int, budget: TypedBudget) -> tuple:
+    """Row of `budget_staging`; the type is stored by name, like `budget_type_enum` labels"""
+    return (
+        id,
+        budget.user_id,
+        budget.name,
+        BudgetType(budget.type).name,
+        budget.currency,
+        budget.start_date,
+        budget.end_date,
+        _decimal(getattr(budget, 'total_amount', None)),
+        _decimal(getattr(budget, 'needs_percent', None)),
+        _decimal(getattr(budget, 'wants_percent', None)),
+        _decimal(getattr(budget, 'savings_percent', None)),
+    )
+
+def envelope_records(id: int, budget: TypedBudget) -> Iterable[tuple]:
+    if budget.type != BudgetType.ENVELOPE:
+        return ()
+    return ((id, c.category_id, _decimal(c.amount)) for c in budget.categories)
+
+def merge_statements() -> list:
+    """Set-based INSERT ... SELECT from the staging tables into the four budget tables"""
+    budget_type = budget_staging.c.type
+    return [
+        insert(Budget).from_select(
+            [Budget.id, Budget.user_id, Budget.name, Budget.type, Budget.currency, Budget.start_date, Budget.end_date],
+            select(
+                budget_staging.c.id,
+                budget_staging.c.user_id,
+                budget_staging.c.name,
+                cast(budget_type, Budget.type.type),
+                budget_staging.c.currency,
+                budget_staging.c.start_date,
+                budget_staging.c.end_date,
+            ).order_by(budget_staging.c.id)
+        ),
+        insert(SimpleBudget).from_select(
+            [SimpleBudget.id, SimpleBudget.total_amount],
+            select(budget_staging.c.id, budget_staging.c.total_amount)
+            .where(budget_type == BudgetType.SIMPLE.name)
+        ),
+        insert(PercentageBudget).from_select(
+            [PercentageBudget.id, PercentageBudget.needs_percent, PercentageBudget.wants_percent, PercentageBudget.savings_percent],
+            select(budget_staging.c.id, budget_staging.c.needs_percent, budget_staging.c.wants_percent, budget_staging.c.savings_percent)
+            .where(budget_type == BudgetType.PERCENTAGE.name)
+        ),
+        insert(EnvelopBudget).from_select(
+            [EnvelopBudget.budget_id, EnvelopBudget.category_id, EnvelopBudget.allocated_amount],
+            select(envelope_staging.c.budget_id, envelope_staging.c.category_id, envelope_staging.c.allocated_amount)
+        ),
+    ]
+
+async def reserve_ids(db: AsyncSession, table: str, count: int) -> Sequence[int]:
+    """Take `count` values of the `id` sequence of `table` in one round-trip"""
+    return (await db.scalars(
+        select(func.nextval(func.pg_get_serial_sequence(table, 'id')))
+        .select_from(func.generate_series(1, count))
+    )).all()
+
+async def existing_category_ids(db: AsyncSession, owner_id: UUID, ids: Iterable[int]) -> set[int]:
+    """The ids among `ids` of a category `owner_id` may use, one of its own or a default one"""
+    ids = set(ids)
+    if not ids:
+        return set()
+    try:
+        result = await db.scalars(
+            select(Category.id).where(Category.id.in_(ids), Category.user_id.in_((owner_id, ADMIN_USER_ID)))
+        )
+        return set(result.all())
+    except SQLAlchemyError as e:
+        raise RepositoryError("Can't read from the database") from e
+
+class BudgetImporter:
+    """Loads validated budgets with COPY, one transaction per batch.
+
+    Budget ids are taken from the `budgets` sequence up front, so subtype and
+    envelope rows can be staged next to their budget without a round-trip per row.
+    Rows are COPYed into temporary staging tables (dropped on commit) and merged
+    into the real tables with one INSERT ... SELECT per table.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def existing_category_ids(self, owner_id: UUID, ids: Iterable[int]) -> set[int]:
+        return await existing_category_ids(self.db, owner_id, ids)
+
+    async def import_batch(self, budgets: Sequence[TypedBudget]) -> int:
+        if not budgets:
+            return 0
+        try:
+            ids = await reserve_ids(self.db, Budget.__tablename__, len(budgets))
+
+            for table in (budget_staging, envelope_staging):
+                await self.db.execute(CreateTable(table))
+            connection = await self.db.connection()
+            raw = (await connection.get_raw_connection()).driver_connection
+            await raw.copy_records_to_table(
+                budget_staging.name,
+                records=[budget_record(id, budget) for id, budget in zip(ids, budgets)],
+                columns=[column.name for column in budget_staging.columns]
+            )
+            await raw.copy_records_to_table(
+                envelope_staging.name,
+                records=[record for id, budget in zip(ids, budgets) for record in envelope_records(id, budget)],
+                columns=[column.name for column in envelope_staging.columns]
+            )
+            for statement in merge_statements():
+                await self.db.execute(statement)
+            await self.db.commit()
+        except (SQLAlchemyError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            await self.db.rollback()
+            raise RepositoryError('Database operation failed') from e
+        return len(budgets)
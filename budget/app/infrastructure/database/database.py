@@ -1,22 +1,49 @@
-﻿from typing import AsyncGenerator
+﻿import asyncio
+from typing import AsyncGenerator
 
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
-from fastapi import Depends
-from ...domain.configs.config import get_settings, Settings
+from fastapi import Request
+from ...domain.configs.config import Settings
 
 DATABASE_NOT_INITIALIZED = "Database session manager has not been initialized"
 
-def create_engine_and_session(settings: Settings):
-    engine: AsyncEngine = create_async_engine(settings.DATABASE_URL, echo=settings.echo_sql)
+def create_engine_and_session(settings: Settings, url: str | None = None):
+    """Engine and session factory of `url`, the primary `DATABASE_URL` by default"""
+    url = url or settings.DATABASE_URL
+    connect_args = {}
+    if make_url(url).get_driver_name() == 'asyncpg':
+        connect_args = {
+            'statement_cache_size': settings.db_statement_cache_size,
+            'prepared_statement_cache_size': settings.db_statement_cache_size,
+        }
+    engine: AsyncEngine = create_async_engine(
+        url,
+        echo=settings.echo_sql,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
     session_maker = async_sessionmaker(bind=engine, autocommit=False)
     return engine, session_maker
 
-async def get_db(settings: Settings = Depends(get_settings)) -> AsyncGenerator[AsyncSession, None]:
-    engine, session_maker = create_engine_and_session(settings)
-    async with session_maker() as session:
-        try:
-            yield session
-        finally:
-            await session.aclose()
+async def warm_up_pool(engine: AsyncEngine, size: int) -> None:
+    """Open `size` connections at once and return them to the pool"""
+    if size <= 0:
+        return
+    connections = await asyncio.gather(*(engine.connect() for _ in range(size)))
+    await asyncio.gather(*(connection.close() for connection in connections))
 
-        await engine.dispose()
\ No newline at end of file
+def get_session_maker(request: Request) -> async_sessionmaker:
+    """For code that outlives the request scope, e.g. streaming response bodies"""
+    session_maker: async_sessionmaker | None = getattr(request.app.state, 'session_maker', None)
+    if session_maker is None:
+        raise RuntimeError(DATABASE_NOT_INITIALIZED)
+    return session_maker
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with get_session_maker(request)() as session:
+        yield session
@@ -1,62 +1,138 @@
-from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, AsyncIterator, Sequence, Union
+from sqlalchemy import Integer, Select, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from .models import Budget, SimpleBudget, PercentageBudget, EnvelopBudget
-from ...domain.schemas import BudgetBase, SimpleBudget as SchemaSimple, PercentageBudget as SchemaPercentage, CategoryBudget as SchemaCategory
+from .models.budget import BudgetType
+from ...domain.schemas import SimpleBudget as SchemaSimple, PercentageBudget as SchemaPercentage, CategoryBudget as SchemaCategory
 from ...domain.schemas.budget import CategoryBudgetItem
 
-class BudgetLoader(ABC):
-    @abstractmethod
-    async def load(self, db_budget: Budget) -> BudgetBase:
-        pass
+TypedBudget = Union[SchemaSimple, SchemaPercentage, SchemaCategory]
 
-class SimpleBudgetLoader(BudgetLoader):
-    def __init__(self, db: AsyncSession):
-        super().__init__()
-        self.db = db
+BUDGET_COLUMNS = (Budget.id, Budget.user_id, Budget.name, Budget.type, Budget.currency, Budget.start_date, Budget.end_date)
+SUBTYPE_COLUMNS = (
+    SimpleBudget.total_amount,
+    PercentageBudget.needs_percent,
+    PercentageBudget.wants_percent,
+    PercentageBudget.savings_percent,
+)
+BASE_FIELDS = tuple(column.key for column in BUDGET_COLUMNS)
 
-    async def load(self, db_budget):
-        simple_db = await self.db.get(SimpleBudget, db_budget.id)
-        return SchemaSimple.model_validate({
-            **db_budget.__dict__,
-            'total_amount': simple_db.total_amount
-        })
+def select_budgets(*columns) -> Select:
+    """Budget rows with their simple/percentage subtype columns (1:1, so LIMIT-safe)"""
+    return (
+        select(*BUDGET_COLUMNS, *SUBTYPE_COLUMNS, *columns)
+        .outerjoin(SimpleBudget, SimpleBudget.id == Budget.id)
+        .outerjoin(PercentageBudget, PercentageBudget.id == Budget.id)
+    )
 
-class PercentageBudgetLoader(BudgetLoader):
-    def __init__(self, db: AsyncSession):
-        super().__init__()
-        self.db = db
+def select_budgets_with_envelopes() -> Select:
+    """One row per envelope (one per budget for other types), rows of a budget are adjacent"""
+    return (
+        select_budgets(EnvelopBudget.category_id, EnvelopBudget.allocated_amount)
+        .outerjoin(EnvelopBudget, EnvelopBudget.budget_id == Budget.id)
+        .order_by(Budget.id, EnvelopBudget.id)
+    )
+
+# Built once: executions only bind new parameters, so the compiled SQL is looked up by
+# identity and its text, the key of asyncpg's per-connection prepared statement cache,
+# stays the same. The id list is one array parameter, an expanding IN would render a
+# different statement for every page size.
+BUDGET_BY_ID = select_budgets_with_envelopes().where(Budget.id == bindparam('id'))
+ENVELOPES_OF_BUDGETS = (
+    select(EnvelopBudget.budget_id, EnvelopBudget.category_id, EnvelopBudget.allocated_amount)
+    .where(EnvelopBudget.budget_id == any_(bindparam('budget_ids', type_=ARRAY(Integer))))
+    .order_by(EnvelopBudget.budget_id, EnvelopBudget.id)
+)
+
+def categories_of(rows: Sequence[Any]) -> list[CategoryBudgetItem]:
+    """Envelope allocations from rows carrying `category_id`/`allocated_amount` columns"""
+    return [
+        CategoryBudgetItem(category_id=row.category_id, amount=row.allocated_amount)
+        for row in rows
+        if row.category_id is not None
+    ]
 
-    async def load(self, db_budget):
-        percentage_db = await self.db.get(PercentageBudget, db_budget.id)
-        return SchemaPercentage.model_validate({
-            **db_budget.__dict__,
-            'needs_percent': percentage_db.needs_percent,
-            'wants_percent': percentage_db.wants_percent,
-            'savings_percent': percentage_db.savings_percent,
-        })
-    
-class CategotyBudgetLoader(BudgetLoader):
+def to_schema(row: Any, categories: list[CategoryBudgetItem]) -> TypedBudget | None:
+    """Build the typed schema from a `select_budgets` row, None if the subtype row is missing"""
+    data = {field: getattr(row, field) for field in BASE_FIELDS}
+    match row.type:
+        case BudgetType.SIMPLE:
+            if row.total_amount is None:
+                return None
+            return SchemaSimple.model_validate({**data, 'total_amount': row.total_amount})
+        case BudgetType.PERCENTAGE:
+            if row.needs_percent is None:
+                return None
+            return SchemaPercentage.model_validate({
+                **data,
+                'needs_percent': row.needs_percent,
+                'wants_percent': row.wants_percent,
+                'savings_percent': row.savings_percent,
+            })
+        case BudgetType.ENVELOPE:
+            return SchemaCategory.model_validate({**data, 'categories': categories})
+    return None
+
+async def group_by_budget(partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[list[Any]]:
+    """Regroup row partitions (split at arbitrary points) into the rows of each budget"""
+    pending: list[Any] = []
+    async for partition in partitions:
+        for row in partition:
+            if pending and pending[0].id != row.id:
+                yield pending
+                pending = []
+            pending.append(row)
+    if pending:
+        yield pending
+
+class BudgetLoader:
+    """Loads fully typed budgets in a constant number of round-trips.
+
+    A single budget is fetched together with its subtype and envelope rows in one
+    query. Lists take two: the budget page with subtype columns, then every envelope
+    row of the envelope budgets on that page.
+    """
     def __init__(self, db: AsyncSession):
-        super().__init__()
         self.db = db
 
-    async def load(self, db_budget):
-        stmt = select(EnvelopBudget).where(EnvelopBudget.budget_id == db_budget.id)
-        result = await self.db.execute(stmt)
-        envelope_dbs = result.scalars().fetchall()
-        categories = [
-            CategoryBudgetItem(category_id=env.category_id, amount=env.allocated_amount)
-            for env in envelope_dbs
-        ]
-        return SchemaCategory(
-            id=db_budget.id,
-            start_date=db_budget.start_date,
-            end_date=db_budget.end_date,
-            user_id=db_budget.user_id,
-            name=db_budget.name,
-            currency=db_budget.currency,
-            type=db_budget.type,
-            categories=categories
-        )
\ No newline at end of file
+    async def load(self, id: int) -> TypedBudget | None:
+        result = await self.db.execute(BUDGET_BY_ID, {'id': id})
+        rows = result.all()
+        if not rows:
+            return None
+        return to_schema(rows[0], categories_of(rows))
+
+    async def load_many(self, statement: Select, params: dict[str, Any] | None = None) -> list[TypedBudget]:
+        """Execute a `select_budgets` statement and attach envelopes with one extra query"""
+        result = await self.db.execute(statement, params)
+        rows = result.all()
+        envelope_ids = [row.id for row in rows if row.type == BudgetType.ENVELOPE]
+        categories: dict[int, list[CategoryBudgetItem]] = defaultdict(list)
+        if envelope_ids:
+            envelopes = await self.db.execute(ENVELOPES_OF_BUDGETS, {'budget_ids': envelope_ids})
+            for envelope in envelopes.all():
+                categories[envelope.budget_id].append(
+                    CategoryBudgetItem(category_id=envelope.category_id, amount=envelope.allocated_amount)
+                )
+        budgets = (to_schema(row, categories.get(row.id, [])) for row in rows)
+        return [budget for budget in budgets if budget is not None]
+
+    async def stream(self, statement: Select, batch_size: int, params: dict[str, Any] | None = None) -> AsyncIterator[TypedBudget]:
+        """Execute a `select_budgets_with_envelopes` statement through a server-side cursor.
+
+        Rows are fetched `batch_size` at a time and the rows of one budget are folded
+        into its schema as they arrive, so memory does not depend on the result size.
+        """
+        # Options passed per execution keep `statement` itself, and its cache key, reusable
+        result = await self.db.stream(statement, params, execution_options={'yield_per': batch_size})
+        try:
+            async for rows in group_by_budget(result.partitions()):
+                budget = to_schema(rows[0], categories_of(rows))
+                if budget is not None:
+                    yield budget
+        finally:
+            await result.close()
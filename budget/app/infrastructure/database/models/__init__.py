@@ -1,3 +1,4 @@
 from .base import Base
 from .budget import Budget, SimpleBudget, EnvelopBudget, PercentageBudget
-from .category import Category
\ No newline at end of file
+from .category import Category
+from .collection_version import CollectionVersion
\ No newline at end of file
@@ -1,5 +1,5 @@
 ﻿from .base import Base
-from sqlalchemy import Column, Date, ForeignKey, Integer, String, UUID, Enum, Numeric
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String, UUID, Enum, Numeric
 from sqlalchemy.orm import relationship
 import enum
 
@@ -22,6 +22,10 @@ class Budget(Base):
     percentage_budget = relationship('PercentageBudget', uselist=False, back_populates='budget')
     envelop_budget = relationship('EnvelopBudget', uselist=False, back_populates='budget')
 
+    __table_args__ = (
+        Index('ix_budgets_user_id_start_date_id', 'user_id', 'start_date', 'id'),
+    )
+
 class SimpleBudget(Base):
     __tablename__ = "simple_budgets"
     id = Column(Integer, ForeignKey('budgets.id'), primary_key=True)
@@ -43,4 +47,10 @@ class EnvelopBudget(Base):
     budget_id = Column(Integer, ForeignKey("budgets.id"), nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     allocated_amount = Column(Numeric(10,2), nullable=False)
-    budget = relationship("Budget", back_populates="envelop_budget")
\ No newline at end of file
+    budget = relationship("Budget", back_populates="envelop_budget")
+
+    __table_args__ = (
+        # Envelopes of one or many budgets in (budget_id, id) order, read from the index only
+        Index('ix_envelop_budgets_budget_id_id', 'budget_id', 'id',
+              postgresql_include=['category_id', 'allocated_amount']),
+    )
\ No newline at end of file
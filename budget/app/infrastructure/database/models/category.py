@@ -1,4 +1,4 @@
-from sqlalchemy import UUID, Column, ForeignKey, Integer, String
+from sqlalchemy import UUID, Column, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -11,6 +11,18 @@ class Category(Base):
     parent_category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     favicon = Column(String(100), nullable=True)
     children = relationship("Category", backref="parent", remote_side=[id], cascade='all')
+
+    __table_args__ = (
+        # Categories of a user ordered by id, the defaults are those of ADMIN_USER_ID
+        Index('ix_categories_user_id_id', 'user_id', 'id'),
+        # Natural key of the seeded default tree, see utils.init_db
+        Index(
+            'uq_categories_default_key',
+            text('coalesce(parent_category_id, 0)'), 'name',
+            unique=True,
+            postgresql_where=text("user_id = '00000000-0000-0000-0000-000000000000'")
+        ),
+    )
     def __repr__(self):
         return f"<Category(id={self.id}, name={self.name}, type={self.type}, parent_category_id={self.parent_category_id})>"
     
@@ -0,0 +1,10 @@
+from sqlalchemy import BigInteger, Column, DateTime, String, UUID, func, text
+from .base import Base
+
+class CollectionVersion(Base):
+    """Write counter of one user's collection, see `CollectionVersions`"""
+    __tablename__ = "collection_versions"
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    collection = Column(String(20), primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default=text('1'))
+    written_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
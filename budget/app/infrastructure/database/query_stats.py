@@ -0,0 +1,95 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Literal
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = structlog.stdlib.get_logger('db.queries')
+
+RepeatMode = Literal['off', 'warn', 'raise']
+
+# Long statements are cut in logs and headers, the shape counter keeps the full text
+MAX_STATEMENT_LENGTH = 300
+
+class RepeatedQueryError(Exception):
+    """The same statement ran more often than allowed within one request, likely N+1"""
+
+@dataclass
+class RequestQueries:
+    """Statements executed while serving one request"""
+    count: int = 0
+    seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest: str | None = None
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest = statement[:MAX_STATEMENT_LENGTH]
+
+    def as_log(self) -> dict[str, float | int | str | None]:
+        return {
+            'queries': self.count,
+            'duration_ms': round(self.seconds * 1000, 3),
+            'slowest_ms': round(self.slowest_seconds * 1000, 3),
+            'slowest': self.slowest,
+        }
+
+    def server_timing(self) -> str:
+        """`Server-Timing` entry, e.g. `db;dur=3.2;desc="4 queries"`"""
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+_current: ContextVar[RequestQueries | None] = ContextVar('request_queries', default=None)
+
+class QueryTracker:
+    """Counts and times the statements of the current request.
+
+    Statements are attributed through a context variable set by `track`, which the
+    greenlet running the sync engine code inherits. Statements are built with bound
+    parameters, so their SQL text is their shape: when one shape runs more than
+    `repeat_limit` times in a request, `warn` logs it once and `raise` fails the
+    statement with `RepeatedQueryError`, meant for development and tests.
+    """
+    def __init__(self, repeat_limit: int = 10, repeat_mode: RepeatMode = 'off'):
+        self.repeat_limit = repeat_limit
+        self.repeat_mode = repeat_mode
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine.sync_engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    @contextmanager
+    def track(self) -> Iterator[RequestQueries]:
+        queries = RequestQueries()
+        token = _current.set(queries)
+        try:
+            yield queries
+        finally:
+            _current.reset(token)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        queries = _current.get()
+        if queries is None or context is None:
+            return
+        queries.shapes[statement] += 1
+        repeats = queries.shapes[statement]
+        if self.repeat_mode != 'off' and repeats == self.repeat_limit + 1:
+            message = f'Statement ran {repeats} times in one request'
+            if self.repeat_mode == 'raise':
+                raise RepeatedQueryError(f'{message}: {statement[:MAX_STATEMENT_LENGTH]}')
+            logger.warning(message, statement=statement[:MAX_STATEMENT_LENGTH], repeat_limit=self.repeat_limit)
+        context._query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        queries = _current.get()
+        started = getattr(context, '_query_started', None)
+        if queries is not None and started is not None:
+            queries.record(statement, time.perf_counter() - started)
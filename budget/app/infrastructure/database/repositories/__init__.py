@@ -1 +1 @@
-from .budget_repo import BudgetRepository
\ No newline at end of file
+from .budget_repo import BudgetRepository, get_read_budget_repository
\ No newline at end of file
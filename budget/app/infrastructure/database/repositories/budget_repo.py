@@ -1,16 +1,32 @@
 from ... import db_session_dep
 from ....domain.ports import Repository, Specification
-from ....domain.schemas import BudgetBase
+from ....domain.schemas import BudgetBase, Pagination, BudgetFilterParams
+from ....domain.schemas.pagination import encode_cursor
 from ....domain.exceptions import RepositoryError
 from ....infrastructure.database.models import Budget, SimpleBudget, EnvelopBudget, PercentageBudget
 from ..models.budget import BudgetType
 from ..resolvers.spec_resolver import SpecificationResolver
+from ..loader import BudgetLoader, TypedBudget, select_budgets, select_budgets_with_envelopes, to_schema, categories_of
+from ..statements import insert_budget_returning, insert_budget_parameters, insert_from_arrays
+from ..bulk_import import existing_category_ids
+from ..statement_cache import statement_cache
+from ..routing import read_db_session_dep
 from ...dependency import get_resolver
 
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Executable, Integer, bindparam, insert, tuple_
 from sqlalchemy.future import select
-from typing import List
+from typing import Any, AsyncIterator, Callable, Iterable, List
 from fastapi import Depends
+from uuid import UUID
+
+# Sent as multi-row VALUES batches by SQLAlchemy's insertmanyvalues, ids in parameter order
+INSERT_BUDGETS = insert(Budget).returning(Budget.id, sort_by_parameter_order=True)
+INSERT_SIMPLE = insert_from_arrays(SimpleBudget, SimpleBudget.id, SimpleBudget.total_amount)
+INSERT_PERCENTAGE = insert_from_arrays(
+    PercentageBudget, PercentageBudget.id, PercentageBudget.needs_percent, PercentageBudget.wants_percent, PercentageBudget.savings_percent
+)
+INSERT_ENVELOPES = insert_from_arrays(EnvelopBudget, EnvelopBudget.budget_id, EnvelopBudget.category_id, EnvelopBudget.allocated_amount)
 
 class BudgetRepository(Repository[BudgetBase]):
     def __init__(self, 
@@ -18,53 +34,81 @@ class BudgetRepository(Repository[BudgetBase]):
                  resolver: SpecificationResolver = Depends(get_resolver(Budget))):
         self.db = db
         self.resolver = resolver
+        self.loader = BudgetLoader(db)
+
+    async def create(self, schema: BudgetBase) -> TypedBudget:
+        """Insert the budget and its subtype rows in one statement, see `insert_budget_returning`"""
+        with_envelopes = schema.type == BudgetType.ENVELOPE and bool(schema.categories)
+        statement = statement_cache.get_or_build(
+            ('insert_budget', schema.type, with_envelopes),
+            lambda: insert_budget_returning(schema.type, with_envelopes)
+        )
+        try:
+            result = await self.db.execute(statement, insert_budget_parameters(schema))
+            rows = result.all()
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            raise RepositoryError('Database operation failed') from e
+
+        if schema.type == BudgetType.ENVELOPE and schema.categories:
+            return to_schema(rows[0], categories_of(rows))
+        return to_schema(rows[0], [])
+
+    async def create_many(self, schemas: List[TypedBudget]) -> List[TypedBudget]:
+        """Insert all budgets with one multi-row statement per table in a single transaction.
 
-    async def create(self, schema: BudgetBase) -> BudgetBase:
+        Envelope categories must exist, see `existing_category_ids`.
+        """
+        if not schemas:
+            return []
         try:
-            db_budget = Budget(
-                user_id = schema.user_id,
-                name = schema.name,
-                type = schema.type,
-                currency = schema.currency,
-                start_date = schema.start_date,
-                end_date = schema.end_date
+            result = await self.db.execute(
+                INSERT_BUDGETS,
+                [{
+                    'user_id': schema.user_id,
+                    'name': schema.name,
+                    'type': schema.type,
+                    'currency': schema.currency,
+                    'start_date': schema.start_date,
+                    'end_date': schema.end_date
+                } for schema in schemas]
             )
-            self.db.add(db_budget)
-            await self.db.flush()
-            specific = None
-            match schema.type:
-                case BudgetType.SIMPLE:
-                    specific = SimpleBudget(
-                        id=db_budget.id,
-                        total_amount=schema.total_amount
-                    )
-                case BudgetType.PERCENTAGE:
-                    specific = PercentageBudget(
-                        id=db_budget.id,
-                        needs_percent=schema.needs_percent,
-                        wants_percent=schema.wants_percent,
-                        savings_percent=schema.savings_percent
-                    )
-                case BudgetType.ENVELOPE:
-                    specific = [EnvelopBudget(
-                        budget_id=db_budget.id,
-                        category_id=c.category_id,
-                        allocated_amount=c.amount
-                    ) for c in schema.categories]
-
-            if specific:
-                if isinstance(specific, list):
-                    self.db.add_all(specific)
-                else:
-                    self.db.add(specific)
-            
+            ids = result.scalars().all()
+
+            # Column arrays, one statement per table whatever the number of rows
+            simple = {'id': [], 'total_amount': []}
+            percentage = {'id': [], 'needs_percent': [], 'wants_percent': [], 'savings_percent': []}
+            envelopes = {'budget_id': [], 'category_id': [], 'allocated_amount': []}
+            for id, schema in zip(ids, schemas):
+                match schema.type:
+                    case BudgetType.SIMPLE:
+                        simple['id'].append(id)
+                        simple['total_amount'].append(schema.total_amount)
+                    case BudgetType.PERCENTAGE:
+                        percentage['id'].append(id)
+                        percentage['needs_percent'].append(schema.needs_percent)
+                        percentage['wants_percent'].append(schema.wants_percent)
+                        percentage['savings_percent'].append(schema.savings_percent)
+                    case BudgetType.ENVELOPE:
+                        for c in schema.categories:
+                            envelopes['budget_id'].append(id)
+                            envelopes['category_id'].append(c.category_id)
+                            envelopes['allocated_amount'].append(c.amount)
+
+            for statement, arrays in ((INSERT_SIMPLE, simple), (INSERT_PERCENTAGE, percentage), (INSERT_ENVELOPES, envelopes)):
+                if next(iter(arrays.values())):
+                    await self.db.execute(statement, arrays)
+
             await self.db.commit()
-            await self.db.refresh(db_budget)
-            return BudgetBase.model_validate(db_budget)
+            return [schema.model_copy(update={'id': id}) for id, schema in zip(ids, schemas)]
         except SQLAlchemyError as e:
             await self.db.rollback()
             raise RepositoryError('Database operation failed') from e
 
+    async def existing_category_ids(self, owner_id: UUID, ids: Iterable[int]) -> set[int]:
+        return await existing_category_ids(self.db, owner_id, ids)
+
     async def update(self, schema):
         pass
 
@@ -74,34 +118,85 @@ class BudgetRepository(Repository[BudgetBase]):
         return (BudgetBase.model_validate(budget) for budget in budgets)
     
     async def find(self, spec: Specification) -> List[BudgetBase]:
+        statement, params = self._cached('budget_find', spec, lambda where: select(Budget).where(where))
         try:
-            query = select(Budget)
-            resolved = self.resolver.resolve(spec=spec)
-            result = await self.db.scalars(query.where(resolved))
+            result = await self.db.scalars(statement, params)
             budgets_db = result.fetchall()
             return [BudgetBase.model_validate(budget) for budget in budgets_db]
         except SQLAlchemyError as e:
             raise RepositoryError("Can't read from the database") from e
 
-    async def get_by_id(self, id: int):
+    async def find_page(self, spec: Specification, filters: BudgetFilterParams) -> Pagination[BudgetBase]:
+        """Keyset page of budgets matching `spec` ordered by (start_date, id), served by
+        ix_budgets_user_id_start_date_id. `filters` only provides the limit and cursor.
+
+        The statement is cached by the shape of `spec`, every request with the same
+        combination of filters executes the same statement with other parameters.
+        """
+        after = filters.after
+        statement, params = self._cached(
+            'budget_page_after' if after is not None else 'budget_page', spec,
+            lambda where: self._page_statement(where, after is not None)
+        )
+        params['limit'] = filters.limit + 1
+        if after is not None:
+            params |= {'after_start_date': after[0], 'after_id': after[1]}
         try:
-            budget = await self.db.get(id)
-            if not budget:
-                return None
-            specific_data = None
-            match budget.type:
-                case BudgetType.SIMPLE:
-                    simple_db = await self.db.get(SimpleBudget, budget.id)
-                    if not simple_db:
-                        return None
-                    specific_data = SimpleBudget(
-                        id=budget.id,
-                        start_date=budget.start_date
-                    )
-
-            return specific_data
+            result = await self.db.scalars(statement, params)
+            budgets_db = result.fetchall()
+        except SQLAlchemyError as e:
+            raise RepositoryError("Can't read from the database") from e
+
+        items = [BudgetBase.model_validate(budget) for budget in budgets_db[:filters.limit]]
+        next_cursor = None
+        if len(budgets_db) > filters.limit:
+            next_cursor = encode_cursor(items[-1].start_date, items[-1].id)
+        return Pagination[BudgetBase](items=items, limit=filters.limit, next_cursor=next_cursor)
+
+    def _cached(self, name: str, spec: Specification, build: Callable[[Any], Executable]) -> tuple[Executable, dict[str, Any]]:
+        """Statement `name` filtered by the template of `spec`, built once per spec shape,
+        and the parameters of `spec` to execute it with"""
+        statement = statement_cache.get_or_build(
+            (name, type(self.resolver), spec.shape),
+            lambda: build(self.resolver.resolve_template(spec))
+        )
+        return statement, self.resolver.parameters(spec)
+
+    @staticmethod
+    def _page_statement(where, has_cursor: bool):
+        query = select(Budget).where(where)
+        if has_cursor:
+            query = query.where(
+                tuple_(Budget.start_date, Budget.id) > tuple_(bindparam('after_start_date'), bindparam('after_id'))
+            )
+        return query.order_by(Budget.start_date, Budget.id).limit(bindparam('limit', type_=Integer))
+
+    async def find_detailed(self, spec: Specification) -> List[TypedBudget]:
+        statement, params = self._cached('budget_detailed', spec, lambda where: select_budgets().where(where))
+        try:
+            return await self.loader.load_many(statement, params)
+        except SQLAlchemyError as e:
+            raise RepositoryError("Can't read from the database") from e
+
+    async def stream(self, spec: Specification, batch_size: int = 500) -> AsyncIterator[TypedBudget]:
+        """Typed budgets ordered by id, read with a server-side cursor"""
+        statement, params = self._cached('budget_stream', spec, lambda where: select_budgets_with_envelopes().where(where))
+        try:
+            async for budget in self.loader.stream(statement, batch_size, params):
+                yield budget
+        except SQLAlchemyError as e:
+            raise RepositoryError("Can't read from the database") from e
+
+    async def get_by_id(self, id: int) -> TypedBudget | None:
+        try:
+            return await self.loader.load(id)
         except SQLAlchemyError as e:
             raise RepositoryError("Can't read from the database") from e
 
     async def delete(self, id: int):
-        pass
\ No newline at end of file
+        pass
+
+def get_read_budget_repository(read_db: read_db_session_dep,
+                               resolver: SpecificationResolver = Depends(get_resolver(Budget))) -> BudgetRepository:
+    """Repository on the read session, for read-only work only"""
+    return BudgetRepository(read_db, resolver)
\ No newline at end of file
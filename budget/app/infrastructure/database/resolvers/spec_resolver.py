@@ -1,18 +1,57 @@
+from datetime import date
+from itertools import count
+from typing import Any, Iterator
+from sqlalchemy import and_, bindparam, not_, or_, true
 from sqlalchemy.orm import DeclarativeBase
 from uuid import UUID
 
 from ..models import Budget
+from ..models.budget import BudgetType
 from ....domain.ports import Specification, SpecificationResolver
 
 class SQLAlchemySpecificationResolver(SpecificationResolver):
+    """Builds a where clause from a specification.
+
+    `resolve` inlines the values as anonymous bind parameters. `resolve_template` builds
+    the same clause with named parameters `spec_0`, `spec_1`, ... instead, one per value
+    of `spec.parameters()` in the same order, so the clause only depends on `spec.shape`
+    and can be compiled once and executed with `parameters(spec)`.
+    """
     def __init__(self, model: DeclarativeBase):
         self.model = model
+        self._names: Iterator[int] | None = None
 
     def resolve(self, spec: Specification):
         return spec.resolve(self)
-    
+
+    def resolve_template(self, spec: Specification):
+        self._names = count()
+        try:
+            return spec.resolve(self)
+        finally:
+            self._names = None
+
+    @staticmethod
+    def parameters(spec: Specification) -> dict[str, Any]:
+        return {f'spec_{index}': value for index, value in enumerate(spec.parameters())}
+
+    def param(self, value: Any):
+        """`value` itself, or the next named parameter when resolving a template"""
+        if self._names is None:
+            return value
+        return bindparam(f'spec_{next(self._names)}')
+
+    def resolve_and(self, specs: tuple[Specification, ...]):
+        return and_(*(spec.resolve(self) for spec in specs))
+
+    def resolve_or(self, specs: tuple[Specification, ...]):
+        return or_(*(spec.resolve(self) for spec in specs))
+
+    def resolve_not(self, spec: Specification):
+        return not_(spec.resolve(self))
+
     def resolve_author(self, user_id: UUID):
-        return self.model.user_id == user_id
+        return self.model.user_id == self.param(user_id)
 
 class SpecificationResolverRegistry:
     _resolvers: dict[type, type] = {}
@@ -31,4 +70,23 @@ class SpecificationResolverRegistry:
 @SpecificationResolverRegistry.register(Budget)
 class BudgetSpecificationResolver(SQLAlchemySpecificationResolver):
     def __init__(self, model: DeclarativeBase = Budget):
-        super().__init__(model)
\ No newline at end of file
+        super().__init__(model)
+
+    def resolve_date_range(self, date_from: date | None, date_to: date | None):
+        clauses = []
+        if date_from is not None:
+            clauses.append(self.model.end_date >= self.param(date_from))
+        if date_to is not None:
+            clauses.append(self.model.start_date <= self.param(date_to))
+        return and_(true(), *clauses)
+
+    def resolve_active_on(self, on: date):
+        on = self.param(on)
+        # Bound once, the template references the same parameter twice
+        return and_(self.model.start_date <= on, self.model.end_date >= on)
+
+    def resolve_budget_type(self, type: BudgetType):
+        return self.model.type == self.param(type)
+
+    def resolve_currency(self, currency: str):
+        return self.model.currency == self.param(currency)
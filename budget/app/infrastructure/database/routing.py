@@ -0,0 +1,158 @@
+import asyncio
+import itertools
+from typing import Annotated, AsyncGenerator
+from uuid import UUID
+
+import structlog
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from .database import create_engine_and_session, get_session_maker
+from ..auth import current_user_dep
+from ..cache import CollectionVersions, get_collection_versions
+from ..dependency import db_session_dep
+from ...domain.configs.config import Settings
+
+logger = structlog.stdlib.get_logger('database_router')
+
+# Seconds the replica is behind, 0 once it has replayed everything it received: an
+# idle primary sends nothing new, so the last replay timestamp alone would grow. NULL
+# without a streaming WAL receiver, the replica then receives nothing and its replayed
+# LSN proves nothing; the receiver status is only visible to pg_read_all_stats, grant
+# it to the role of the replica URLs. A silently dropped primary connection ends the
+# receiver after wal_receiver_timeout.
+REPLICA_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine, session_maker: async_sessionmaker):
+        self.name = name
+        self.engine = engine
+        self.session_maker = session_maker
+        # None until the first check
+        self.healthy: bool | None = None
+        self.lag: float | None = None
+
+class DatabaseRouter:
+    """Chooses where read-only work runs: a streaming replica or the primary.
+
+    Replicas are probed every `check_interval` seconds and used only while they answer,
+    stream from the primary and lag at most `max_lag` seconds, otherwise reads fall back to the primary. A user
+    who wrote in the last `pin_window` seconds reads from the primary, so they always
+    see their own writes; the window must be longer than `max_lag`. The time of their
+    last write, through any worker, is taken from `CollectionVersions`.
+    """
+    def __init__(self,
+                 replicas: list[Replica],
+                 max_lag: float = 2,
+                 pin_window: float = 10,
+                 check_interval: float = 5,
+                 check_timeout: float = 2):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.pin_window = pin_window
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._next = itertools.count()
+        self._check_task: asyncio.Task | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'DatabaseRouter':
+        replicas = [
+            Replica(make_url(url).render_as_string(hide_password=True), *create_engine_and_session(settings, url))
+            for url in settings.DATABASE_REPLICA_URLS
+        ]
+        return cls(
+            replicas,
+            max_lag=settings.replica_max_lag,
+            pin_window=settings.read_your_writes_window,
+            check_interval=settings.replica_check_interval,
+            check_timeout=settings.replica_check_timeout
+        )
+
+    async def start(self) -> None:
+        """Probe the replicas and start the background health checks"""
+        if not self.replicas:
+            return
+        await self.check()
+        if self._check_task is None:
+            self._check_task = asyncio.create_task(self._check_loop(), name='replica-health')
+
+    async def stop(self) -> None:
+        if self._check_task is not None:
+            self._check_task.cancel()
+            try:
+                await self._check_task
+            except asyncio.CancelledError:
+                pass
+            self._check_task = None
+        await asyncio.gather(*(replica.engine.dispose() for replica in self.replicas))
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.engine.connect() as connection:
+                    lag = (await connection.execute(REPLICA_LAG)).scalar_one()
+        except Exception as e:
+            if replica.healthy is not False:
+                await logger.awarning('Replica unavailable, reading from the others', replica=replica.name, exc_info=e)
+            replica.healthy, replica.lag = False, None
+            return
+        # No lag when the replica isn't streaming from the primary
+        replica.lag = None if lag is None else float(lag)
+        healthy = replica.lag is not None and replica.lag <= self.max_lag
+        if healthy != replica.healthy:
+            await logger.ainfo('Replica state changed', replica=replica.name, healthy=healthy, lag=replica.lag)
+        replica.healthy = healthy
+
+    async def _check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def is_pinned(self, versions: CollectionVersions, user_id: UUID) -> bool:
+        since = await versions.seconds_since_write(user_id)
+        return since is not None and since < self.pin_window
+
+    async def read_session_maker(self, versions: CollectionVersions, user_id: UUID) -> async_sessionmaker | None:
+        """Session factory of a healthy replica, round robin, None to read from the primary"""
+        available = [replica for replica in self.replicas if replica.healthy]
+        # Without a replica to choose, the user's writes aren't even looked up
+        if not available or await self.is_pinned(versions, user_id):
+            return None
+        return available[next(self._next) % len(available)].session_maker
+
+def get_database_router(request: Request) -> DatabaseRouter | None:
+    return getattr(request.app.state, 'database_router', None)
+
+versions_dep = Annotated[CollectionVersions, Depends(get_collection_versions)]
+
+async def _replica_session_maker(request: Request, versions: CollectionVersions, user_id: UUID) -> async_sessionmaker | None:
+    router = get_database_router(request)
+    return await router.read_session_maker(versions, user_id) if router is not None else None
+
+async def get_read_session_maker(request: Request, user: current_user_dep, versions: versions_dep) -> async_sessionmaker:
+    """`get_session_maker` for read-only work of the current user"""
+    return await _replica_session_maker(request, versions, user.user_id) or get_session_maker(request)
+
+async def get_read_db(request: Request, db: db_session_dep, user: current_user_dep,
+                      versions: versions_dep) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only work of the current user, the request's primary session
+    when no replica should serve it"""
+    session_maker = await _replica_session_maker(request, versions, user.user_id)
+    if session_maker is None:
+        yield db
+        return
+    async with session_maker() as session:
+        yield session
+
+read_db_session_dep = Annotated[AsyncSession, Depends(get_read_db)]
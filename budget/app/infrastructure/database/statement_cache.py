@@ -0,0 +1,34 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from sqlalchemy import Executable
+
+class StatementCache:
+    """Bounded LRU of statements built from a structural key.
+
+    Reusing the same statement object lets SQLAlchemy skip building its cache key and
+    find the compiled SQL in the engine's compiled cache at once; only bind parameters
+    change between executions.
+    """
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._statements: OrderedDict[Hashable, Executable] = OrderedDict()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Executable]) -> Executable:
+        statement = self._statements.get(key)
+        if statement is not None:
+            self.hits += 1
+            self._statements.move_to_end(key)
+            return statement
+        self.misses += 1
+        statement = self._statements[key] = build()
+        if len(self._statements) > self.maxsize:
+            self._statements.popitem(last=False)
+        return statement
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+statement_cache = StatementCache()
@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .statement_cache import StatementCache, statement_cache
+
+@dataclass
+class HitCounter:
+    hits: int = 0
+    misses: int = 0
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+class StatementStats:
+    """Hit rates of the three statement caches a query goes through.
+
+    statements: our `StatementCache` of built statements
+    compiled: SQLAlchemy's compiled cache of the engine
+    prepared: asyncpg prepared statements, cached per connection by SQL text
+    """
+    def __init__(self, statements: StatementCache = statement_cache):
+        self.statements = statements
+        self.compiled = HitCounter()
+        self.prepared = HitCounter()
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None and context.cache_hit in (CacheStats.CACHE_HIT, CacheStats.CACHE_MISS):
+            self.compiled.record(context.cache_hit is CacheStats.CACHE_HIT)
+        # Only the asyncpg adapter has this LRU, keyed by the SQL text
+        prepared = getattr(conn.connection.dbapi_connection, '_prepared_statement_cache', None)
+        if prepared is not None:
+            self.prepared.record(statement in prepared)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        statements = HitCounter(self.statements.hits, self.statements.misses).as_dict()
+        return {
+            'statements': statements | {'size': len(self.statements)},
+            'compiled': self.compiled.as_dict(),
+            'prepared': self.prepared.as_dict(),
+        }
+
+def get_statement_stats(request: Request) -> StatementStats:
+    return request.app.state.statement_stats
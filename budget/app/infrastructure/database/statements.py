@@ -0,0 +1,122 @@
+from typing import Any
+
+from sqlalchemy import Insert, Integer, Select, bindparam, func, insert, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.future import select
+
+from .models import Budget, SimpleBudget, PercentageBudget, EnvelopBudget
+from .models.budget import BudgetType
+from .loader import BUDGET_COLUMNS
+from ...domain.schemas import BudgetBase
+
+def insert_budget_returning(type: BudgetType, with_envelopes: bool) -> Select:
+    """Single statement inserting the budget and its subtype rows through data-modifying CTEs.
+
+    Returns one row per created budget (one per envelope for envelope budgets) with
+    the budget columns and the subtype columns, enough to build the typed schema.
+    Values are named bind parameters, see `insert_budget_parameters`, so one statement
+    per budget type serves every insert.
+    """
+    budget = (
+        insert(Budget)
+        .values(
+            user_id=bindparam('user_id'),
+            name=bindparam('name'),
+            type=bindparam('type'),
+            currency=bindparam('currency'),
+            start_date=bindparam('start_date'),
+            end_date=bindparam('end_date')
+        )
+        .returning(*BUDGET_COLUMNS)
+        .cte('new_budget')
+    )
+
+    match type:
+        case BudgetType.SIMPLE:
+            simple = (
+                insert(SimpleBudget)
+                .from_select(
+                    [SimpleBudget.id, SimpleBudget.total_amount],
+                    select(budget.c.id, bindparam('total_amount', type_=SimpleBudget.total_amount.type))
+                )
+                .returning(SimpleBudget.total_amount)
+                .cte('new_simple_budget')
+            )
+            return select(budget, simple.c.total_amount).select_from(budget).join(simple, true())
+        case BudgetType.PERCENTAGE:
+            percentage = (
+                insert(PercentageBudget)
+                .from_select(
+                    [PercentageBudget.id, PercentageBudget.needs_percent, PercentageBudget.wants_percent, PercentageBudget.savings_percent],
+                    select(
+                        budget.c.id,
+                        bindparam('needs_percent', type_=PercentageBudget.needs_percent.type),
+                        bindparam('wants_percent', type_=PercentageBudget.wants_percent.type),
+                        bindparam('savings_percent', type_=PercentageBudget.savings_percent.type)
+                    )
+                )
+                .returning(PercentageBudget.needs_percent, PercentageBudget.wants_percent, PercentageBudget.savings_percent)
+                .cte('new_percentage_budget')
+            )
+            return (
+                select(budget, percentage.c.needs_percent, percentage.c.wants_percent, percentage.c.savings_percent)
+                .select_from(budget)
+                .join(percentage, true())
+            )
+        case BudgetType.ENVELOPE if with_envelopes:
+            # Parallel arrays instead of a VALUES list, whose length would change the SQL
+            allocations = select(
+                func.unnest(bindparam('category_ids', type_=ARRAY(Integer))).label('category_id'),
+                func.unnest(bindparam('amounts', type_=ARRAY(EnvelopBudget.allocated_amount.type))).label('allocated_amount')
+            ).subquery('allocations')
+            envelopes = (
+                insert(EnvelopBudget)
+                .from_select(
+                    [EnvelopBudget.budget_id, EnvelopBudget.category_id, EnvelopBudget.allocated_amount],
+                    select(budget.c.id, allocations.c.category_id, allocations.c.allocated_amount)
+                )
+                .returning(EnvelopBudget.id, EnvelopBudget.category_id, EnvelopBudget.allocated_amount)
+                .cte('new_envelop_budgets')
+            )
+            return (
+                select(budget, envelopes.c.category_id, envelopes.c.allocated_amount)
+                .select_from(budget)
+                .join(envelopes, true())
+                .order_by(envelopes.c.id)
+            )
+    return select(budget)
+
+def insert_from_arrays(model, *columns) -> Insert:
+    """Multi-row INSERT of `columns` from parallel arrays, bound by column name.
+
+    `INSERT ... SELECT unnest(:a), unnest(:b)` sends every row in one statement,
+    whose SQL does not depend on the number of rows.
+    """
+    rows = select(*(
+        func.unnest(bindparam(column.key, type_=ARRAY(column.type))).label(column.key) for column in columns
+    )).subquery('rows')
+    return insert(model).from_select([column.key for column in columns], select(rows))
+
+def insert_budget_parameters(schema: BudgetBase) -> dict[str, Any]:
+    """Bind parameters of `insert_budget_returning` for `schema`"""
+    params = {
+        'user_id': schema.user_id,
+        'name': schema.name,
+        'type': schema.type,
+        'currency': schema.currency,
+        'start_date': schema.start_date,
+        'end_date': schema.end_date
+    }
+    match schema.type:
+        case BudgetType.SIMPLE:
+            params['total_amount'] = schema.total_amount
+        case BudgetType.PERCENTAGE:
+            params |= {
+                'needs_percent': schema.needs_percent,
+                'wants_percent': schema.wants_percent,
+                'savings_percent': schema.savings_percent
+            }
+        case BudgetType.ENVELOPE if schema.categories:
+            params['category_ids'] = [c.category_id for c in schema.categories]
+            params['amounts'] = [c.amount for c in schema.categories]
+    return params
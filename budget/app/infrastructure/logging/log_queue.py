@@ -0,0 +1,97 @@
+import logging
+import queue
+import sys
+import threading
+from typing import Literal, TextIO
+
+OverflowPolicy = Literal['drop', 'block']
+
+class BoundedQueueHandler(logging.Handler):
+    """Puts records on a bounded queue instead of writing them.
+
+    When the queue is full, the `drop` policy discards the record and counts it, the
+    `block` policy waits for room. The structlog processors have already run in the
+    caller, formatting and writing happen in `LogWriter`.
+    """
+    def __init__(self, records: queue.Queue, overflow: OverflowPolicy = 'drop'):
+        super().__init__()
+        self.records = records
+        self.overflow = overflow
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.overflow == 'block':
+            self.records.put(record)
+            return
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # No handler lock: the queue is thread-safe, a lock would serialize every caller
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+class LogWriter(threading.Thread):
+    """Formats queued records and writes them to `stream`, up to `batch_size` per write"""
+    _STOP = object()
+
+    def __init__(self,
+                 records: queue.Queue,
+                 formatter: logging.Formatter,
+                 handler: BoundedQueueHandler,
+                 stream: TextIO | None = None,
+                 batch_size: int = 256):
+        super().__init__(name='log-writer', daemon=True)
+        self.records = records
+        self.formatter = formatter
+        self.handler = handler
+        self.stream = stream or sys.stderr
+        self.batch_size = batch_size
+        self._reported_drops = 0
+
+    def stop(self, timeout: float | None = 5) -> None:
+        """Write what is queued, then end the thread"""
+        if not self.is_alive():
+            return
+        self.records.put(self._STOP)
+        self.join(timeout)
+
+    def run(self) -> None:
+        while True:
+            batch = [self.records.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(record is self._STOP for record in batch)
+            self._write([record for record in batch if record is not self._STOP])
+            if stopping:
+                return
+
+    def _write(self, batch: list[logging.LogRecord]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append(f'Unable to format log record {record.name}:{record.lineno}')
+        dropped = self.handler.dropped - self._reported_drops
+        if dropped:
+            self._reported_drops += dropped
+            lines.append(self.formatter.format(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f'Log queue full, dropped {dropped} records',
+            })))
+        if not lines:
+            return
+        try:
+            self.stream.write('\n'.join(lines) + '\n')
+            self.stream.flush()
+        except Exception:
+            # Nowhere left to report it
+            pass
@@ -1,16 +1,35 @@
+import atexit
 import logging
+import queue
 import structlog
 from structlog.types import EventDict, Processor
 
+from .log_queue import BoundedQueueHandler, LogWriter, OverflowPolicy
+from ..tracing import add_trace_ids
+
+_writer: LogWriter | None = None
+
 def drop_color_message_key(_, __, event_dict: EventDict) -> EventDict:
     event_dict.pop("color_message", None)
     return event_dict
 
-def configure_logging(json_logs: bool = False, log_level: str = 'INFO'):
+def configure_logging(json_logs: bool = False,
+                      log_level: str = 'INFO',
+                      queue_size: int = 10_000,
+                      overflow: OverflowPolicy = 'drop',
+                      batch_size: int = 256) -> LogWriter:
+    """Route every log record through a bounded queue to a writer thread.
+
+    Callers, the event loop included, only run the structlog processors and enqueue
+    the record; rendering and the blocking writes happen in `LogWriter`. Returns the
+    writer, which is stopped (and the queue flushed) at exit.
+    """
+    global _writer
     timestamper = structlog.processors.TimeStamper(fmt="iso")
 
     shared_processors: list[Processor] = [
         structlog.contextvars.merge_contextvars,
+        add_trace_ids,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
@@ -53,12 +72,19 @@ def configure_logging(json_logs: bool = False, log_level: str = 'INFO'):
         ],
     )
 
-    handler = logging.StreamHandler()
-    # Use OUR `ProcessorFormatter` to format all `logging` entries.
-    handler.setFormatter(formatter)
+    records = queue.Queue(maxsize=queue_size)
+    handler = BoundedQueueHandler(records, overflow)
     root_logger = logging.getLogger()
+    if _writer is not None:
+        # Reconfigured, e.g. one app per test: flush and replace the previous pipeline
+        root_logger.removeHandler(_writer.handler)
+        _writer.stop()
     root_logger.addHandler(handler)
     root_logger.setLevel(log_level.upper())
+    # Use OUR `ProcessorFormatter` to format all `logging` entries.
+    _writer = LogWriter(records, formatter, handler, batch_size=batch_size)
+    _writer.start()
+    atexit.register(_writer.stop)
 
     for _log in ["uvicorn", "uvicorn.error"]:
         # Clear the log handlers for uvicorn loggers, and enable propagation
@@ -72,4 +98,6 @@ def configure_logging(json_logs: bool = False, log_level: str = 'INFO'):
     # the handlers and prevent the logs to propagate to a logger higher up in the
     # hierarchy (effectively rendering them silent).
     logging.getLogger("uvicorn.access").handlers.clear()
-    logging.getLogger("uvicorn.access").propagate = False
\ No newline at end of file
+    logging.getLogger("uvicorn.access").propagate = False
+
+    return _writer
\ No newline at end of file
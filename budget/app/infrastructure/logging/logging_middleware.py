@@ -1,10 +1,15 @@
 import time
 from typing import TypedDict
 import structlog
+from starlette.datastructures import MutableHeaders
 from starlette.types import ASGIApp, Receive, Scope, Send
 from starlette.responses import JSONResponse
 from uvicorn.protocols.utils import get_path_with_query_string
 from asgi_correlation_id import correlation_id
+from opentelemetry import trace
+
+from .sampling import AccessLogSampler, route_template
+from ..database.query_stats import QueryTracker, RequestQueries
 
 logger = structlog.stdlib.get_logger('api.access')
 
@@ -13,8 +18,10 @@ class AccessInfo(TypedDict, total=False):
     start_time: float
 
 class StructLogMiddleware:
-    def __init__(self, app: ASGIApp):
+    def __init__(self, app: ASGIApp, sampler: AccessLogSampler | None = None, queries: QueryTracker | None = None):
         self.app = app
+        self.sampler = sampler or AccessLogSampler()
+        self.queries = queries or QueryTracker()
     
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope['type'] != 'http':
@@ -27,12 +34,20 @@ class StructLogMiddleware:
 
         structlog.contextvars.clear_contextvars()
         structlog.contextvars.bind_contextvars(request_id=correlation_id.get())
+        # The server span is opened by the tracing middleware around this one
+        trace.get_current_span().set_attribute('http.request_id', correlation_id.get() or '')
+
+        with self.queries.track() as queries:
+            await self._serve(scope, receive, send, queries)
 
+    async def _serve(self, scope: Scope, receive: Receive, send: Send, queries: RequestQueries) -> None:
         info = AccessInfo()
 
         async def inner_send(message):
             if message['type'] == 'http.response.start':
                 info['status_code'] = message['status']
+                # Statements run while streaming the body are only in the access log
+                MutableHeaders(scope=message).append('Server-Timing', queries.server_timing())
             await send(message)
 
         try:
@@ -57,21 +72,30 @@ class StructLogMiddleware:
             await response(scope, receive, send)
         finally:
             process_time = time.perf_counter_ns() - info["start_time"]
-            client_host, client_port = scope["client"]
             http_method = scope["method"]
-            http_version = scope["http_version"]
-            url = get_path_with_query_string(scope)
+            sample_rate = self.sampler.sample(http_method, route_template(scope), info["status_code"], process_time / 1e6)
+            if sample_rate is not None:
+                self._log_access(scope, info, process_time, sample_rate, queries)
 
-            logger.info(
-                f"""{client_host}:{client_port} - "{http_method} {scope["path"]} HTTP/{http_version}" {info["status_code"]}""",
-                http={
-                    "url": str(url),
-                    "status_code": info["status_code"],
-                    "method": http_method,
-                    "request_id": correlation_id.get(),
-                    "version": http_version,
-                },
-                network={"client": {"ip": client_host, "port": client_port}},
-                duration=process_time,
-            )
+    @staticmethod
+    def _log_access(scope: Scope, info: AccessInfo, process_time: int, sample_rate: float, queries: RequestQueries) -> None:
+        client_host, client_port = scope["client"]
+        http_method = scope["method"]
+        http_version = scope["http_version"]
+        url = get_path_with_query_string(scope)
+
+        logger.info(
+            f"""{client_host}:{client_port} - "{http_method} {scope["path"]} HTTP/{http_version}" {info["status_code"]}""",
+            http={
+                "url": str(url),
+                "status_code": info["status_code"],
+                "method": http_method,
+                "request_id": correlation_id.get(),
+                "version": http_version,
+            },
+            network={"client": {"ip": client_host, "port": client_port}},
+            duration=process_time,
+            sample_rate=sample_rate,
+            db=queries.as_log(),
+        )
         
\ No newline at end of file
@@ -0,0 +1,64 @@
+import random
+from typing import Callable
+
+from starlette.routing import BaseRoute
+from starlette.types import Scope
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that handled the request, e.g. `/budget/{id}`.
+
+    Bounded, unlike the raw path. Routes are looked up by the endpoint the router
+    stored in the scope; the map is built once per app.
+    """
+    endpoint = scope.get('endpoint')
+    app = scope.get('app')
+    if endpoint is None or app is None:
+        return UNMATCHED_ROUTE
+    templates = getattr(app.state, 'route_templates', None)
+    if templates is None:
+        routes: list[BaseRoute] = app.routes
+        templates = {route.endpoint: route.path for route in routes if hasattr(route, 'endpoint')}
+        app.state.route_templates = templates
+    return templates.get(endpoint, UNMATCHED_ROUTE)
+
+def status_class(status_code: int) -> str:
+    return f'{status_code // 100}xx'
+
+class AccessLogSampler:
+    """Decides which access lines are written.
+
+    Server errors and requests slower than `slow_ms` are always kept. Others are kept
+    with the first rate found for `"<METHOD> <route> <class>"`, `"<METHOD> <route>"` or
+    `"<class>"` in `rates`, `default_rate` otherwise, e.g.
+    `{"GET /budget 2xx": 0.01, "4xx": 0.5}`.
+    """
+    def __init__(self,
+                 default_rate: float = 1.0,
+                 rates: dict[str, float] | None = None,
+                 slow_ms: float = 500,
+                 random: Callable[[], float] = random.random):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+        self.slow_ms = slow_ms
+        self._random = random
+
+    def rate(self, method: str, route: str, status_code: int) -> float:
+        """Sampling rate of the request, 1 when it must be kept"""
+        if status_code >= 500:
+            return 1.0
+        cls = status_class(status_code)
+        for key in (f'{method} {route} {cls}', f'{method} {route}', cls):
+            if key in self.rates:
+                return self.rates[key]
+        return self.default_rate
+
+    def sample(self, method: str, route: str, status_code: int, duration_ms: float) -> float | None:
+        """The rate the line was kept with, None to skip it"""
+        if duration_ms >= self.slow_ms:
+            return 1.0
+        rate = self.rate(method, route, status_code)
+        if rate >= 1 or self._random() < rate:
+            return rate
+        return None
@@ -0,0 +1,3 @@
+from .registry import MetricsRegistry, Counter, Gauge, Histogram, MetricFamily
+from .app_metrics import AppMetrics, EventLoopMonitor, get_metrics
+from .middleware import MetricsMiddleware
\ No newline at end of file
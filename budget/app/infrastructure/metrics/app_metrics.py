@@ -0,0 +1,136 @@
+import asyncio
+import time
+from typing import Protocol
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .registry import Histogram, MetricFamily, MetricsRegistry
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+# Label values are taken from these sets only, anything else is `OTHER`
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+SQL_OPERATIONS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'BEGIN', 'COMMIT', 'ROLLBACK'})
+
+class HitCounting(Protocol):
+    hits: int
+    misses: int
+
+def sql_operation(statement: str) -> str:
+    operation = statement.lstrip()[:8].split(None, 1)
+    operation = operation[0].upper() if operation else ''
+    return operation if operation in SQL_OPERATIONS else 'OTHER'
+
+class AppMetrics:
+    """The metrics of the service, see `/metrics`.
+
+    Labels are bounded: routes are path templates, methods and SQL operations come
+    from fixed sets, databases and caches are named in code.
+    """
+    def __init__(self, registry: MetricsRegistry | None = None):
+        self.registry = registry or MetricsRegistry()
+        self.requests_in_flight = self.registry.gauge(
+            'http_requests_in_flight', 'Requests being served')
+        self.request_duration = self.registry.histogram(
+            'http_request_duration_seconds', 'Request latency by route and status class',
+            ('method', 'route', 'status_class'), HTTP_BUCKETS)
+        self.query_duration = self.registry.histogram(
+            'db_query_duration_seconds', 'Database round-trip time by statement type',
+            ('database', 'operation'), DB_BUCKETS)
+        self.event_loop_lag = self.registry.histogram(
+            'event_loop_lag_seconds', 'Delay of a periodic timer on the event loop', (), LOOP_LAG_BUCKETS)
+        self._caches: dict[str, HitCounting] = {}
+        self._pools: dict[str, AsyncEngine] = {}
+        self.registry.add_collector(self._collect_caches)
+        self.registry.add_collector(self._collect_pools)
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        method = method if method in HTTP_METHODS else 'OTHER'
+        self.request_duration.observe(seconds, method, route, f'{status_code // 100}xx')
+
+    def watch_cache(self, name: str, cache: HitCounting) -> None:
+        """Report the `hits`/`misses` counters of `cache` at scrape time"""
+        self._caches[name] = cache
+
+    def instrument_engine(self, engine: AsyncEngine, database: str) -> None:
+        """Time every query of `engine` and report its pool state"""
+        self._pools[database] = engine
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                context._metrics_started = time.perf_counter()
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, '_metrics_started', None)
+            if started is not None:
+                self.query_duration.observe(time.perf_counter() - started, database, sql_operation(statement))
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine.sync_engine, 'after_cursor_execute', after_cursor_execute)
+
+    def _collect_caches(self) -> list[MetricFamily]:
+        hits = MetricFamily('cache_hits_total', 'counter', 'Lookups served by the cache')
+        misses = MetricFamily('cache_misses_total', 'counter', 'Lookups the cache could not serve')
+        ratio = MetricFamily('cache_hit_ratio', 'gauge', 'Hits over lookups since start')
+        entries = MetricFamily('cache_entries', 'gauge', 'Entries held by the cache')
+        memory = MetricFamily('cache_memory_bytes', 'gauge', 'Bytes of the cached values')
+        for name, cache in self._caches.items():
+            labels = {'cache': name}
+            lookups = cache.hits + cache.misses
+            hits.samples.append(('', labels, cache.hits))
+            misses.samples.append(('', labels, cache.misses))
+            ratio.samples.append(('', labels, cache.hits / lookups if lookups else 0.0))
+            # Reported by the caches that know their size
+            if getattr(cache, 'memory_bytes', None) is not None:
+                entries.samples.append(('', labels, len(cache)))
+                memory.samples.append(('', labels, cache.memory_bytes))
+        return [hits, misses, ratio, entries, memory]
+
+    def _collect_pools(self) -> list[MetricFamily]:
+        size = MetricFamily('db_pool_size', 'gauge', 'Connections the pool keeps open')
+        checked_out = MetricFamily('db_pool_checked_out', 'gauge', 'Connections in use')
+        overflow = MetricFamily('db_pool_overflow', 'gauge', 'Connections open beyond the pool size')
+        for database, engine in self._pools.items():
+            pool = engine.sync_engine.pool
+            labels = {'database': database}
+            # Not every pool class keeps these counters, e.g. NullPool
+            if hasattr(pool, 'checkedout'):
+                size.samples.append(('', labels, pool.size()))
+                checked_out.samples.append(('', labels, pool.checkedout()))
+                # Negative while the pool has not opened all its connections yet
+                overflow.samples.append(('', labels, max(pool.overflow(), 0)))
+        return [size, checked_out, overflow]
+
+class EventLoopMonitor:
+    """Measures how late a timer firing every `interval` seconds wakes up"""
+    def __init__(self, histogram: Histogram, interval: float = 0.5):
+        self.histogram = histogram
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name='event-loop-monitor')
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.histogram.observe(max(loop.time() - started - self.interval, 0.0))
+
+def get_metrics(request: Request) -> AppMetrics:
+    return request.app.state.metrics
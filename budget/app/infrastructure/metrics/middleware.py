@@ -0,0 +1,33 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .app_metrics import AppMetrics
+from ..logging.sampling import route_template
+
+class MetricsMiddleware:
+    """Counts in-flight requests and records their latency by route template"""
+    def __init__(self, app: ASGIApp, metrics: AppMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def inner_send(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        self.metrics.requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, inner_send)
+        finally:
+            self.metrics.requests_in_flight.dec()
+            self.metrics.observe_request(scope['method'], route_template(scope), status_code, time.perf_counter() - started)
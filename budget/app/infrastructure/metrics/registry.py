@@ -0,0 +1,161 @@
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Sequence
+
+OVERFLOW_LABEL = 'other'
+DEFAULT_MAX_SERIES = 500
+
+@dataclass
+class MetricFamily:
+    """One metric as rendered: name, type, help and `(suffix, labels, value)` samples,
+    the suffix is appended to the name, e.g. `_bucket` for histograms"""
+    name: str
+    type: str
+    help: str
+    samples: list[tuple[str, dict[str, str], float]] = field(default_factory=list)
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+class Metric(ABC):
+    """Base of the metrics updated in place.
+
+    Children are keyed by their label values. Once `max_series` children exist, new
+    label combinations are counted under `other` so a bad label can't grow the
+    registry without bound. Updates are not locked: every metric is updated from
+    the event loop thread.
+    """
+    type = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), max_series: int = DEFAULT_MAX_SERIES):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def _key(self, labels: Sequence[str]) -> tuple[str, ...]:
+        key = tuple(labels)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {key}')
+        if key not in self._children and len(self._children) >= self.max_series:
+            return (OVERFLOW_LABEL,) * len(key)
+        return key
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abstractmethod
+    def collect(self) -> MetricFamily:
+        pass
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._children[key] = self._children.get(key, 0) + amount
+
+    def collect(self) -> MetricFamily:
+        return MetricFamily(self.name, self.type, self.help,
+                            [('', self._labels(key), value) for key, value in self._children.items()])
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value: float, *labels: str) -> None:
+        self._children[self._key(labels)] = value
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = (),
+                 max_series: int = DEFAULT_MAX_SERIES):
+        super().__init__(name, help, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            # Per-bucket counts (last one is +Inf), then the sum
+            child = self._children[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        child[bisect_left(self.buckets, value)] += 1
+        child[-1] += value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.type, self.help)
+        for key, child in self._children.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child):
+                cumulative += count
+                family.samples.append(('_bucket', {**labels, 'le': _format_value(bound)}, cumulative))
+            family.samples.append(('_sum', labels, child[-1]))
+            family.samples.append(('_count', labels, cumulative))
+        return family
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text format by `render`.
+
+    Values that are already counted elsewhere (pool state, cache statistics) are read
+    by collectors at scrape time instead of being mirrored on every update.
+    """
+    def __init__(self):
+        self._metrics: list[Metric] = []
+        self._collectors: list[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = ()) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def _register(self, metric: Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self) -> list[MetricFamily]:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        lines = []
+        for family in self.collect():
+            lines.append(f'# HELP {family.name} {_escape_help(family.help)}')
+            lines.append(f'# TYPE {family.name} {family.type}')
+            for suffix, labels, value in family.samples:
+                lines.append(f'{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', r'\\').replace('\n', r'\n')
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + '}'
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
@@ -0,0 +1 @@
+from .tracing import tracer, configure_tracing, trace_engine, cache_span, add_trace_ids
@@ -0,0 +1,111 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from structlog.types import EventDict
+
+from ...domain.configs.config import Settings
+from ..metrics.app_metrics import sql_operation
+
+# A proxy: spans are no-ops until `configure_tracing` installs a provider
+tracer = trace.get_tracer('budget')
+
+class FileSpanExporter(ConsoleSpanExporter):
+    """One JSON span per line, e.g. for `jq` without running a collector. The file is
+    closed when the provider shuts down"""
+    def __init__(self, path: str):
+        super().__init__(out=open(path, 'a'), formatter=lambda span: span.to_json(indent=None) + os.linesep)
+
+    def shutdown(self) -> None:
+        self.out.close()
+
+def create_exporter(settings: Settings) -> SpanExporter | None:
+    match settings.tracing_exporter:
+        case 'console':
+            return ConsoleSpanExporter()
+        case 'file':
+            return FileSpanExporter(settings.tracing_file)
+        case 'otlp':
+            # Imported on demand, grpc is slow to load
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            return OTLPSpanExporter(endpoint=settings.otlp_endpoint)
+    return None
+
+def configure_tracing(app: FastAPI, settings: Settings) -> TracerProvider | None:
+    """Install the tracer provider and trace incoming requests, unless the exporter is `none`.
+
+    Head sampling: a new trace is kept with `tracing_sample_ratio` probability, requests
+    carrying a sampled `traceparent` are always kept.
+    """
+    exporter = create_exporter(settings)
+    if exporter is None:
+        return None
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': settings.SERVICE_NAME, 'service.version': app.version}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio))
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    FastAPIInstrumentor.instrument_app(app, tracer_provider=provider, excluded_urls='health,metrics')
+    return provider
+
+def trace_engine(engine: AsyncEngine, database: str) -> None:
+    """A client span per statement executed by `engine`, without parameter values"""
+    url = engine.url
+    attributes = {
+        'db.system': 'postgresql',
+        'db.name': url.database or '',
+        'server.address': url.host or '',
+        'server.port': url.port or 5432,
+        'db.instance': database,
+    }
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        operation = sql_operation(statement)
+        context._otel_span = tracer.start_span(
+            f'{operation} {attributes["db.name"]}'.strip(),
+            kind=SpanKind.CLIENT,
+            attributes={**attributes, 'db.operation': operation, 'db.statement': statement}
+        )
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span: Span | None = getattr(context, '_otel_span', None)
+        if span is not None:
+            span.end()
+
+    def handle_error(exception_context):
+        span: Span | None = getattr(exception_context.execution_context, '_otel_span', None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR, type(exception_context.original_exception).__name__))
+            span.end()
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine.sync_engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine.sync_engine, 'handle_error', handle_error)
+
+@contextmanager
+def cache_span(cache: str) -> Iterator[Span]:
+    """Span of one cache lookup, the caller sets `cache.hit`"""
+    with tracer.start_as_current_span(f'cache.get {cache}', attributes={'cache.name': cache}) as span:
+        yield span
+
+def add_trace_ids(_, __, event_dict: EventDict) -> EventDict:
+    """structlog processor adding the ids of the current span, next to the request id"""
+    context = trace.get_current_span().get_span_context()
+    if context.is_valid:
+        event_dict['trace_id'] = format(context.trace_id, '032x')
+        event_dict['span_id'] = format(context.span_id, '016x')
+    return event_dict
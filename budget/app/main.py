@@ -1,14 +1,24 @@
 import uvicorn
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 
-from .infrastructure.database.database import create_engine_and_session
+from .infrastructure.database.database import create_engine_and_session, warm_up_pool
+from .infrastructure.database.statement_stats import StatementStats
+from .infrastructure.database.query_stats import QueryTracker
+from .infrastructure.database.routing import DatabaseRouter
+from .infrastructure.auth.jwks import JWKSCache
+from .infrastructure.auth.claims_cache import ClaimsCache
+from .application.services import DefaultCategoriesCache
+from .infrastructure.cache import ResponseCache
 from .domain.configs.config import get_settings
 from .infrastructure.logging.logging import configure_logging
 from .infrastructure.logging.logging_middleware import StructLogMiddleware
+from .infrastructure.logging.sampling import AccessLogSampler
+from .infrastructure.metrics import AppMetrics, EventLoopMonitor, MetricsMiddleware
+from .infrastructure.tracing import configure_tracing, trace_engine
 from asgi_correlation_id import CorrelationIdMiddleware
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import health, categories, budget
+from .routers import health, categories, budget, metrics
 from .utils.init_db import init_db
 
 origins = [
@@ -18,33 +28,90 @@ origins = [
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     settings = get_settings()
-    engine, session_maker = create_engine_and_session(settings)
-    async with session_maker() as session:
-        await init_db(session)
-    yield
-    await engine.dispose()
+    # Each resource is released as soon as it is acquired, in reverse order, also when
+    # a later step of the startup fails
+    async with AsyncExitStack() as resources:
+        if app.state.tracer_provider is not None:
+            resources.callback(app.state.tracer_provider.shutdown)
+        engine, session_maker = create_engine_and_session(settings)
+        resources.push_async_callback(engine.dispose)
+        app.state.statement_stats.instrument(engine)
+        app.state.query_tracker.instrument(engine)
+        app.state.metrics.instrument_engine(engine, 'primary')
+        if app.state.tracer_provider is not None:
+            trace_engine(engine, 'primary')
+        await warm_up_pool(engine, min(settings.db_pool_warmup, settings.db_pool_size))
+        app.state.engine = engine
+        app.state.session_maker = session_maker
+        jwks_cache = JWKSCache.from_settings(settings)
+        resources.push_async_callback(jwks_cache.stop)
+        await jwks_cache.start()
+        app.state.jwks_cache = jwks_cache
+        app.state.metrics.watch_cache('jwks', jwks_cache)
+        database_router = DatabaseRouter.from_settings(settings)
+        # Disposes the replica engines too
+        resources.push_async_callback(database_router.stop)
+        for index, replica in enumerate(database_router.replicas):
+            app.state.statement_stats.instrument(replica.engine)
+            app.state.query_tracker.instrument(replica.engine)
+            app.state.metrics.instrument_engine(replica.engine, f'replica{index}')
+            if app.state.tracer_provider is not None:
+                trace_engine(replica.engine, f'replica{index}')
+        await database_router.start()
+        app.state.database_router = database_router
+        async with session_maker() as session:
+            await init_db(session)
+            await app.state.default_categories.get(session)
+        loop_monitor = EventLoopMonitor(app.state.metrics.event_loop_lag, settings.event_loop_lag_interval)
+        resources.push_async_callback(loop_monitor.stop)
+        await loop_monitor.start()
+        yield
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    configure_logging(settings.json_logs)
+    configure_logging(settings.json_logs,
+                      queue_size=settings.log_queue_size,
+                      overflow=settings.log_overflow,
+                      batch_size=settings.log_batch_size)
 
     app = FastAPI(
         title=settings.SERVICE_NAME,
         version="1.0.0",
         lifespan=lifespan
     )
+    app.state.claims_cache = ClaimsCache(settings.claims_cache_size, settings.claims_cache_max_ttl)
+    app.state.default_categories = DefaultCategoriesCache(settings.default_categories_max_age)
+    app.state.response_cache = ResponseCache.from_settings(settings)
+    app.state.statement_stats = StatementStats()
+    app.state.query_tracker = QueryTracker(settings.query_repeat_limit, settings.query_repeat_mode)
+    app.state.metrics = AppMetrics()
+    app.state.metrics.watch_cache('claims', app.state.claims_cache)
+    app.state.metrics.watch_cache('default_categories', app.state.default_categories)
+    app.state.metrics.watch_cache('responses', app.state.response_cache)
+    # Hits are reads that joined an identical one in flight
+    app.state.metrics.watch_cache('response_flights', app.state.response_cache.flights)
+    app.state.metrics.watch_cache('statements', app.state.statement_stats.statements)
+    app.state.metrics.watch_cache('compiled_statements', app.state.statement_stats.compiled)
+    app.state.metrics.watch_cache('prepared_statements', app.state.statement_stats.prepared)
 
-    app.add_middleware(StructLogMiddleware)
+    app.add_middleware(StructLogMiddleware, sampler=AccessLogSampler(
+        settings.access_log_sample_rate, settings.access_log_sample_rates, settings.slow_request_ms
+    ), queries=app.state.query_tracker)
     app.add_middleware(CorrelationIdMiddleware)
     app.add_middleware(CORSMiddleware,
         allow_origins=origins,
         allow_credentials=True,
         allow_methods=["*"],
-        allow_headers=["*"],)
+        allow_headers=["*"],
+        expose_headers=["ETag"],)
+    app.add_middleware(MetricsMiddleware, metrics=app.state.metrics)
+    # Last, so the server span encloses every other middleware
+    app.state.tracer_provider = configure_tracing(app, settings)
 
     app.include_router(health.router)
     app.include_router(categories.router)
     app.include_router(budget.router)
+    app.include_router(metrics.router)
 
     @app.get("/")
     async def root():
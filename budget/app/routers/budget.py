@@ -1,12 +1,27 @@
-from fastapi import APIRouter, HTTPException, status
-from ..domain.schemas import BudgetCreatePayload, SimpleBudget, CategoryBudget, PercentageBudget, BudgetBase
-from ..domain.exceptions import RepositoryError
-from ..application.services import BudgetServiceDep
-from ..infrastructure.auth import current_user_dep
-from typing import Union, List
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from ..domain.schemas import BudgetCreatePayload, SimpleBudget, CategoryBudget, PercentageBudget, BudgetBase, Pagination, BudgetFilterParams, BudgetBatchItemResult, FileFormat, ImportReport
+from ..domain.schemas.budget import MAX_BATCH_SIZE
+from ..domain.schemas.adapters import budget_adapter, budget_list_adapter, budget_page_adapter, batch_result_list_adapter
+from ..domain.exceptions import RepositoryError, NotFoundError
+from ..application.services import BudgetServiceDep, ExportServiceDep, ImportServiceDep
+from ..application.services.import_service import iter_lines
+from ..domain.configs.config import settings_dep
+from ..infrastructure.auth import current_user_dep, admin_user_dep
+from .etag import make_etag, is_not_modified, not_modified_response
+from .streaming import export_response
+from .serialization import json_response
+from typing import Annotated, Any, Optional, Union, List
+from uuid import UUID
 
 router = APIRouter(prefix="/budget", tags=["budgets"])
 
+EXPORT_FIELDS = (
+    'id', 'name', 'type', 'currency', 'start_date', 'end_date',
+    'total_amount', 'needs_percent', 'wants_percent', 'savings_percent', 'categories'
+)
+
 @router.post("", 
             response_model=Union[SimpleBudget, PercentageBudget, CategoryBudget],
             responses={
@@ -85,44 +100,156 @@ router = APIRouter(prefix="/budget", tags=["budgets"])
 async def create_budget(
     payload: BudgetCreatePayload,
     user: current_user_dep,
-    service: BudgetServiceDep) -> Union[SimpleBudget, PercentageBudget, CategoryBudget]:
+    service: BudgetServiceDep) -> Response:
     """Create a new category"""
     try:
-        budget_data = payload.model_dump()
-        budget_data['user_id'] = user.user_id
-        return await service.create_budget(payload.model_validate(budget_data))
+        # The body is already validated, the owner is set without validating it again
+        budget = await service.create_budget(payload.model_copy(update={'user_id': user.user_id}))
+        return json_response(budget_adapter, budget, status.HTTP_201_CREATED)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except RepositoryError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     
+@router.post('/batch',
+             response_model=list[BudgetBatchItemResult],
+             status_code=status.HTTP_201_CREATED,
+             responses={207: {"description": "Some items were rejected, see `errors` of each item"}},
+             response_model_exclude_none=True)
+async def create_budgets(
+    payload: Annotated[List[dict[str, Any]], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+    user: current_user_dep,
+    service: BudgetServiceDep) -> Response:
+    """Create up to 100 budgets at once, results are returned in input order"""
+    results: List[BudgetBatchItemResult] = []
+    valid = []
+    for index, item in enumerate(payload):
+        try:
+            budget = budget_adapter.validate_python({**item, 'user_id': user.user_id})
+            valid.append((index, budget))
+            results.append(BudgetBatchItemResult(index=index))
+        except ValidationError as e:
+            results.append(BudgetBatchItemResult(
+                index=index,
+                errors=e.errors(include_url=False, include_context=False, include_input=False)
+            ))
+
+    try:
+        # Unknown envelope categories are rejected per item instead of failing the batch on the foreign key
+        if valid:
+            category_errors = await service.category_errors([budget for _, budget in valid])
+            for (index, _), errors in zip(valid, category_errors):
+                if errors:
+                    results[index].errors = errors
+            valid = [item for item, errors in zip(valid, category_errors) if not errors]
+        created = await service.create_budgets([budget for _, budget in valid]) if valid else []
+    except RepositoryError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    for (index, _), budget in zip(valid, created):
+        results[index].budget = budget
+    status_code = status.HTTP_201_CREATED if len(valid) == len(payload) else status.HTTP_207_MULTI_STATUS
+    return json_response(batch_result_list_adapter, results, status_code, exclude_none=True)
+
+@router.post('/import',
+             response_model=ImportReport,
+             openapi_extra={
+                 "requestBody": {
+                     "required": True,
+                     "content": {
+                         "application/x-ndjson": {"schema": {"type": "string", "format": "binary"}},
+                         "text/csv": {"schema": {"type": "string", "format": "binary"}}
+                     }
+                 }
+             })
+async def import_budgets(
+    admin: admin_user_dep,
+    service: ImportServiceDep,
+    request: Request,
+    format: FileFormat = FileFormat.NDJSON,
+    user_id: Annotated[Optional[UUID], Query(description="Owner of every imported budget, overrides `user_id` of the records")] = None
+) -> ImportReport:
+    """Bulk import budgets from the raw request body in the export layout (admin only)"""
+    try:
+        return await service.import_budgets(iter_lines(request.stream()), format, user_id=user_id)
+    except RepositoryError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
 @router.get('',
-            response_model=list[BudgetBase],
-            status_code=status.HTTP_200_OK)
+            response_model=Pagination[BudgetBase],
+            status_code=status.HTTP_200_OK,
+            responses={304: {"description": "Not modified since the `ETag` sent in `If-None-Match`"}})
 async def get_created_budgets(
     user: current_user_dep,
-    service: BudgetServiceDep
-) -> List[BudgetBase]:
-    """Get budgets created by user"""
+    service: BudgetServiceDep,
+    filters: Annotated[BudgetFilterParams, Query()],
+    request: Request
+) -> Response:
+    """Get a page of budgets created by user, pass `next_cursor` as `cursor` to get the next one"""
+    etag = make_etag(request, str(user.user_id), await service.collection_version(user.user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
     try:
-        return await service.get_all_budgets(user.user_id)
+        page = await service.get_budgets_page(user.user_id, filters)
+        return json_response(budget_page_adapter, page, headers={'ETag': etag})
     except RepositoryError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@router.get('{id}',
+@router.get('/details',
+            response_model=list[Union[SimpleBudget, PercentageBudget, CategoryBudget]],
+            status_code=status.HTTP_200_OK,
+            responses={304: {"description": "Not modified since the `ETag` sent in `If-None-Match`"}})
+async def get_created_budgets_detailed(
+    user: current_user_dep,
+    service: BudgetServiceDep,
+    request: Request
+) -> Response:
+    """Get budgets created by user with their type specific data"""
+    etag = make_etag(request, str(user.user_id), await service.collection_version(user.user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    try:
+        budgets = await service.get_all_budgets_detailed(user.user_id)
+        return json_response(budget_list_adapter, budgets, headers={'ETag': etag})
+    except RepositoryError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get('/export',
+            response_class=StreamingResponse,
+            responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}})
+async def export_budgets(
+    user: current_user_dep,
+    service: ExportServiceDep,
+    settings: settings_dep,
+    request: Request,
+    format: FileFormat = FileFormat.NDJSON
+) -> StreamingResponse:
+    """Stream every budget created by user with its type specific data as NDJSON or CSV"""
+    return export_response(
+        request, service.export_budgets(user.user_id), format, EXPORT_FIELDS, settings.export_chunk_size, 'budgets'
+    )
+
+@router.get('/{id}',
             response_model=Union[SimpleBudget, PercentageBudget, CategoryBudget],
-            status_code=status.HTTP_200_OK)
+            status_code=status.HTTP_200_OK,
+            responses={304: {"description": "Not modified since the `ETag` sent in `If-None-Match`"}})
 async def get_by_id(
     id: int,
     user: current_user_dep,
-    service: BudgetServiceDep
-) -> Union[SimpleBudget, PercentageBudget, CategoryBudget]:
+    service: BudgetServiceDep,
+    request: Request
+) -> Response:
     """Get budget by id"""
+    etag = make_etag(request, str(user.user_id), await service.collection_version(user.user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
     try:
         budget = await service.get_budget_by_id(user.user_id, id)
         if not budget:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You're not an author")
-        return budget
+        return json_response(budget_adapter, budget, headers={'ETag': etag})
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except RepositoryError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -1,20 +1,48 @@
 from typing import List
-from fastapi import APIRouter
-from ..domain.schemas import CategoryCreate, CategoryResponse
-from ..application.services import CategoryServiceDep
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import StreamingResponse
+from ..domain.schemas import CategoryCreate, CategoryResponse, FileFormat
+from ..application.services import CategoryServiceDep, ExportServiceDep
+from ..domain.configs.config import settings_dep
 from ..infrastructure.auth import current_user_dep
+from .etag import make_etag, is_not_modified, not_modified_response
+from .streaming import export_response
+from .serialization import json_response
+from ..domain.schemas.adapters import category_adapter
 
 router = APIRouter(prefix="/category", tags=["categories"])
 
+EXPORT_FIELDS = ('id', 'user_id', 'name', 'type', 'parent_category_id', 'favicon')
+
 @router.post("", response_model=CategoryResponse, status_code=201)
 async def create_category(
     category: CategoryCreate,
     user: current_user_dep,
-    service: CategoryServiceDep) -> CategoryResponse:
+    service: CategoryServiceDep) -> Response:
     """Create a new category"""
-    return await service.create(category, user.user_id)
+    return json_response(category_adapter, await service.create(category, user.user_id), status.HTTP_201_CREATED)
 
-@router.get("", response_model=List[CategoryResponse])
-async def get_categories(user: current_user_dep, service: CategoryServiceDep):
+@router.get("",
+            response_model=List[CategoryResponse],
+            responses={304: {"description": "Not modified since the `ETag` sent in `If-None-Match`"}})
+async def get_categories(user: current_user_dep, service: CategoryServiceDep, request: Request):
     """Get all default categories and those created by user"""
-    return await service.get(user.user_id)
\ No newline at end of file
+    etag = make_etag(request, str(user.user_id), await service.collection_version(user.user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    content = await service.get_json(user.user_id)
+    return Response(content=content, media_type="application/json", headers={'ETag': etag})
+
+@router.get("/export",
+            response_class=StreamingResponse,
+            responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}})
+async def export_categories(
+    user: current_user_dep,
+    service: ExportServiceDep,
+    settings: settings_dep,
+    request: Request,
+    format: FileFormat = FileFormat.NDJSON):
+    """Stream all default categories and those created by user as NDJSON or CSV"""
+    return export_response(
+        request, service.export_categories(user.user_id), format, EXPORT_FIELDS, settings.export_chunk_size, 'categories'
+    )
\ No newline at end of file
@@ -0,0 +1,20 @@
+import hashlib
+from fastapi import Request, Response, status
+
+def make_etag(request: Request, *versions: str) -> str:
+    """Strong ETag of a representation: collection versions plus the exact path and query"""
+    key = ':'.join((*versions, request.url.path, request.url.query))
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110 13.1.2)
+    candidates = (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+    return etag in candidates
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
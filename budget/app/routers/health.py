@@ -6,13 +6,16 @@ from structlog import BoundLogger
 
 from ..domain.configs.config import Settings, get_settings
 from ..infrastructure import db_session_dep, NamedLogger
+from ..infrastructure.database.statement_stats import StatementStats, get_statement_stats
 
 router = APIRouter(tags=["health"])
 
+SELECT_ONE = text("SELECT 1")
+
 async def check_database_health(db: AsyncSession, logger: BoundLogger, settings: Settings) -> bool:
     """Check PostgreSQL connection by executing query"""
     try:
-        await db.execute(text("SELECT 1"))
+        await db.execute(SELECT_ONE)
         return True
     except Exception as e:
         await logger.aerror(
@@ -38,4 +41,8 @@ async def health(db: db_session_dep, logger = Depends(NamedLogger('health')), se
     return JSONResponse(
         content=result,
         status_code=status.HTTP_200_OK if db_health else status.HTTP_503_SERVICE_UNAVAILABLE
-    )
\ No newline at end of file
+    )
+
+@router.get("/health/statements", summary="Statement cache hit rates")
+async def statement_stats(stats: StatementStats = Depends(get_statement_stats)):
+    return stats.snapshot()
\ No newline at end of file
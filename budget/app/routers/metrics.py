@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from ..infrastructure.metrics import AppMetrics, get_metrics
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", summary="Prometheus metrics", include_in_schema=False)
+async def metrics(metrics: AppMetrics = Depends(get_metrics)):
+    return PlainTextResponse(metrics.registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
\ No newline at end of file
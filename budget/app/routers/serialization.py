@@ -0,0 +1,14 @@
+from typing import Any, Mapping
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+def json_response(adapter: TypeAdapter, content: Any, status_code: int = status.HTTP_200_OK,
+                  headers: Mapping[str, str] | None = None, **dump_options) -> Response:
+    """JSON bytes straight from the pydantic-core serializer of `adapter`, or `content`
+    itself when it is already serialized by it, e.g. a read of the response cache.
+
+    Returning a Response skips FastAPI's `response_model` validation and
+    `jsonable_encoder`; `response_model` is still declared on the route for the docs.
+    """
+    body = content if isinstance(content, bytes) else adapter.dump_json(content, **dump_options)
+    return Response(body, status_code=status_code, headers=headers, media_type='application/json')
@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from contextlib import aclosing
+from typing import AsyncIterator, Sequence
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ..domain.schemas import FileFormat
+
+MEDIA_TYPES = {
+    FileFormat.NDJSON: 'application/x-ndjson',
+    FileFormat.CSV: 'text/csv; charset=utf-8',
+}
+
+def ndjson_line(item: BaseModel) -> bytes:
+    return item.__pydantic_serializer__.to_json(item) + b'\n'
+
+class CsvEncoder:
+    """Encodes models as CSV rows of `fields`, nested values are written as JSON"""
+    def __init__(self, fields: Sequence[str]):
+        self.fields = fields
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _encode(self, values: Sequence) -> bytes:
+        self._writer.writerow(values)
+        line = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return line.encode()
+
+    def header(self) -> bytes:
+        return self._encode(self.fields)
+
+    def __call__(self, item: BaseModel) -> bytes:
+        data = item.model_dump(mode='json')
+        return self._encode([
+            json.dumps(value) if isinstance(value, (list, dict)) else value
+            for value in (data.get(field) for field in self.fields)
+        ])
+
+async def encode_chunks(request: Request, items: AsyncIterator[BaseModel], format: FileFormat,
+                        fields: Sequence[str], chunk_size: int) -> AsyncIterator[bytes]:
+    """Serialize `items` into chunks of about `chunk_size` bytes.
+
+    The source is closed as soon as the client goes away, which releases its
+    server-side cursor and connection instead of reading the rest of the result.
+    """
+    if format == FileFormat.CSV:
+        encoder = CsvEncoder(fields)
+        chunk = [encoder.header()]
+    else:
+        encoder = ndjson_line
+        chunk = []
+    size = sum(map(len, chunk))
+    async with aclosing(items):
+        async for item in items:
+            line = encoder(item)
+            chunk.append(line)
+            size += len(line)
+            if size >= chunk_size:
+                yield b''.join(chunk)
+                chunk, size = [], 0
+                if await request.is_disconnected():
+                    return
+    if chunk:
+        yield b''.join(chunk)
+
+def export_response(request: Request, items: AsyncIterator[BaseModel], format: FileFormat,
+                    fields: Sequence[str], chunk_size: int, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        encode_chunks(request, items, format, fields, chunk_size),
+        media_type=MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{format.value}"'},
+    )
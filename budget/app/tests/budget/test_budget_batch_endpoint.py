@@ -0,0 +1,130 @@
+import pytest
+
+from uuid import UUID
+from fastapi.testclient import TestClient
+from fastapi import status
+from unittest.mock import AsyncMock
+
+from ...domain.schemas.user import User
+from ...domain.exceptions import RepositoryError
+from ...application.services import BudgetService
+from ...infrastructure.auth.auth import get_current_user
+from ...infrastructure.database.database import get_db
+from ...main import app
+
+TEST_USER = User(
+    email="test@example.com",
+    user_id=UUID("123e4567-e89b-12d3-a456-426614174000")
+)
+
+SIMPLE = {
+    "type": "simple",
+    "start_date": "2024-01-01",
+    "end_date": "2024-01-31",
+    "total_amount": 1500.0,
+    "name": "default",
+    "currency": "USD"
+}
+
+ENVELOPE = {
+    "type": "envelope",
+    "start_date": "2024-03-01",
+    "end_date": "2024-03-31",
+    "categories": [{"category_id": 1, "amount": 500}],
+    "name": "default",
+    "currency": "USD"
+}
+
+INVALID_PERCENTAGE = {
+    "type": "percentage",
+    "start_date": "2024-02-01",
+    "end_date": "2024-02-28",
+    "needs_percent": 60,
+    "wants_percent": 30,
+    "savings_percent": 20,
+    "name": "default",
+    "currency": "USD"
+}
+
+async def assign_ids(budgets):
+    return [budget.model_copy(update={'id': i + 1}) for i, budget in enumerate(budgets)]
+
+@pytest.fixture
+def mock_budget_service():
+    service = AsyncMock()
+    service.create_budgets.side_effect = assign_ids
+    service.category_errors.side_effect = lambda budgets: [[] for _ in budgets]
+    return service
+
+@pytest.fixture
+def client(mock_budget_service, mock_db):
+    app.dependency_overrides[get_current_user] = lambda: TEST_USER
+    app.dependency_overrides[BudgetService] = lambda: mock_budget_service
+    app.dependency_overrides[get_db] = lambda: mock_db
+    yield TestClient(app, raise_server_exceptions=False)
+    app.dependency_overrides = {}
+
+def test_create_batch_success(client, mock_budget_service):
+    #act
+    response = client.post("/budget/batch", json=[SIMPLE, ENVELOPE])
+
+    #assert
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert [item["index"] for item in data] == [0, 1]
+    assert data[0]["budget"]["type"] == "simple"
+    assert data[1]["budget"]["categories"] == [{"category_id": 1, "amount": 500.0}]
+    assert "user_id" not in data[0]["budget"]
+    budgets = mock_budget_service.create_budgets.call_args.args[0]
+    assert all(budget.user_id == TEST_USER.user_id for budget in budgets)
+
+def test_create_batch_reports_invalid_items_in_order(client, mock_budget_service):
+    #act
+    response = client.post("/budget/batch", json=[SIMPLE, INVALID_PERCENTAGE, ENVELOPE])
+
+    #assert
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    data = response.json()
+    assert [item["index"] for item in data] == [0, 1, 2]
+    assert "budget" in data[0] and "errors" not in data[0]
+    assert "Percentages must sum to 100" in data[1]["errors"][0]["msg"]
+    assert "budget" not in data[1]
+    assert data[2]["budget"]["type"] == "envelope"
+    assert len(mock_budget_service.create_budgets.call_args.args[0]) == 2
+
+def test_create_batch_reports_unknown_categories_per_item(client, mock_budget_service):
+    #arrange
+    mock_budget_service.category_errors.side_effect = lambda budgets: [
+        [{'type': 'not_found', 'loc': ['categories', 0, 'category_id'], 'msg': 'Category 1 does not exist'}]
+        if budget.type == 'envelope' else [] for budget in budgets
+    ]
+
+    #act
+    response = client.post("/budget/batch", json=[SIMPLE, ENVELOPE])
+
+    #assert
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    data = response.json()
+    assert data[0]["budget"]["type"] == "simple"
+    assert data[1]["errors"][0]["loc"] == ['categories', 0, 'category_id']
+    assert "budget" not in data[1]
+    assert len(mock_budget_service.create_budgets.call_args.args[0]) == 1
+
+def test_create_batch_user_id_cannot_be_spoofed(client, mock_budget_service):
+    response = client.post("/budget/batch", json=[{**SIMPLE, "user_id": "00000000-0000-0000-0000-000000000001"}])
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert mock_budget_service.create_budgets.call_args.args[0][0].user_id == TEST_USER.user_id
+
+@pytest.mark.parametrize('payload', [[], [SIMPLE] * 101])
+def test_create_batch_size_limits(client, payload):
+    response = client.post("/budget/batch", json=payload)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_create_batch_repository_error(client, mock_budget_service):
+    mock_budget_service.create_budgets.side_effect = RepositoryError("Database error")
+
+    response = client.post("/budget/batch", json=[SIMPLE])
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
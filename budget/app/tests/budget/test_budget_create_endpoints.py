@@ -3,7 +3,7 @@ import pytest
 from uuid import UUID
 from fastapi.testclient import TestClient
 from fastapi import HTTPException, status
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 from ...domain.schemas.user import User
 from ...domain.exceptions import RepositoryError
@@ -299,4 +299,29 @@ def test_repository_error_from_service(client, mock_auth, mock_budget_service):
 
     #assert
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "Database error" in response.json()["detail"]
\ No newline at end of file
+    assert "Database error" in response.json()["detail"]
+
+
+def test_create_validates_body_once(client, mock_auth, mock_budget_service, monkeypatch):
+    #arrange
+    mock_budget_service.create_budget.side_effect = lambda budget: budget.model_copy(update={'id': 1})
+    monkeypatch.setattr(SimpleBudget, 'model_validate', MagicMock(side_effect=AssertionError('validated twice')))
+    payload = {
+        "type": "simple",
+        "start_date": "2024-01-01",
+        "end_date": "2024-01-31",
+        "total_amount": 1500.0,
+        "name": "default",
+        "currency": "USD"
+    }
+
+    #act
+    response = client.post("/budget", json=payload)
+
+    #assert
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {**payload, "id": 1}
+    args, _ = mock_budget_service.create_budget.call_args
+    assert isinstance(args[0], SimpleBudget)
+    assert args[0].user_id == mock_auth.user_id
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+import pytest
+
+from uuid import UUID
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+from ...domain.schemas.user import User
+from ...domain.schemas.budget import SimpleBudget, CategoryBudget
+from ...application.services import ExportService
+from ...domain.configs.config import get_settings
+from ...infrastructure.auth.auth import get_current_user
+from ...main import app
+
+TEST_USER = User(
+    email="test@example.com",
+    user_id=UUID("123e4567-e89b-12d3-a456-426614174000")
+)
+
+SIMPLE = SimpleBudget(
+    id=1,
+    type="simple",
+    start_date="2024-01-01",
+    end_date="2024-01-31",
+    total_amount=1500.0,
+    name="default",
+    currency="USD",
+    user_id=TEST_USER.user_id
+)
+
+ENVELOPE = CategoryBudget(
+    id=3,
+    type="envelope",
+    start_date="2024-03-01",
+    end_date="2024-03-31",
+    categories=[{"category_id": 1, "amount": 500}],
+    name="default",
+    currency="USD",
+    user_id=TEST_USER.user_id
+)
+
+@pytest.fixture
+def mock_export_service():
+    async def export_budgets(user_id):
+        for budget in (SIMPLE, ENVELOPE):
+            yield budget
+    service = MagicMock()
+    service.export_budgets.side_effect = export_budgets
+    return service
+
+@pytest.fixture
+def client(mock_export_service):
+    settings = get_settings().model_copy(update={'export_chunk_size': 1})
+    app.dependency_overrides[get_current_user] = lambda: TEST_USER
+    app.dependency_overrides[ExportService] = lambda: mock_export_service
+    app.dependency_overrides[get_settings] = lambda: settings
+    yield TestClient(app, raise_server_exceptions=False)
+    app.dependency_overrides = {}
+
+def test_export_ndjson(client, mock_export_service):
+    #act
+    response = client.get("/budget/export")
+
+    #assert
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="budgets.ndjson"'
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [1, 3]
+    assert lines[1]["categories"][0]["category_id"] == 1
+    mock_export_service.export_budgets.assert_called_once_with(TEST_USER.user_id)
+
+def test_export_csv(client):
+    #act
+    response = client.get("/budget/export", params={"format": "csv"})
+
+    #assert
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["id"] for row in rows] == ["1", "3"]
+    assert rows[0]["total_amount"] == "1500.0"
+    assert rows[0]["categories"] == ""
+    assert json.loads(rows[1]["categories"]) == [{"category_id": 1, "amount": 500.0}]
+
+def test_export_rejects_unknown_format(client):
+    response = client.get("/budget/export", params={"format": "xml"})
+
+    assert response.status_code == 422
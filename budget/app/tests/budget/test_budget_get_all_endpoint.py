@@ -1,15 +1,18 @@
 import pytest
 
+from datetime import date
 from uuid import UUID
 from fastapi.testclient import TestClient
 from fastapi import HTTPException, status
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 from ...domain.schemas.user import User
 from ...domain.exceptions import RepositoryError
 from ...domain.schemas.budget import (
     BudgetBase
 )
+from ...domain.schemas import Pagination, BudgetFilterParams
+from ...domain.schemas.pagination import encode_cursor
 from ...application.services import BudgetService
 from ...infrastructure.auth.auth import get_current_user
 from ...infrastructure.database.database import get_db
@@ -39,6 +42,7 @@ def mock_auth():
 def mock_budget_service():
     budget_service = AsyncMock()
     budget_service.create_budget.return_value = BUDGET
+    budget_service.collection_version = AsyncMock(return_value='v1')
     return budget_service
 
 @pytest.fixture
@@ -65,35 +69,119 @@ def test_create_category_unauthorized(client):
 
 def test_get_all_budgets_success(client, mock_budget_service):
     #arrange
-    mock_budget_service.get_all_budgets.return_value = [
-        BudgetBase(
-            user_id=TEST_USER.user_id,
-            currency='USD',
-            end_date='2024-03-31',
-            start_date='2024-03-30',
-            id=1,
-            name='default',
-            type=BudgetType.SIMPLE
-        )
-    ]
+    mock_budget_service.get_budgets_page.return_value = Pagination[BudgetBase](
+        items=[
+            BudgetBase(
+                user_id=TEST_USER.user_id,
+                currency='USD',
+                end_date='2024-03-31',
+                start_date='2024-03-30',
+                id=1,
+                name='default',
+                type=BudgetType.SIMPLE
+            )
+        ],
+        limit=20,
+        next_cursor=None
+    )
 
     #act
     response = client.get("/budget")
 
     #assert
     assert response.status_code == status.HTTP_200_OK
-    data = response.json()[0]
+    data = response.json()['items'][0]
     assert data["type"] == "simple"
     assert data['id'] == 1
+    assert response.json()['next_cursor'] is None
+
+
+def test_get_budgets_page_passes_filters(client, mock_budget_service):
+    #arrange
+    mock_budget_service.get_budgets_page.return_value = Pagination[BudgetBase](items=[], limit=5)
+    cursor = encode_cursor('2024-03-30', 1)
+
+    #act
+    response = client.get("/budget", params={
+        "limit": 5,
+        "cursor": cursor,
+        "type": "envelope",
+        "currency": "HUF",
+        "date_from": "2024-01-01",
+        "date_to": "2024-12-31"
+    })
+
+    #assert
+    assert response.status_code == status.HTTP_200_OK
+    _, filters = mock_budget_service.get_budgets_page.call_args.args
+    assert isinstance(filters, BudgetFilterParams)
+    assert filters.limit == 5
+    assert filters.type == BudgetType.ENVELOPE
+    assert filters.currency == 'HUF'
+    assert filters.after == (date(2024, 3, 30), 1)
+
+
+@pytest.mark.parametrize('params', [
+    {"limit": 1000},
+    {"limit": 0},
+    {"cursor": "not-a-cursor"},
+    {"date_from": "2024-12-31", "date_to": "2024-01-01"},
+])
+def test_get_budgets_page_rejects_invalid_params(client, params):
+    response = client.get("/budget", params=params)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
 def test_repository_error_from_service(client, mock_budget_service):
     #arrange
-    mock_budget_service.get_all_budgets.side_effect = RepositoryError("Database error")
+    mock_budget_service.get_budgets_page.side_effect = RepositoryError("Database error")
 
     #act
     response = client.get("/budget")
 
     #assert
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-    assert "Database error" in response.json()["detail"]
\ No newline at end of file
+    assert "Database error" in response.json()["detail"]
+
+def test_get_budgets_page_returns_etag(client, mock_budget_service):
+    #arrange
+    mock_budget_service.get_budgets_page.return_value = Pagination[BudgetBase](items=[], limit=20)
+
+    #act
+    first = client.get("/budget")
+    other_page = client.get("/budget", params={"limit": 5})
+
+    #assert
+    assert first.headers["ETag"].startswith('"')
+    assert first.headers["ETag"] != other_page.headers["ETag"]
+
+
+def test_get_budgets_page_not_modified(client, mock_budget_service):
+    #arrange
+    mock_budget_service.get_budgets_page.return_value = Pagination[BudgetBase](items=[], limit=20)
+    etag = client.get("/budget").headers["ETag"]
+    mock_budget_service.get_budgets_page.reset_mock()
+
+    #act
+    response = client.get("/budget", headers={"If-None-Match": f'"stale", W/{etag}'})
+
+    #assert
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.content == b''
+    mock_budget_service.get_budgets_page.assert_not_awaited()
+
+
+def test_get_budgets_page_modified_after_write(client, mock_budget_service):
+    #arrange
+    mock_budget_service.get_budgets_page.return_value = Pagination[BudgetBase](items=[], limit=20)
+    etag = client.get("/budget").headers["ETag"]
+    mock_budget_service.collection_version.return_value = 'v2'
+
+    #act
+    response = client.get("/budget", headers={"If-None-Match": etag})
+
+    #assert
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
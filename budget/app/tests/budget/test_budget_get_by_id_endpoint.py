@@ -0,0 +1,105 @@
+import pytest
+
+from uuid import UUID
+from fastapi.testclient import TestClient
+from fastapi import status
+from unittest.mock import AsyncMock, MagicMock
+
+from ...domain.schemas.user import User
+from ...domain.exceptions import RepositoryError, NotFoundError
+from ...domain.schemas.budget import SimpleBudget, CategoryBudget
+from ...domain.schemas.adapters import budget_adapter
+from ...application.services import BudgetService
+from ...infrastructure.auth.auth import get_current_user
+from ...infrastructure.database.database import get_db
+from ...main import app
+
+TEST_USER = User(
+    email="test@example.com",
+    user_id=UUID("123e4567-e89b-12d3-a456-426614174000")
+)
+
+SIMPLE = SimpleBudget(
+    id=1,
+    type="simple",
+    start_date="2024-01-01",
+    end_date="2024-01-31",
+    total_amount=1500.0,
+    name="default",
+    currency="USD",
+    user_id=TEST_USER.user_id
+)
+
+ENVELOPE = CategoryBudget(
+    id=3,
+    type="envelope",
+    start_date="2024-03-01",
+    end_date="2024-03-31",
+    categories=[{"category_id": 1, "amount": 500}],
+    name="default",
+    currency="USD",
+    user_id=TEST_USER.user_id
+)
+
+@pytest.fixture
+def mock_budget_service():
+    service = AsyncMock()
+    service.collection_version = AsyncMock(return_value='v1')
+    return service
+
+@pytest.fixture
+def client(mock_budget_service, mock_db):
+    app.dependency_overrides[get_current_user] = lambda: TEST_USER
+    app.dependency_overrides[BudgetService] = lambda: mock_budget_service
+    app.dependency_overrides[get_db] = lambda: mock_db
+    yield TestClient(app, raise_server_exceptions=False)
+    app.dependency_overrides = {}
+
+def test_get_by_id_success(client, mock_budget_service):
+    #arrange
+    # Serialized by the service, sent as it is
+    mock_budget_service.get_budget_by_id.return_value = budget_adapter.dump_json(SIMPLE)
+
+    #act
+    response = client.get("/budget/1")
+
+    #assert
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total_amount"] == 1500.0
+    assert "user_id" not in data
+    mock_budget_service.get_budget_by_id.assert_awaited_once_with(TEST_USER.user_id, 1)
+
+def test_get_by_id_not_author(client, mock_budget_service):
+    mock_budget_service.get_budget_by_id.return_value = None
+
+    response = client.get("/budget/1")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+def test_get_by_id_not_found(client, mock_budget_service):
+    mock_budget_service.get_budget_by_id.side_effect = NotFoundError("Budget 1 not found")
+
+    response = client.get("/budget/1")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_get_by_id_repository_error(client, mock_budget_service):
+    mock_budget_service.get_budget_by_id.side_effect = RepositoryError("Database error")
+
+    response = client.get("/budget/1")
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+def test_get_details_returns_typed_budgets(client, mock_budget_service):
+    #arrange
+    mock_budget_service.get_all_budgets_detailed.return_value = [SIMPLE, ENVELOPE]
+
+    #act
+    response = client.get("/budget/details")
+
+    #assert
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["total_amount"] == 1500.0
+    assert data[1]["categories"] == [{"category_id": 1, "amount": 500.0}]
@@ -0,0 +1,73 @@
+import pytest
+
+from uuid import UUID
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock
+
+from ...domain.schemas import ImportReport, FileFormat
+from ...domain.schemas.user import User
+from ...domain.configs import ADMIN_USER_ID
+from ...domain.exceptions import RepositoryError
+from ...application.services import ImportService
+from ...infrastructure.auth.auth import get_current_user
+from ...main import app
+
+ADMIN = User(email="admin@example.com", user_id=ADMIN_USER_ID, roles={"budget-admin"})
+TEST_USER = User(email="test@example.com", user_id=UUID("123e4567-e89b-12d3-a456-426614174000"))
+
+@pytest.fixture
+def mock_import_service():
+    service = AsyncMock()
+    received = []
+
+    async def import_budgets(lines, format, user_id=None):
+        received.extend([line async for line in lines])
+        return ImportReport(imported=len(received))
+    service.import_budgets.side_effect = import_budgets
+    service.received = received
+    return service
+
+@pytest.fixture
+def client(mock_import_service):
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+    app.dependency_overrides[ImportService] = lambda: mock_import_service
+    yield TestClient(app, raise_server_exceptions=False)
+    app.dependency_overrides = {}
+
+def test_import_streams_body_to_service(client, mock_import_service):
+    #act
+    response = client.post(
+        "/budget/import",
+        params={"format": "csv", "user_id": str(TEST_USER.user_id)},
+        content=b"name,type\na,simple\n",
+        headers={"content-type": "text/csv"}
+    )
+
+    #assert
+    assert response.status_code == 200
+    assert response.json() == {"imported": 2, "rejected": 0, "errors": []}
+    assert mock_import_service.received == ["name,type", "a,simple"]
+    _, format = mock_import_service.import_budgets.call_args.args
+    assert format == FileFormat.CSV
+    assert mock_import_service.import_budgets.call_args.kwargs["user_id"] == TEST_USER.user_id
+
+def test_import_is_admin_only(client, mock_import_service):
+    #arrange
+    app.dependency_overrides[get_current_user] = lambda: TEST_USER
+
+    #act
+    response = client.post("/budget/import", content=b"{}")
+
+    #assert
+    assert response.status_code == 403
+    mock_import_service.import_budgets.assert_not_called()
+
+def test_import_repository_error(client, mock_import_service):
+    #arrange
+    mock_import_service.import_budgets.side_effect = RepositoryError("Database operation failed")
+
+    #act
+    response = client.post("/budget/import", content=b"{}")
+
+    #assert
+    assert response.status_code == 500
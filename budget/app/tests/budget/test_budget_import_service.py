@@ -0,0 +1,186 @@
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from ...application.services import ImportService
+from ...application.services.import_service import iter_lines, parse_records, validate_batch
+from ...domain.configs.config import get_settings
+from ...domain.schemas import FileFormat, CategoryBudget, SimpleBudget
+from ...infrastructure.cache import BUDGETS
+
+USER_ID = uuid.uuid4()
+SIMPLE = '{"type": "simple", "name": "rent", "currency": "USD", "start_date": "2025-01-01", "end_date": "2025-01-31", "total_amount": 100, "user_id": "%s"}' % USER_ID
+ENVELOPE = '{"type": "envelope", "name": "food", "currency": "USD", "start_date": "2025-01-01", "end_date": "2025-01-31", "categories": [{"category_id": 7, "amount": 10}], "user_id": "%s"}' % USER_ID
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+async def lines(*values: str):
+    for value in values:
+        yield value
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+@pytest.fixture
+def mock_importer():
+    importer = MagicMock()
+    importer.existing_category_ids = AsyncMock(return_value={7})
+    importer.import_batch = AsyncMock(side_effect=lambda budgets: len(budgets))
+    return importer
+
+@pytest.fixture
+def import_service(mock_db, mock_logger, mock_importer, versions):
+    service = ImportService(mock_db, get_settings().model_copy(update={'import_batch_size': 2}), mock_logger, versions)
+    service.importer = mock_importer
+    return service
+
+@pytest.mark.asyncio
+async def test_iter_lines_joins_lines_split_across_chunks():
+    result = await collect(iter_lines(chunks(b'\xef\xbb\xbfa\nb', b'c\n\xc3', b'\xa9')))
+
+    assert result == ['a', 'bc', 'é']
+
+@pytest.mark.asyncio
+async def test_parse_ndjson_reports_malformed_lines():
+    # act
+    result = await collect(parse_records(lines(SIMPLE, '', '{oops', '[1]'), FileFormat.NDJSON))
+
+    # assert
+    assert [(line, record is not None) for line, record, _ in result] == [(1, True), (3, False), (4, False)]
+    assert result[1][2][0]['type'] == 'parse_error'
+
+@pytest.mark.asyncio
+async def test_parse_csv_uses_export_layout():
+    # act
+    result = await collect(parse_records(lines(
+        'id,name,type,currency,start_date,end_date,total_amount,categories',
+        '1,food,envelope,USD,2025-01-01,2025-01-31,,"[{""category_id"": 7, ""amount"": 10}]"',
+    ), FileFormat.CSV))
+
+    # assert
+    [(line, record, errors)] = result
+    assert line == 2 and errors is None
+    assert 'id' not in record and 'total_amount' not in record
+    assert record['categories'] == [{'category_id': 7, 'amount': 10}]
+
+@pytest.mark.asyncio
+async def test_parse_csv_keeps_newlines_in_quoted_fields():
+    # act
+    result = await collect(parse_records(iter_lines(chunks(
+        b'name,type,currency,start_date,end_date,total_amount\r\n'
+        b'"Rent\r\nand ""utilities""",simple,USD,2025-01-01,2025-01-31,100\r\n'
+        b'\r\n'
+        b'food,simple,USD,2025-01-01,2025-01-31,50\r\n'
+        b'"open,simple\r\n'
+    )), FileFormat.CSV))
+
+    # assert
+    (first, record, _), (second, other, _), (third, _, errors) = result
+    assert (first, second, third) == (2, 5, 6)
+    assert record['name'] == 'Rent\r\nand "utilities"'
+    assert record['total_amount'] == '100'
+    assert other['name'] == 'food'
+    assert errors[0]['type'] == 'parse_error'
+
+@pytest.mark.asyncio
+async def test_parse_csv_reports_rows_with_wrong_field_count():
+    # act
+    result = await collect(parse_records(lines('name,type,currency', 'rent,simple'), FileFormat.CSV))
+
+    # assert
+    [(line, record, errors)] = result
+    assert line == 2 and record is None
+    assert errors[0]['msg'] == 'Expected 3 fields, got 2'
+
+def test_validate_batch_keeps_valid_records():
+    # arrange
+    valid = {'type': 'simple', 'name': 'a', 'currency': 'USD', 'start_date': '2025-01-01', 'end_date': '2025-01-31', 'total_amount': 1}
+
+    # act
+    positions, budgets, errors = validate_batch([valid, {**valid, 'total_amount': -1}, valid])
+
+    # assert
+    assert positions == [0, 2]
+    assert all(isinstance(budget, SimpleBudget) for budget in budgets)
+    assert list(errors) == [1]
+    assert errors[1][0]['loc'] == ['simple', 'total_amount']
+
+@pytest.mark.asyncio
+async def test_import_commits_in_batches(import_service, mock_importer):
+    # act
+    report = await import_service.import_budgets(lines(SIMPLE, SIMPLE, ENVELOPE), FileFormat.NDJSON)
+
+    # assert
+    assert report.imported == 3 and report.rejected == 0
+    assert [len(call.args[0]) for call in mock_importer.import_batch.await_args_list] == [2, 1]
+    assert isinstance(mock_importer.import_batch.await_args_list[1].args[0][0], CategoryBudget)
+
+@pytest.mark.asyncio
+async def test_import_rejects_unknown_categories_and_missing_owner(import_service, mock_importer):
+    # arrange
+    mock_importer.existing_category_ids.return_value = set()
+    rejections = []
+
+    async def on_reject(rejection):
+        rejections.append(rejection)
+
+    # act
+    report = await import_service.import_budgets(
+        lines(ENVELOPE, SIMPLE.replace(f'"user_id": "{USER_ID}"', '"user_id": null'), '{oops'),
+        FileFormat.NDJSON,
+        on_reject
+    )
+
+    # assert
+    assert report.imported == 0 and report.rejected == 3
+    assert [rejection.line for rejection in rejections] == [1, 2, 3]
+    assert rejections[0].errors[0]['type'] == 'not_found'
+    assert rejections[1].errors[0]['loc'] == ['user_id']
+    assert rejections[2].errors[0]['type'] == 'parse_error'
+    assert report.errors == rejections
+
+@pytest.mark.asyncio
+async def test_import_user_id_overrides_records(import_service, mock_importer):
+    # arrange
+    owner = uuid.uuid4()
+
+    # act
+    await import_service.import_budgets(lines(SIMPLE), FileFormat.NDJSON, user_id=owner)
+
+    # assert
+    [budget] = mock_importer.import_batch.await_args.args[0]
+    assert budget.user_id == owner
+
+@pytest.mark.asyncio
+async def test_import_changes_collection_version(import_service):
+    # arrange
+    before = await import_service.versions.get(USER_ID, BUDGETS)
+
+    # act
+    await import_service.import_budgets(lines(SIMPLE), FileFormat.NDJSON)
+
+    # assert
+    assert await import_service.versions.get(USER_ID, BUDGETS) != before
+
+@pytest.mark.asyncio
+async def test_import_rejects_categories_of_another_user(import_service, mock_importer):
+    # arrange
+    other_user_id = uuid.uuid4()
+    # Category 7 belongs to USER_ID only
+    mock_importer.existing_category_ids.side_effect = lambda owner_id, ids: ids if owner_id == USER_ID else set()
+    rejections = []
+
+    async def on_reject(rejection):
+        rejections.append(rejection)
+
+    # act
+    report = await import_service.import_budgets(
+        lines(ENVELOPE, ENVELOPE.replace(str(USER_ID), str(other_user_id))), FileFormat.NDJSON, on_reject
+    )
+
+    # assert
+    assert report.imported == 1 and report.rejected == 1
+    assert [rejection.line for rejection in rejections] == [2]
+    assert rejections[0].errors[0]['loc'] == ['categories', 0, 'category_id']
@@ -0,0 +1,152 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
+
+from ...infrastructure.database.loader import (
+    BudgetLoader,
+    BUDGET_BY_ID,
+    select_budgets
+)
+from ...infrastructure.database.models import Budget
+from ...infrastructure.database.models.budget import BudgetType
+from ...domain.schemas import SimpleBudget, PercentageBudget, CategoryBudget
+
+USER_ID = uuid.uuid4()
+
+def budget_row(id: int, type: BudgetType, **columns):
+    values = dict(
+        id=id,
+        user_id=USER_ID,
+        name='default',
+        type=type,
+        currency='USD',
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 1, 31),
+        total_amount=None,
+        needs_percent=None,
+        wants_percent=None,
+        savings_percent=None,
+        category_id=None,
+        allocated_amount=None
+    )
+    values.update(columns)
+    return SimpleNamespace(**values)
+
+def result_of(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
+def test_single_budget_statement_joins_every_subtype():
+    sql = str(BUDGET_BY_ID.compile(dialect=postgresql.dialect()))
+
+    assert sql.count('SELECT') == 1
+    assert 'LEFT OUTER JOIN simple_budgets' in sql
+    assert 'LEFT OUTER JOIN percentage_budgets' in sql
+    assert 'LEFT OUTER JOIN envelop_budgets' in sql
+
+@pytest.mark.asyncio
+async def test_load_simple_budget_in_one_query(mock_db):
+    # arrange
+    mock_db.execute.return_value = result_of([budget_row(1, BudgetType.SIMPLE, total_amount=Decimal('1500.00'))])
+
+    # act
+    result = await BudgetLoader(mock_db).load(1)
+
+    # assert
+    assert isinstance(result, SimpleBudget)
+    assert result.total_amount == 1500
+    assert result.user_id == USER_ID
+    mock_db.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_load_envelope_budget_collects_all_rows(mock_db):
+    # arrange
+    mock_db.execute.return_value = result_of([
+        budget_row(3, BudgetType.ENVELOPE, category_id=1, allocated_amount=Decimal('500')),
+        budget_row(3, BudgetType.ENVELOPE, category_id=2, allocated_amount=Decimal('300')),
+    ])
+
+    # act
+    result = await BudgetLoader(mock_db).load(3)
+
+    # assert
+    assert isinstance(result, CategoryBudget)
+    assert [c.category_id for c in result.categories] == [1, 2]
+    mock_db.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_load_missing_budget_returns_none(mock_db):
+    mock_db.execute.return_value = result_of([])
+
+    assert await BudgetLoader(mock_db).load(42) is None
+
+@pytest.mark.asyncio
+async def test_load_many_mixed_types_uses_two_queries(mock_db):
+    # arrange
+    budgets = [
+        budget_row(1, BudgetType.SIMPLE, total_amount=Decimal('100')),
+        budget_row(2, BudgetType.PERCENTAGE, needs_percent=50, wants_percent=30, savings_percent=20),
+        budget_row(3, BudgetType.ENVELOPE),
+        budget_row(4, BudgetType.ENVELOPE),
+    ]
+    envelopes = [
+        SimpleNamespace(budget_id=3, category_id=1, allocated_amount=Decimal('10')),
+        SimpleNamespace(budget_id=4, category_id=2, allocated_amount=Decimal('20')),
+        SimpleNamespace(budget_id=4, category_id=3, allocated_amount=Decimal('30')),
+    ]
+    mock_db.execute.side_effect = [result_of(budgets), result_of(envelopes)]
+
+    # act
+    result = await BudgetLoader(mock_db).load_many(select_budgets().where(Budget.user_id == USER_ID))
+
+    # assert
+    assert [type(b) for b in result] == [SimpleBudget, PercentageBudget, CategoryBudget, CategoryBudget]
+    assert len(result[3].categories) == 2
+    assert mock_db.execute.await_count == 2
+
+@pytest.mark.asyncio
+async def test_load_many_without_envelopes_uses_one_query(mock_db):
+    mock_db.execute.return_value = result_of([budget_row(1, BudgetType.SIMPLE, total_amount=Decimal('100'))])
+
+    result = await BudgetLoader(mock_db).load_many(select_budgets())
+
+    assert len(result) == 1
+    mock_db.execute.assert_awaited_once()
+
+class StreamResult:
+    """Stand-in for AsyncResult: yields the given partitions, records close()"""
+    def __init__(self, partitions):
+        self._partitions = partitions
+        self.closed = False
+
+    async def partitions(self):
+        for partition in self._partitions:
+            yield partition
+
+    async def close(self):
+        self.closed = True
+
+@pytest.mark.asyncio
+async def test_stream_groups_envelopes_split_across_partitions(mock_db):
+    # arrange
+    result = StreamResult([
+        [budget_row(1, BudgetType.SIMPLE, total_amount=Decimal('1500.00')),
+         budget_row(2, BudgetType.ENVELOPE, category_id=1, allocated_amount=Decimal('10.00'))],
+        [budget_row(2, BudgetType.ENVELOPE, category_id=2, allocated_amount=Decimal('20.00')),
+         budget_row(3, BudgetType.PERCENTAGE, needs_percent=50, wants_percent=30, savings_percent=20)],
+    ])
+    mock_db.stream.return_value = result
+
+    # act
+    budgets = [budget async for budget in BudgetLoader(mock_db).stream(select_budgets(), batch_size=2)]
+
+    # assert
+    assert [budget.id for budget in budgets] == [1, 2, 3]
+    assert [c.category_id for c in budgets[1].categories] == [1, 2]
+    assert result.closed
+    assert mock_db.stream.call_args.kwargs['execution_options'] == {'yield_per': 2}
@@ -1,22 +1,50 @@
 import pytest
 import uuid
-from unittest.mock import patch, MagicMock
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql
 
 from ...infrastructure.database.repositories import BudgetRepository
 from ...infrastructure.database.models.budget import BudgetType, SimpleBudget, Budget
 from ...domain.schemas import SimpleBudget, PercentageBudget, CategoryBudget
 from ...domain.exceptions import RepositoryError
+from ...domain.configs import ADMIN_USER_ID
+from ...domain.schemas import BudgetFilterParams
+from ...domain.schemas.pagination import encode_cursor
+from ...domain.specifications import AuthorSpec, CurrencySpec
+from ...infrastructure.database.resolvers.spec_resolver import BudgetSpecificationResolver
 
 @pytest.fixture
 def mock_spec_resolver():
     resolver = MagicMock()
     resolver.resolve.return_value = True
+    resolver.resolve_template.return_value = True
+    resolver.parameters.side_effect = lambda spec: {}
     return resolver
 
+def returned_row(schema, id: int = 10, **columns):
+    return SimpleNamespace(
+        id=id,
+        user_id=schema.user_id,
+        name=schema.name,
+        type=schema.type,
+        currency=schema.currency,
+        start_date=schema.start_date,
+        end_date=schema.end_date,
+        **columns
+    )
+
+def result_of(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
 @pytest.mark.asyncio
 async def test_create_simple_budget(mock_db):
-    """Test create with simple budget data should add base budget and simple budget"""
+    """Test create with simple budget data should insert base and simple budget in one statement"""
     # arrange
     budget_schema = SimpleBudget(
         user_id=uuid.uuid4(),
@@ -27,33 +55,24 @@ async def test_create_simple_budget(mock_db):
         end_date="2025-12-31",
         total_amount=1000
     )
+    mock_db.execute.return_value = result_of([returned_row(budget_schema, total_amount=Decimal('1000.00'))])
     budget_repo = BudgetRepository(mock_db)
-    mock_budget = MagicMock()
-    mock_simple_budget = MagicMock()
-    with patch('app.infrastructure.database.repositories.budget_repo.Budget') as MockBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.SimpleBudget') as MockSimpleBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.BudgetBase.model_validate') as MockBudgetBase:
-        MockBudget.return_value = mock_budget
-        MockSimpleBudget.return_value = mock_simple_budget
-        MockBudgetBase.return_value = {**budget_schema.model_dump(), id: 10 }
-        async def flush_side_efect():
-            mock_budget.id = 10
-
-        mock_db.flush.side_effect = flush_side_efect 
-
-        #act
-        result = await budget_repo.create(budget_schema)
-
-        # assert
-        mock_db.add.assert_any_call(mock_budget)
-        mock_db.add.assert_any_call(mock_simple_budget)
-        mock_db.flush.assert_awaited_once()
-        mock_db.commit.assert_awaited_once()
-        mock_db.refresh.assert_awaited_once_with(mock_budget)
+
+    #act
+    result = await budget_repo.create(budget_schema)
+
+    # assert
+    assert isinstance(result, SimpleBudget)
+    assert result.id == 10
+    assert result.total_amount == 1000
+    mock_db.execute.assert_awaited_once()
+    mock_db.commit.assert_awaited_once()
+    mock_db.flush.assert_not_awaited()
+    mock_db.refresh.assert_not_awaited()
 
 @pytest.mark.asyncio
 async def test_create_percentage_budget(mock_db):
-    """Test create with percentage budget data should add base budget and simple budget"""
+    """Test create with percentage budget data should insert base and percentage budget in one statement"""
     # arrange
     budget_schema = PercentageBudget(
         user_id=uuid.uuid4(),
@@ -66,33 +85,23 @@ async def test_create_percentage_budget(mock_db):
         savings_percent=30,
         wants_percent=10
     )
+    mock_db.execute.return_value = result_of([
+        returned_row(budget_schema, needs_percent=Decimal('60'), wants_percent=Decimal('10'), savings_percent=Decimal('30'))
+    ])
     budget_repo = BudgetRepository(mock_db)
-    mock_budget = MagicMock()
-    mock_percentage_budget = MagicMock()
-    with patch('app.infrastructure.database.repositories.budget_repo.Budget') as MockBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.PercentageBudget') as MockSimpleBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.BudgetBase.model_validate') as MockBudgetBase:
-        MockBudget.return_value = mock_budget
-        MockSimpleBudget.return_value = mock_percentage_budget
-        MockBudgetBase.return_value = {**budget_schema.model_dump(), id: 10 }
-        async def flush_side_efect():
-            mock_budget.id = 10
-
-        mock_db.flush.side_effect = flush_side_efect 
-
-        #act
-        result = await budget_repo.create(budget_schema)
-
-        # assert
-        mock_db.add.assert_any_call(mock_budget)
-        mock_db.add.assert_any_call(mock_percentage_budget)
-        mock_db.flush.assert_awaited_once()
-        mock_db.commit.assert_awaited_once()
-        mock_db.refresh.assert_awaited_once_with(mock_budget)
+
+    #act
+    result = await budget_repo.create(budget_schema)
+
+    # assert
+    assert isinstance(result, PercentageBudget)
+    assert (result.needs_percent, result.wants_percent, result.savings_percent) == (60, 10, 30)
+    mock_db.execute.assert_awaited_once()
+    mock_db.commit.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_create_category_budget(mock_db):
-    """Test create with category budget data should add base budget and simple budget"""
+    """Test create with category budget data should insert base and envelope rows in one statement"""
     # arrange
     budget_schema = CategoryBudget(
         user_id=uuid.uuid4(),
@@ -106,29 +115,25 @@ async def test_create_category_budget(mock_db):
             {"category_id": 2, "amount": 300}
         ],
     )
+    mock_db.execute.return_value = result_of([
+        returned_row(budget_schema, category_id=1, allocated_amount=Decimal('500')),
+        returned_row(budget_schema, category_id=2, allocated_amount=Decimal('300')),
+    ])
     budget_repo = BudgetRepository(mock_db)
-    mock_budget = MagicMock()
-    mock_category_budget = MagicMock()
-    with patch('app.infrastructure.database.repositories.budget_repo.Budget') as MockBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.EnvelopBudget') as MockSimpleBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.BudgetBase.model_validate') as MockBudgetBase:
-        MockBudget.return_value = mock_budget
-        MockSimpleBudget.return_value = mock_category_budget
-        MockBudgetBase.return_value = {**budget_schema.model_dump(), id: 10 }
-        async def flush_side_efect():
-            mock_budget.id = 10
-
-        mock_db.flush.side_effect = flush_side_efect 
-
-        #act
-        result = await budget_repo.create(budget_schema)
-
-        # assert
-        mock_db.add.assert_any_call(mock_budget)
-        mock_db.add_all.assert_called()
-        mock_db.flush.assert_awaited_once()
-        mock_db.commit.assert_awaited_once()
-        mock_db.refresh.assert_awaited_once_with(mock_budget)
+
+    #act
+    result = await budget_repo.create(budget_schema)
+
+    # assert
+    assert isinstance(result, CategoryBudget)
+    assert [(c.category_id, c.amount) for c in result.categories] == [(1, 500), (2, 300)]
+    mock_db.execute.assert_awaited_once()
+    statement, params = mock_db.execute.call_args.args
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.count('INSERT INTO') == 2
+    assert 'RETURNING' in sql
+    assert (params['category_ids'], params['amounts']) == ([1, 2], [500, 300])
+    mock_db.commit.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_create_db_cannot_save_should_throws_repository_exception(mock_db):
@@ -147,26 +152,15 @@ async def test_create_db_cannot_save_should_throws_repository_exception(mock_db)
         ],
     )
     mock_db.commit.side_effect = SQLAlchemyError('Db error')
+    mock_db.execute.return_value = result_of([])
     budget_repo = BudgetRepository(mock_db)
-    mock_budget = MagicMock()
-    mock_category_budget = MagicMock()
-    with patch('app.infrastructure.database.repositories.budget_repo.Budget') as MockBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.EnvelopBudget') as MockSimpleBudget, \
-        patch('app.infrastructure.database.repositories.budget_repo.BudgetBase.model_validate') as MockBudgetBase:
-        MockBudget.return_value = mock_budget
-        MockSimpleBudget.return_value = mock_category_budget
-        MockBudgetBase.return_value = {**budget_schema.model_dump(), id: 10 }
-        async def flush_side_efect():
-            mock_budget.id = 10
-
-        mock_db.flush.side_effect = flush_side_efect
-
-        #act
-        with pytest.raises(RepositoryError):
-            await budget_repo.create(budget_schema)
-
-        # assert
-        mock_db.rollback.assert_awaited_once()
+
+    #act
+    with pytest.raises(RepositoryError):
+        await budget_repo.create(budget_schema)
+
+    # assert
+    mock_db.rollback.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_find_success_flow(mock_db, mock_spec_resolver):
@@ -210,4 +204,182 @@ async def test_find_exception_flow(mock_db, mock_spec_resolver):
 
     #act, assert
     with pytest.raises(RepositoryError):
-        result = await repo.find(MagicMock())
\ No newline at end of file
+        result = await repo.find(MagicMock())
+
+@pytest.mark.asyncio
+async def test_get_by_id_exception_flow(mock_db):
+    #arrange
+    mock_db.execute.side_effect = SQLAlchemyError('Db error')
+    repo = BudgetRepository(mock_db)
+
+    #act, assert
+    with pytest.raises(RepositoryError):
+        await repo.get_by_id(1)
+
+def make_budgets(count: int) -> list:
+    return [Budget(
+        id=i,
+        user_id=uuid.uuid4(),
+        name="Test Budget",
+        type=BudgetType.SIMPLE,
+        currency="USD",
+        start_date=date(2025, 1, i),
+        end_date=date(2025, 12, 31),
+    ) for i in range(1, count + 1)]
+
+@pytest.mark.asyncio
+async def test_find_page_returns_cursor_when_more_rows(mock_db):
+    #arrange
+    db_res_mock = MagicMock()
+    db_res_mock.fetchall.return_value = make_budgets(3)
+    mock_db.scalars.return_value = db_res_mock
+    repo = BudgetRepository(mock_db, BudgetSpecificationResolver())
+
+    #act
+    page = await repo.find_page(AuthorSpec(uuid.uuid4()), BudgetFilterParams(limit=2))
+
+    #assert
+    assert [b.id for b in page.items] == [1, 2]
+    assert BudgetFilterParams(cursor=page.next_cursor).after == (date(2025, 1, 2), 2)
+    params = mock_db.scalars.call_args.args[1]
+    assert params['limit'] == 3
+
+@pytest.mark.asyncio
+async def test_find_page_last_page_has_no_cursor(mock_db):
+    #arrange
+    db_res_mock = MagicMock()
+    db_res_mock.fetchall.return_value = make_budgets(2)
+    mock_db.scalars.return_value = db_res_mock
+    repo = BudgetRepository(mock_db, BudgetSpecificationResolver())
+
+    #act
+    page = await repo.find_page(AuthorSpec(uuid.uuid4()), BudgetFilterParams(limit=2))
+
+    #assert
+    assert len(page.items) == 2
+    assert page.next_cursor is None
+
+@pytest.mark.asyncio
+async def test_find_page_uses_keyset_instead_of_offset(mock_db):
+    #arrange
+    db_res_mock = MagicMock()
+    db_res_mock.fetchall.return_value = []
+    mock_db.scalars.return_value = db_res_mock
+    repo = BudgetRepository(mock_db, BudgetSpecificationResolver())
+    filters = BudgetFilterParams(cursor=encode_cursor(date(2025, 1, 2), 2), currency='USD')
+
+    #act
+    await repo.find_page(AuthorSpec(uuid.uuid4()), filters)
+
+    #assert
+    sql = str(mock_db.scalars.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert '(budgets.start_date, budgets.id) >' in sql
+    assert 'ORDER BY budgets.start_date, budgets.id' in sql
+    assert 'OFFSET' not in sql
+    params = mock_db.scalars.call_args.args[1]
+    assert (params['after_start_date'], params['after_id']) == (date(2025, 1, 2), 2)
+
+@pytest.mark.asyncio
+async def test_find_page_reuses_statement_for_same_filter_shape(mock_db):
+    #arrange
+    db_res_mock = MagicMock()
+    db_res_mock.fetchall.return_value = []
+    mock_db.scalars.return_value = db_res_mock
+    repo = BudgetRepository(mock_db, BudgetSpecificationResolver())
+    first_user, second_user = uuid.uuid4(), uuid.uuid4()
+
+    #act
+    await repo.find_page(AuthorSpec(first_user) & CurrencySpec('USD'), BudgetFilterParams(currency='USD'))
+    await repo.find_page(AuthorSpec(second_user) & CurrencySpec('HUF'), BudgetFilterParams(currency='HUF'))
+    await repo.find_page(AuthorSpec(second_user), BudgetFilterParams())
+
+    #assert
+    (first, first_params), (second, second_params), (third, _) = (c.args for c in mock_db.scalars.call_args_list)
+    assert first is second
+    assert third is not first
+    assert first_params == {'spec_0': first_user, 'spec_1': 'USD', 'limit': 21}
+    assert second_params == {'spec_0': second_user, 'spec_1': 'HUF', 'limit': 21}
+
+@pytest.mark.asyncio
+async def test_create_many_uses_one_statement_per_table(mock_db):
+    #arrange
+    user_id = uuid.uuid4()
+    common = dict(user_id=user_id, name="Test Budget", currency="USD", start_date="2025-01-01", end_date="2025-12-31")
+    schemas = [
+        SimpleBudget(type=BudgetType.SIMPLE, total_amount=10, **common),
+        SimpleBudget(type=BudgetType.SIMPLE, total_amount=20, **common),
+        PercentageBudget(type=BudgetType.PERCENTAGE, **common),
+        CategoryBudget(type=BudgetType.ENVELOPE, categories=[{"category_id": 1, "amount": 5}, {"category_id": 2, "amount": 6}], **common),
+    ]
+    ids_result = MagicMock()
+    ids_result.scalars.return_value.all.return_value = [11, 12, 13, 14]
+    mock_db.execute.return_value = ids_result
+    repo = BudgetRepository(mock_db)
+
+    #act
+    result = await repo.create_many(schemas)
+
+    #assert
+    assert [b.id for b in result] == [11, 12, 13, 14]
+    assert mock_db.execute.await_count == 4
+    parent_rows = mock_db.execute.await_args_list[0].args[1]
+    assert len(parent_rows) == 4
+    # One parameter set of column arrays, not executemany
+    simple, percentage, envelopes = (c.args for c in mock_db.execute.await_args_list[1:])
+    assert simple[1] == {'id': [11, 12], 'total_amount': [10, 20]}
+    assert percentage[1]['id'] == [13]
+    assert envelopes[1] == {'budget_id': [14, 14], 'category_id': [1, 2], 'allocated_amount': [5, 6]}
+    assert 'unnest' in str(envelopes[0].compile(dialect=postgresql.dialect()))
+    mock_db.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_create_many_rolls_back_on_error(mock_db):
+    #arrange
+    schema = SimpleBudget(user_id=uuid.uuid4(), name="Test Budget", type=BudgetType.SIMPLE, currency="USD",
+                          start_date="2025-01-01", end_date="2025-12-31", total_amount=10)
+    mock_db.execute.side_effect = SQLAlchemyError('Db error')
+    repo = BudgetRepository(mock_db)
+
+    #act, assert
+    with pytest.raises(RepositoryError):
+        await repo.create_many([schema])
+    mock_db.rollback.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_find_and_create_reuse_cached_statements(mock_db):
+    #arrange
+    db_res_mock = MagicMock()
+    db_res_mock.fetchall.return_value = []
+    mock_db.scalars.return_value = db_res_mock
+    repo = BudgetRepository(mock_db, BudgetSpecificationResolver())
+    common = dict(name="Test Budget", type=BudgetType.SIMPLE, currency="USD", start_date="2025-01-01", end_date="2025-12-31")
+    schemas = [SimpleBudget(user_id=uuid.uuid4(), total_amount=amount, **common) for amount in (10, 20)]
+    mock_db.execute.side_effect = [result_of([returned_row(schema, total_amount=schema.total_amount)]) for schema in schemas]
+
+    #act
+    await repo.find(AuthorSpec(uuid.uuid4()))
+    await repo.find(AuthorSpec(uuid.uuid4()))
+    for schema in schemas:
+        await repo.create(schema)
+
+    #assert
+    first_find, second_find = (c.args[0] for c in mock_db.scalars.call_args_list)
+    first_insert, second_insert = (c.args[0] for c in mock_db.execute.call_args_list)
+    assert first_find is second_find
+    assert first_insert is second_insert
+
+@pytest.mark.asyncio
+async def test_existing_category_ids_only_of_owner_and_defaults(mock_db):
+    #arrange
+    mock_db.scalars.return_value = result_of([1])
+    repo = BudgetRepository(mock_db, MagicMock())
+    owner_id = uuid.uuid4()
+
+    #act
+    known = await repo.existing_category_ids(owner_id, [1, 2])
+
+    #assert
+    assert known == {1}
+    statement = mock_db.scalars.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert 'categories.user_id IN' in str(statement)
+    assert list(statement.params['user_id_1']) == [owner_id, ADMIN_USER_ID]
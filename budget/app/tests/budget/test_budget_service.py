@@ -1,10 +1,16 @@
+import asyncio
+import json
 import pytest
 import uuid
+from datetime import date
 from unittest.mock import AsyncMock
 
 from ...application.services import BudgetService
-from ...domain.schemas import BudgetBase
+from ...domain.schemas import BudgetBase, Pagination, BudgetFilterParams, SimpleBudget, CategoryBudget
+from ...domain.exceptions import NotFoundError
+from ...domain.specifications import AuthorSpec, BudgetTypeSpec, CurrencySpec, DateRangeSpec
 from ...infrastructure.database.models.budget import BudgetType
+from ...infrastructure.cache import BUDGETS, LRUBackend, ResponseCache
 
 BUDGET = BudgetBase(
         id=1,
@@ -21,11 +27,12 @@ def mock_repository():
     repo = AsyncMock()
     repo.create.return_value = BUDGET
     repo.find.return_value = [BUDGET]
+    repo.find_page.return_value = Pagination[BudgetBase](items=[BUDGET], limit=20)
     return repo
 
 @pytest.fixture
-def budget_service(mock_repository, mock_logger):
-    return BudgetService(mock_repository, mock_logger)
+def budget_service(mock_repository, mock_logger, versions):
+    return BudgetService(mock_repository, mock_logger, versions)
 
 @pytest.mark.asyncio
 async def test_create_budget_success_flow(budget_service, mock_logger):
@@ -47,4 +54,228 @@ async def test_get_all_budgets_success_flow(budget_service, mock_logger):
 
     #assert
     mock_logger.ainfo.assert_awaited_once()
-    assert len(result) == 1
\ No newline at end of file
+    assert len(json.loads(result)) == 1
+@pytest.mark.asyncio
+async def test_get_budget_by_id_not_found(budget_service, mock_repository):
+    # arrange
+    mock_repository.get_by_id.return_value = None
+
+    # act, assert
+    with pytest.raises(NotFoundError):
+        await budget_service.get_budget_by_id(BUDGET.user_id, 1)
+
+@pytest.mark.asyncio
+async def test_get_budget_by_id_other_author(budget_service, mock_repository):
+    # arrange
+    mock_repository.get_by_id.return_value = BUDGET
+
+    # act
+    result = await budget_service.get_budget_by_id(uuid.uuid4(), 1)
+
+    # assert
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_get_budgets_page_success_flow(budget_service, mock_repository, mock_logger):
+    # arrange
+    filters = BudgetFilterParams(limit=20)
+
+    # act
+    result = await budget_service.get_budgets_page(BUDGET.user_id, filters)
+
+    #assert
+    mock_logger.ainfo.assert_awaited_once()
+    spec, passed_filters = mock_repository.find_page.call_args.args
+    assert spec.user_id == BUDGET.user_id
+    assert passed_filters is filters
+    assert json.loads(result)['items'] == [json.loads(BUDGET.model_dump_json())]
+
+@pytest.mark.asyncio
+async def test_get_budgets_page_combines_filters_into_spec(budget_service, mock_repository):
+    # arrange
+    filters = BudgetFilterParams(type=BudgetType.SIMPLE, currency='USD', date_from=date(2025, 1, 1))
+
+    # act
+    await budget_service.get_budgets_page(BUDGET.user_id, filters)
+
+    #assert
+    spec, _ = mock_repository.find_page.call_args.args
+    assert spec == (
+        AuthorSpec(BUDGET.user_id)
+        & BudgetTypeSpec(BudgetType.SIMPLE)
+        & CurrencySpec('USD')
+        & DateRangeSpec(date(2025, 1, 1), None)
+    )
+
+@pytest.mark.asyncio
+async def test_create_budgets_success_flow(budget_service, mock_repository, mock_logger):
+    # arrange
+    mock_repository.create_many.return_value = [BUDGET, BUDGET]
+
+    # act
+    result = await budget_service.create_budgets([BUDGET, BUDGET])
+
+    #assert
+    mock_repository.create_many.assert_awaited_once_with([BUDGET, BUDGET])
+    mock_logger.ainfo.assert_awaited_once()
+    assert len(result) == 2
+
+@pytest.mark.asyncio
+async def test_writes_bump_collection_version(budget_service, mock_repository):
+    # arrange
+    mock_repository.create_many.return_value = [BUDGET]
+    versions = [await budget_service.collection_version(BUDGET.user_id)]
+
+    # act
+    await budget_service.create_budget(BUDGET)
+    versions.append(await budget_service.collection_version(BUDGET.user_id))
+    await budget_service.create_budgets([BUDGET])
+    versions.append(await budget_service.collection_version(BUDGET.user_id))
+
+    # assert
+    assert len(set(versions)) == 3
+
+@pytest.mark.asyncio
+async def test_versions_are_bumped_in_the_transaction_of_the_write(budget_service, mock_repository, versions):
+    # arrange
+    bumped_before_write = []
+    mock_repository.create.side_effect = lambda budget: bumped_before_write.append(versions.versions.get((BUDGET.user_id, BUDGETS))) or BUDGET
+
+    # act
+    await budget_service.create_budget(BUDGET)
+
+    # assert
+    # The repository commits the bump along with the budget
+    assert bumped_before_write == [1]
+
+@pytest.mark.asyncio
+async def test_reads_use_reader_and_writes_use_repository(mock_repository, mock_logger, versions):
+    # arrange
+    reader = AsyncMock()
+    reader.find.return_value = [BUDGET]
+    service = BudgetService(mock_repository, mock_logger, versions, reader)
+
+    # act
+    await service.get_all_budgets(BUDGET.user_id)
+    await service.create_budget(BUDGET)
+
+    #assert
+    reader.find.assert_awaited_once()
+    mock_repository.find.assert_not_awaited()
+    mock_repository.create.assert_awaited_once()
+    reader.create.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_cached_reads_skip_repository_until_create(mock_repository, mock_logger, versions):
+    # arrange
+    service = BudgetService(mock_repository, mock_logger, versions, cache=ResponseCache(LRUBackend()))
+
+    # act
+    await service.get_all_budgets(BUDGET.user_id)
+    cached = await service.get_all_budgets(BUDGET.user_id)
+    await service.create_budget(BUDGET)
+    await service.get_all_budgets(BUDGET.user_id)
+
+    #assert
+    assert json.loads(cached)[0]['id'] == BUDGET.id
+    assert mock_repository.find.await_count == 2
+
+@pytest.mark.asyncio
+async def test_get_budget_by_id_caches_only_the_authors_reads(mock_repository, mock_logger, versions):
+    # arrange
+    service = BudgetService(mock_repository, mock_logger, versions, cache=ResponseCache(LRUBackend()))
+    budget = SimpleBudget(**BUDGET.model_dump(), user_id=BUDGET.user_id, total_amount=100)
+    mock_repository.get_by_id.return_value = budget
+
+    # act
+    stranger = [await service.get_budget_by_id(uuid.uuid4(), budget.id) for _ in range(2)]
+    author = [await service.get_budget_by_id(budget.user_id, budget.id) for _ in range(2)]
+
+    #assert
+    assert stranger == [None, None]
+    # Hits are the bytes of the miss, not a copy rebuilt from them
+    assert author == [budget.model_dump_json().encode()] * 2
+    assert mock_repository.get_by_id.await_count == 3
+
+def slow_reader(release: asyncio.Event) -> AsyncMock:
+    async def find(spec):
+        await release.wait()
+        return [BUDGET]
+    reader = AsyncMock()
+    reader.find.side_effect = find
+    return reader
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('backend', [None, LRUBackend()], ids=['no_backend', 'lru'])
+async def test_concurrent_identical_reads_send_one_query(mock_repository, mock_logger, versions, backend):
+    # arrange
+    cache = ResponseCache(backend)
+    release = asyncio.Event()
+    # One service and session per request, as in the app
+    readers = [slow_reader(release) for _ in range(50)]
+    services = [BudgetService(mock_repository, mock_logger, versions, reader, cache) for reader in readers]
+    tasks = [asyncio.create_task(service.get_all_budgets(BUDGET.user_id)) for service in services]
+    await asyncio.sleep(0)
+
+    # act
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    #assert
+    assert sum(reader.find.await_count for reader in readers) == 1
+    assert all(json.loads(result)[0]['id'] == BUDGET.id for result in results)
+
+@pytest.mark.asyncio
+async def test_read_after_write_does_not_join_earlier_read(mock_repository, mock_logger, versions):
+    # arrange
+    cache = ResponseCache(None)
+    release = asyncio.Event()
+    reader = slow_reader(release)
+    service = BudgetService(mock_repository, mock_logger, versions, reader, cache)
+    before = asyncio.create_task(service.get_all_budgets(BUDGET.user_id))
+    await asyncio.sleep(0)
+
+    # act
+    await service.create_budget(BUDGET)
+    after = asyncio.create_task(service.get_all_budgets(BUDGET.user_id))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+
+    #assert
+    assert reader.find.await_count == 2
+
+@pytest.mark.asyncio
+async def test_category_errors_point_at_unknown_envelope_categories(budget_service, mock_repository):
+    # arrange
+    envelope = CategoryBudget(**BUDGET.model_dump(exclude={'type'}), type=BudgetType.ENVELOPE, user_id=BUDGET.user_id,
+                              categories=[{'category_id': 1, 'amount': 5}, {'category_id': 2, 'amount': 6}])
+    mock_repository.existing_category_ids.return_value = {1}
+
+    # act
+    errors = await budget_service.category_errors([BUDGET, envelope])
+
+    #assert
+    mock_repository.existing_category_ids.assert_awaited_once_with(BUDGET.user_id, {1, 2})
+    assert errors[0] == []
+    assert [error['loc'] for error in errors[1]] == [['categories', 1, 'category_id']]
+
+@pytest.mark.asyncio
+async def test_category_errors_reject_categories_of_another_user(budget_service, mock_repository):
+    # arrange
+    other_user_id = uuid.uuid4()
+    categories = [{'category_id': 1, 'amount': 5}, {'category_id': 2, 'amount': 6}]
+    own = CategoryBudget(**BUDGET.model_dump(exclude={'type'}), type=BudgetType.ENVELOPE, user_id=BUDGET.user_id,
+                         categories=categories)
+    other = own.model_copy(update={'user_id': other_user_id})
+    # Category 2 belongs to the other user
+    owned = {BUDGET.user_id: {1}, other_user_id: {1, 2}}
+    mock_repository.existing_category_ids.side_effect = lambda owner_id, ids: owned[owner_id] & ids
+
+    # act
+    errors = await budget_service.category_errors([own, other])
+
+    #assert
+    assert [error['loc'] for error in errors[0]] == [['categories', 1, 'category_id']]
+    assert errors[1] == []
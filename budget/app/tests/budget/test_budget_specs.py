@@ -0,0 +1,62 @@
+import uuid
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from ...domain.specifications import AuthorSpec, ActiveOnDateSpec, BudgetTypeSpec, CurrencySpec, DateRangeSpec, AndSpec
+from ...infrastructure.database.models.budget import Budget, BudgetType
+from ...infrastructure.database.resolvers.spec_resolver import BudgetSpecificationResolver
+
+def compile(clause, literal_binds: bool = False) -> str:
+    return str(select(Budget.id).where(clause).compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': literal_binds}
+    ))
+
+def test_specs_with_same_structure_share_shape_but_not_identity():
+    #arrange
+    first = AuthorSpec(uuid.uuid4()) & CurrencySpec('USD') & DateRangeSpec(date(2025, 1, 1))
+    second = AuthorSpec(uuid.uuid4()) & CurrencySpec('HUF') & DateRangeSpec(date(2025, 6, 1))
+    other = AuthorSpec(uuid.uuid4()) & CurrencySpec('HUF') & DateRangeSpec(date_to=date(2025, 6, 1))
+
+    #assert
+    assert isinstance(first, AndSpec) and len(first.specs) == 3
+    assert first.shape == second.shape
+    assert hash(first.shape) == hash(second.shape)
+    assert first != second
+    assert other.shape != second.shape
+
+def test_parameters_follow_field_order_and_skip_none():
+    #arrange
+    user_id = uuid.uuid4()
+    spec = AuthorSpec(user_id) & ~BudgetTypeSpec(BudgetType.ENVELOPE) & DateRangeSpec(None, date(2025, 2, 1))
+
+    #act
+    params = BudgetSpecificationResolver.parameters(spec)
+
+    #assert
+    assert params == {'spec_0': user_id, 'spec_1': BudgetType.ENVELOPE, 'spec_2': date(2025, 2, 1)}
+
+def test_template_binds_named_parameters_in_parameter_order():
+    #arrange
+    resolver = BudgetSpecificationResolver()
+    spec = (CurrencySpec('USD') | CurrencySpec('HUF')) & ActiveOnDateSpec(date(2025, 3, 1))
+
+    #act
+    sql = compile(resolver.resolve_template(spec))
+
+    #assert
+    assert 'budgets.currency = %(spec_0)s OR budgets.currency = %(spec_1)s' in sql
+    assert 'budgets.start_date <= %(spec_2)s AND budgets.end_date >= %(spec_2)s' in sql
+
+def test_resolve_inlines_values():
+    #arrange
+    resolver = BudgetSpecificationResolver()
+    spec = ~BudgetTypeSpec(BudgetType.SIMPLE) & DateRangeSpec(date(2025, 1, 1), date(2025, 1, 31))
+
+    #act
+    sql = compile(resolver.resolve(spec), literal_binds=True)
+
+    #assert
+    assert "budgets.type != 'SIMPLE'" in sql
+    assert "budgets.end_date >= '2025-01-01' AND budgets.start_date <= '2025-01-31'" in sql
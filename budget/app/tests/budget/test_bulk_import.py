@@ -0,0 +1,54 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from ...domain.schemas import CategoryBudget, PercentageBudget
+from ...infrastructure.database.bulk_import import (
+    budget_staging,
+    budget_record,
+    envelope_records,
+    merge_statements
+)
+
+USER_ID = uuid.uuid4()
+COMMON = dict(user_id=USER_ID, name='default', currency='USD', start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))
+
+def compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+def test_staging_tables_are_dropped_on_commit():
+    sql = compile(CreateTable(budget_staging))
+
+    assert sql.startswith('\nCREATE TEMPORARY TABLE budget_import')
+    assert 'ON COMMIT DROP' in sql
+
+def test_records_follow_staging_columns():
+    # arrange
+    budget = PercentageBudget(type='percentage', needs_percent=60, wants_percent=20, savings_percent=20, **COMMON)
+
+    # act
+    record = budget_record(42, budget)
+
+    # assert
+    assert len(record) == len(budget_staging.columns)
+    assert record[:4] == (42, USER_ID, 'default', 'PERCENTAGE')
+    assert record[7:] == (None, Decimal('60.0'), Decimal('20.0'), Decimal('20.0'))
+
+def test_envelope_records_reference_the_allocated_id():
+    budget = CategoryBudget(type='envelope', categories=[{'category_id': 1, 'amount': 10.5}], **COMMON)
+
+    assert list(envelope_records(42, budget)) == [(42, 1, Decimal('10.5'))]
+
+def test_merge_is_one_insert_select_per_table():
+    statements = [compile(statement) for statement in merge_statements()]
+
+    assert [sql.split('(')[0].strip() for sql in statements] == [
+        'INSERT INTO budgets',
+        'INSERT INTO simple_budgets',
+        'INSERT INTO percentage_budgets',
+        'INSERT INTO envelop_budgets',
+    ]
+    assert all('SELECT' in sql and 'VALUES' not in sql for sql in statements)
+    assert 'CAST(budget_import.type AS budget_type_enum)' in statements[0]
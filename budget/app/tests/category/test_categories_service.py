@@ -1,16 +1,34 @@
+import asyncio
 from pydantic import ValidationError
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from uuid import UUID
 import uuid
+import json
 
 from ...domain.schemas import User, CategoryCreate, CategoryResponse, CategoryType
 from ...infrastructure.database.models import Category
-from ...application.services import CategoryService
+from ...application.services import CategoryService, DefaultCategories
+from ...application.services.categories_service import SELECT_USER_CATEGORIES
+from ...domain.configs import ADMIN_USER_ID
+from ...infrastructure.cache import LRUBackend, ResponseCache
+
+DEFAULT_CATEGORY = CategoryResponse(id=100, name="Housing", type=CategoryType.EXPENSE, user_id=ADMIN_USER_ID)
+
+@pytest.fixture
+def mock_defaults():
+    defaults = MagicMock()
+    defaults.get = AsyncMock(return_value=DefaultCategories(version='empty', items=(), json=b'[]'))
+    return defaults
 
 @pytest.fixture
-def category_service(mock_db, mock_logger):
-    return CategoryService(mock_db, mock_logger)
+def category_service(mock_db, mock_logger, mock_defaults, versions):
+    return CategoryService(mock_db, mock_logger, mock_defaults, versions)
+
+def mock_user_categories(db, categories):
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = categories
+    db.execute.return_value = mock_result
 
 @pytest.mark.asyncio
 async def test_create_category_invalid_data():
@@ -132,3 +150,105 @@ async def test_get_categories_empty(category_service):
     # Assert
     assert isinstance(result, list)
     assert len(result) == 0
+
+@pytest.mark.asyncio
+async def test_get_categories_merges_cached_defaults(category_service, mock_defaults):
+    """Test get should query only user categories and prepend the cached defaults"""
+    # Arrange
+    user_id = uuid.uuid4()
+    mock_defaults.get.return_value = DefaultCategories(version='v1', items=(DEFAULT_CATEGORY,), json=b'[]')
+    mock_user_categories(category_service.db, [Category(id=1, name="Mine", type=CategoryType.WANTS, user_id=user_id)])
+
+    # Act
+    result = await category_service.get(user_id)
+
+    # Assert
+    assert [c.id for c in result] == [100, 1]
+    query, params = category_service.db.execute.call_args.args
+    assert query is SELECT_USER_CATEGORIES
+    assert params == {'user_id': user_id}
+
+@pytest.mark.asyncio
+async def test_get_json_reuses_serialized_defaults(category_service, mock_defaults):
+    """Test get_json should splice the pre-serialized defaults with user categories"""
+    # Arrange
+    user_id = uuid.uuid4()
+    mock_defaults.get.return_value = DefaultCategories(version='v1', items=(DEFAULT_CATEGORY,), json=b'[{"id":100}]')
+    mock_user_categories(category_service.db, [Category(id=1, name="Mine", type=CategoryType.WANTS, user_id=user_id)])
+
+    # Act
+    result = json.loads(await category_service.get_json(user_id))
+
+    # Assert
+    assert [c["id"] for c in result] == [100, 1]
+
+@pytest.mark.asyncio
+async def test_create_admin_category_invalidates_defaults(category_service, mock_defaults):
+    """Test creating a category as admin should drop the cached default tree"""
+    # Act
+    await category_service.create(CategoryCreate(name="New default", type=CategoryType.EXPENSE), ADMIN_USER_ID)
+
+    # Assert
+    mock_defaults.invalidate.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_create_user_category_keeps_defaults(category_service, mock_defaults):
+    await category_service.create(CategoryCreate(name="Mine", type=CategoryType.EXPENSE), uuid.uuid4())
+
+    mock_defaults.invalidate.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_create_changes_collection_version(category_service):
+    """Test collection version should change after the user creates a category"""
+    # Arrange
+    user_id = uuid.uuid4()
+    before = await category_service.collection_version(user_id)
+
+    # Act
+    await category_service.create(CategoryCreate(name="Mine", type=CategoryType.EXPENSE), user_id)
+
+    # Assert
+    assert await category_service.collection_version(user_id) != before
+
+@pytest.mark.asyncio
+async def test_user_categories_are_cached_until_create(mock_db, mock_logger, mock_defaults, versions):
+    # arrange
+    service = CategoryService(mock_db, mock_logger, mock_defaults, versions, cache=ResponseCache(LRUBackend()))
+    user_id = uuid.uuid4()
+    mock_user_categories(mock_db, [Category(id=1, name='Pets', type=CategoryType.EXPENSE, user_id=user_id)])
+
+    # act
+    await service.get_json(user_id)
+    await service.get_json(user_id)
+    await service.create(CategoryCreate(name='Gym', type=CategoryType.EXPENSE), user_id)
+    await service.get_json(user_id)
+
+    # assert
+    assert mock_db.execute.await_count == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_gets_send_one_query(mock_logger, mock_defaults, versions):
+    # arrange
+    cache = ResponseCache(None)
+    user_id = uuid.uuid4()
+    release = asyncio.Event()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [Category(id=1, name='Pets', type=CategoryType.EXPENSE, user_id=user_id)]
+
+    async def execute(*args, **kwargs):
+        await release.wait()
+        return result
+
+    # One service and session per request, as in the app
+    sessions = [AsyncMock(execute=AsyncMock(side_effect=execute)) for _ in range(50)]
+    services = [CategoryService(db, mock_logger, mock_defaults, versions, cache=cache) for db in sessions]
+    tasks = [asyncio.create_task(service.get_json(user_id)) for service in services]
+    await asyncio.sleep(0)
+
+    # act
+    release.set()
+    responses = await asyncio.gather(*tasks)
+
+    # assert
+    assert sum(db.execute.await_count for db in sessions) == 1
+    assert len(set(responses)) == 1
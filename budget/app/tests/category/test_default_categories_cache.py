@@ -0,0 +1,98 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from ...application.services import DefaultCategoriesCache
+from ...application.services.default_categories import join_json_arrays
+from ...domain.configs import ADMIN_USER_ID
+from ...domain.schemas import CategoryType
+from ...infrastructure.database.models import Category
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def defaults_db(*names):
+    db = MagicMock()
+    async def execute(query):
+        await asyncio.sleep(0)
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = [
+            Category(id=i, name=name, type=CategoryType.EXPENSE, user_id=ADMIN_USER_ID)
+            for i, name in enumerate(names, start=1)
+        ]
+        return result
+    db.execute = MagicMock(side_effect=execute)
+    return db
+
+@pytest.mark.asyncio
+async def test_loads_once_for_concurrent_requests():
+    # arrange
+    cache = DefaultCategoriesCache()
+    db = defaults_db("Housing", "Food")
+
+    # act
+    snapshots = await asyncio.gather(*(cache.get(db) for _ in range(10)))
+
+    # assert
+    assert db.execute.call_count == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert [c["name"] for c in json.loads(snapshots[0].json)] == ["Housing", "Food"]
+
+@pytest.mark.asyncio
+async def test_invalidate_reloads_with_new_version():
+    # arrange
+    cache = DefaultCategoriesCache()
+    first = await cache.get(defaults_db("Housing"))
+
+    # act
+    cache.invalidate()
+    second = await cache.get(defaults_db("Housing", "Food"))
+
+    # assert
+    assert first.version != second.version
+    assert len(second.items) == 2
+
+@pytest.mark.asyncio
+async def test_invalidate_during_load_discards_the_loaded_snapshot():
+    # arrange
+    cache = DefaultCategoriesCache()
+    stale = defaults_db("Housing")
+    loading = asyncio.create_task(cache.get(stale))
+    await asyncio.sleep(0)
+
+    # act
+    # An admin write lands while the pre-write tree is being read
+    cache.invalidate()
+    await loading
+    current = await cache.get(defaults_db("Housing", "Food"))
+
+    # assert
+    assert stale.execute.call_count == 1
+    assert len(current.items) == 2
+    assert cache.snapshot is current
+
+@pytest.mark.asyncio
+async def test_reloads_after_max_age():
+    # arrange
+    clock = FakeClock()
+    cache = DefaultCategoriesCache(max_age=60, clock=clock)
+    db = defaults_db("Housing")
+    await cache.get(db)
+
+    # act
+    clock.now = 30
+    await cache.get(db)
+    clock.now = 61
+    await cache.get(db)
+
+    # assert
+    assert db.execute.call_count == 2
+
+def test_join_json_arrays_skips_empty_arrays():
+    assert json.loads(join_json_arrays(b'[1,2]', b'[]', b'[3]')) == [1, 2, 3]
+    assert join_json_arrays(b'[]', b'[]') == b'[]'
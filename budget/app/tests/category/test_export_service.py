@@ -0,0 +1,68 @@
+import pytest
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+from ...domain.schemas import CategoryResponse, CategoryType
+from ...domain.configs import ADMIN_USER_ID
+from ...infrastructure.database.models import Category
+from ...application.services import ExportService, DefaultCategories
+from ...domain.configs.config import get_settings
+
+DEFAULT_CATEGORY = CategoryResponse(id=100, name="Housing", type=CategoryType.EXPENSE, user_id=ADMIN_USER_ID)
+
+class ScalarStream:
+    def __init__(self, items):
+        self.items = items
+        self.closed = False
+
+    async def __aiter__(self):
+        for item in self.items:
+            yield item
+
+    async def close(self):
+        self.closed = True
+
+@pytest.fixture
+def session_maker(mock_db):
+    @asynccontextmanager
+    async def make_session():
+        yield mock_db
+    return make_session
+
+@pytest.fixture
+def mock_defaults():
+    defaults = MagicMock()
+    defaults.get = AsyncMock(return_value=DefaultCategories(version='v', items=(DEFAULT_CATEGORY,), json=b''))
+    return defaults
+
+@pytest.fixture
+def export_service(session_maker, mock_defaults, mock_logger):
+    return ExportService(session_maker, MagicMock(), mock_defaults, get_settings(), mock_logger)
+
+@pytest.mark.asyncio
+async def test_export_categories_streams_defaults_then_user_categories(export_service, mock_db, mock_logger):
+    """Test export should yield cached defaults first, then stream the user's rows"""
+    # Arrange
+    user_id = uuid.uuid4()
+    stream = ScalarStream([Category(id=1, name="Mine", type=CategoryType.CUSTOM, user_id=user_id)])
+    mock_db.stream_scalars.return_value = stream
+
+    # Act
+    categories = [category async for category in export_service.export_categories(user_id)]
+
+    # Assert
+    assert [category.id for category in categories] == [100, 1]
+    assert stream.closed
+    statement = mock_db.stream_scalars.call_args.args[0]
+    assert statement.get_execution_options()['yield_per'] == get_settings().export_batch_size
+    mock_logger.ainfo.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_export_categories_as_admin_skips_user_query(export_service, mock_db):
+    # Act
+    categories = [category async for category in export_service.export_categories(ADMIN_USER_ID)]
+
+    # Assert
+    assert categories == [DEFAULT_CATEGORY]
+    mock_db.stream_scalars.assert_not_called()
@@ -0,0 +1,65 @@
+from ...domain.schemas.user import User
+from uuid import UUID
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from ...application.services.categories_service import CategoryService
+from ...infrastructure.auth.auth import get_current_user
+from ...infrastructure.database.database import get_db
+from ...main import app
+from fastapi.testclient import TestClient
+
+
+TEST_USER = User(
+    email="test@example.com",
+    user_id=UUID("123e4567-e89b-12d3-a456-426614174000")
+)
+
+@pytest.fixture
+def mock_category_service():
+    service = MagicMock()
+    service.collection_version = AsyncMock(return_value='defaults.0')
+    service.get_json = AsyncMock(return_value=b'[{"id":1,"name":"Housing","type":1,"parent_category_id":null,"favicon":"home","user_id":"00000000-0000-0000-0000-000000000000"}]')
+    return service
+
+@pytest.fixture
+def client(mock_category_service, mock_db):
+    app.dependency_overrides[get_current_user] = lambda: TEST_USER
+    app.dependency_overrides[CategoryService] = lambda: mock_category_service
+    app.dependency_overrides[get_db] = lambda: mock_db
+    yield TestClient(app, raise_server_exceptions=False)
+    app.dependency_overrides = {}
+
+def test_get_categories_returns_serialized_tree(client, mock_category_service):
+    # Act
+    response = client.get("/category")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()[0]["name"] == "Housing"
+    mock_category_service.get_json.assert_awaited_once_with(TEST_USER.user_id)
+
+def test_get_categories_not_modified(client, mock_category_service):
+    # Arrange
+    etag = client.get("/category").headers["ETag"]
+    mock_category_service.get_json.reset_mock()
+
+    # Act
+    response = client.get("/category", headers={"If-None-Match": etag})
+
+    # Assert
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    mock_category_service.get_json.assert_not_awaited()
+
+def test_get_categories_etag_follows_version(client, mock_category_service):
+    # Arrange
+    etag = client.get("/category").headers["ETag"]
+    mock_category_service.collection_version.return_value = 'defaults.1'
+
+    # Act
+    response = client.get("/category", headers={"If-None-Match": etag})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
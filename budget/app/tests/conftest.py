@@ -1,3 +1,4 @@
+import time
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,4 +21,27 @@ def mock_db():
     db.refresh = AsyncMock()
     db.refresh.side_effect = lambda x: setattr(x, "id", 1)
     db.rollback = AsyncMock()
-    return db
\ No newline at end of file
+    return db
+
+class InMemoryVersions:
+    """`CollectionVersions` without the database, writes are counted as they are bumped"""
+    def __init__(self):
+        self.versions: dict[tuple, int] = {}
+        self.written_at: dict = {}
+
+    async def get(self, user_id, collection: str) -> str:
+        return str(self.versions.get((user_id, collection), 0))
+
+    async def seconds_since_write(self, user_id) -> float | None:
+        written_at = self.written_at.get(user_id)
+        return None if written_at is None else time.monotonic() - written_at
+
+    async def bump(self, user_ids, collection: str) -> None:
+        for user_id in set(user_ids):
+            self.versions[(user_id, collection)] = self.versions.get((user_id, collection), 0) + 1
+            self.written_at[user_id] = time.monotonic()
+
+
+@pytest.fixture
+def versions():
+    return InMemoryVersions()
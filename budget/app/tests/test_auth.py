@@ -1,11 +1,14 @@
 from fastapi.security import OAuth2AuthorizationCodeBearer
 import pytest
-from unittest.mock import MagicMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import UUID
 from fastapi import HTTPException
 from jwt.exceptions import InvalidTokenError
-from jwt import PyJWKClient
-from ..infrastructure.auth.auth import get_current_user, get_jwks_client
+from ..infrastructure.auth.auth import get_admin_user, get_current_user, get_jwks_cache
+from ..infrastructure.auth.claims_cache import ClaimsCache
+from ..domain.configs import ADMIN_USER_ID
+from ..domain.schemas.user import User
 
 # Mock data
 TEST_TOKEN = "test.jwt.token"
@@ -19,6 +22,7 @@ def mock_settings():
     settings = MagicMock()
     settings.jwks_url = TEST_JWKS_URL
     settings.auth_audience = TEST_AUDIENCE
+    settings.auth_admin_role = "budget-admin"
     settings.auth_token_url = "http://auth/token"
     settings.auth_url = "http://auth/authorize"
     return settings
@@ -26,16 +30,21 @@ def mock_settings():
 @pytest.fixture
 def mock_jwks_client():
     jwks_client = MagicMock()
-    jwks_client.get_signing_key_from_jwt = MagicMock()
+    jwks_client.get_signing_key_from_jwt = AsyncMock()
     return jwks_client
 
-def test_get_jwks_client(mock_settings):
-    """Test jwks client creation"""
-    jwks_client = get_jwks_client(mock_settings)
-    assert isinstance(jwks_client, PyJWKClient)
+@pytest.fixture
+def claims_cache():
+    return ClaimsCache(max_size=10)
+
+def test_get_jwks_cache_returns_shared_instance(mock_jwks_client):
+    """Test jwks cache is taken from the application state"""
+    request = MagicMock()
+    request.app.state.jwks_cache = mock_jwks_client
+    assert get_jwks_cache(request) is mock_jwks_client
 
 @pytest.mark.asyncio
-async def test_get_current_user_success(mock_settings, mock_logger, mock_jwks_client):
+async def test_get_current_user_success(mock_settings, mock_logger, mock_jwks_client, claims_cache):
     """Test successful user authentication"""
     # Arrange
     mock_signing_key = MagicMock()
@@ -49,29 +58,29 @@ async def test_get_current_user_success(mock_settings, mock_logger, mock_jwks_cl
         }
         
         # Act
-        user = await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client)
+        user = await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client, claims_cache)
         
         # Assert
         assert user.user_id == UUID(TEST_USER_ID)
         assert user.email == TEST_EMAIL
-        mock_jwks_client.get_signing_key_from_jwt.assert_called_once_with(TEST_TOKEN)
+        mock_jwks_client.get_signing_key_from_jwt.assert_awaited_once_with(TEST_TOKEN)
 
 @pytest.mark.asyncio
-async def test_get_current_user_invalid_token(mock_settings, mock_logger, mock_jwks_client):
+async def test_get_current_user_invalid_token(mock_settings, mock_logger, mock_jwks_client, claims_cache):
     """Test authentication with invalid token"""
     # Arrange
     mock_jwks_client.get_signing_key_from_jwt.side_effect = InvalidTokenError("Invalid token")
     
     # Act & Assert
     with pytest.raises(HTTPException) as exc_info:
-        await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client)
+        await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client, claims_cache)
     
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Invalid token"
     mock_logger.aexception.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_get_current_user_missing_claims(mock_settings, mock_logger, mock_jwks_client):
+async def test_get_current_user_missing_claims(mock_settings, mock_logger, mock_jwks_client, claims_cache):
     """Test authentication with missing required claims"""
     # Arrange
     mock_signing_key = MagicMock()
@@ -83,7 +92,79 @@ async def test_get_current_user_missing_claims(mock_settings, mock_logger, mock_
         
         # Act & Assert
         with pytest.raises(HTTPException) as exc_info:
-            await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client)
+            await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client, claims_cache)
         
         assert exc_info.value.status_code == 401
         mock_logger.aexception.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_reuses_verified_claims(mock_settings, mock_logger, mock_jwks_client, claims_cache):
+    """Test repeated calls with the same token skip signature verification"""
+    # Arrange
+    mock_signing_key = MagicMock()
+    mock_signing_key.key = "test_key"
+    mock_jwks_client.get_signing_key_from_jwt.return_value = mock_signing_key
+
+    with patch('jwt.decode') as mock_decode:
+        mock_decode.return_value = {
+            "sub": TEST_USER_ID,
+            "email": TEST_EMAIL,
+            "exp": time.time() + 60
+        }
+
+        # Act
+        first = await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client, claims_cache)
+        second = await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client, claims_cache)
+
+        # Assert
+        assert first == second
+        mock_decode.assert_called_once()
+        mock_jwks_client.get_signing_key_from_jwt.assert_awaited_once()
+        assert claims_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_token_roles(mock_settings, mock_logger, mock_jwks_client, claims_cache):
+    """Test realm roles, client roles and scopes of the token are kept on the cached user"""
+    # Arrange
+    mock_signing_key = MagicMock()
+    mock_signing_key.key = "test_key"
+    mock_jwks_client.get_signing_key_from_jwt.return_value = mock_signing_key
+
+    with patch('jwt.decode') as mock_decode:
+        mock_decode.return_value = {
+            "sub": TEST_USER_ID,
+            "email": TEST_EMAIL,
+            "exp": time.time() + 60,
+            "realm_access": {"roles": ["budget-admin"]},
+            "resource_access": {TEST_AUDIENCE: {"roles": ["reader"]}, "other-api": {"roles": ["writer"]}},
+            "scope": "openid email"
+        }
+
+        # Act
+        await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client, claims_cache)
+        user = await get_current_user(mock_settings, mock_logger, TEST_TOKEN, mock_jwks_client, claims_cache)
+
+        # Assert
+        assert user.roles == {"budget-admin", "reader", "openid", "email"}
+        assert claims_cache.hits == 1
+
+def test_get_admin_user_allows_admin_role(mock_settings):
+    """Test a user holding the admin role passes"""
+    # Arrange
+    user = User(email=TEST_EMAIL, user_id=UUID(TEST_USER_ID), roles={"budget-admin"})
+
+    # Act & Assert
+    assert get_admin_user(mock_settings, user) is user
+
+def test_get_admin_user_forbids_without_admin_role(mock_settings):
+    """Test a user without the admin role is refused, whatever its id"""
+    # Arrange
+    user = User(email=TEST_EMAIL, user_id=ADMIN_USER_ID, roles={"reader"})
+
+    # Act & Assert
+    with pytest.raises(HTTPException) as exc_info:
+        get_admin_user(mock_settings, user)
+
+    assert exc_info.value.status_code == 403
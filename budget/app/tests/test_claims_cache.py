@@ -0,0 +1,81 @@
+from uuid import uuid4
+
+from ..domain.schemas.user import User
+from ..infrastructure.auth.claims_cache import ClaimsCache
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def make_user() -> User:
+    return User(email="test@example.com", user_id=uuid4())
+
+def test_hit_and_miss_counters():
+    # arrange
+    clock = FakeClock()
+    cache = ClaimsCache(clock=clock)
+    user = make_user()
+
+    # act
+    assert cache.get("token") is None
+    cache.put("token", user, clock.now + 60)
+    result = cache.get("token")
+
+    # assert
+    assert result == user
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+def test_entry_expires_at_token_exp():
+    # arrange
+    clock = FakeClock()
+    cache = ClaimsCache(clock=clock)
+    cache.put("token", make_user(), clock.now + 30)
+
+    # act
+    clock.now += 31
+
+    # assert
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+def test_entry_lifetime_is_capped_by_max_ttl():
+    # arrange
+    clock = FakeClock()
+    cache = ClaimsCache(max_ttl=10, clock=clock)
+    cache.put("token", make_user(), clock.now + 3600)
+
+    # act
+    clock.now += 11
+
+    # assert
+    assert cache.get("token") is None
+
+def test_tokens_without_exp_or_already_expired_are_not_cached():
+    clock = FakeClock()
+    cache = ClaimsCache(clock=clock)
+
+    cache.put("no-exp", make_user(), None)
+    cache.put("expired", make_user(), clock.now - 1)
+
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted():
+    # arrange
+    clock = FakeClock()
+    cache = ClaimsCache(max_size=2, clock=clock)
+    cache.put("a", make_user(), clock.now + 60)
+    cache.put("b", make_user(), clock.now + 60)
+    cache.get("a")
+
+    # act
+    cache.put("c", make_user(), clock.now + 60)
+
+    # assert
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.evictions == 1
@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import MagicMock
+from uuid import uuid4
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..domain.exceptions import RepositoryError
+from ..infrastructure.cache import CollectionVersions, BUDGETS, CATEGORIES
+from ..infrastructure.cache.versions import BUMP_VERSIONS
+
+def version_rows(*rows):
+    result = MagicMock()
+    result.__iter__.side_effect = lambda: iter(rows)
+    return result
+
+@pytest.mark.asyncio
+async def test_versions_of_a_user_are_read_once_per_request(mock_db):
+    # arrange
+    user_id = uuid4()
+    mock_db.execute.return_value = version_rows((BUDGETS, 3, 12.5), (CATEGORIES, 1, 40.0))
+    versions = CollectionVersions(mock_db)
+
+    # act
+    budgets = await versions.get(user_id, BUDGETS)
+    categories = await versions.get(user_id, CATEGORIES)
+    since = await versions.seconds_since_write(user_id)
+
+    # assert
+    assert (budgets, categories, since) == ('3', '1', 12.5)
+    mock_db.execute.assert_awaited_once()
+    assert mock_db.execute.call_args.args[1] == {'user_id': user_id}
+
+@pytest.mark.asyncio
+async def test_user_without_writes_is_at_version_zero(mock_db):
+    # arrange
+    mock_db.execute.return_value = version_rows()
+    versions = CollectionVersions(mock_db)
+
+    # act, assert
+    assert await versions.get(uuid4(), BUDGETS) == '0'
+    assert await versions.seconds_since_write(uuid4()) is None
+
+@pytest.mark.asyncio
+async def test_bump_runs_in_the_open_transaction_and_rereads_after(mock_db):
+    # arrange
+    user_id, other_id = uuid4(), uuid4()
+    mock_db.execute.return_value = version_rows((BUDGETS, 1, 0.0))
+    versions = CollectionVersions(mock_db)
+    await versions.get(user_id, BUDGETS)
+
+    # act
+    await versions.bump([other_id, user_id, user_id], BUDGETS)
+    await versions.get(user_id, BUDGETS)
+
+    # assert
+    statement, parameters = mock_db.execute.await_args_list[1].args
+    assert statement is BUMP_VERSIONS
+    # One row per user, in a fixed order
+    assert parameters == {'user_ids': sorted({user_id, other_id}), 'collection': BUDGETS}
+    # Committed by the write, not by the bump
+    mock_db.commit.assert_not_awaited()
+    assert mock_db.execute.await_count == 3
+
+def test_bump_increments_the_existing_row():
+    # act
+    sql = str(BUMP_VERSIONS.compile(dialect=postgresql.dialect()))
+
+    # assert
+    assert 'ON CONFLICT (user_id, collection) DO UPDATE SET version = (collection_versions.version + ' in sql
+    assert 'written_at = now()' in sql
+
+@pytest.mark.asyncio
+async def test_bump_without_users_does_nothing(mock_db):
+    # act
+    await CollectionVersions(mock_db).bump([], BUDGETS)
+
+    # assert
+    mock_db.execute.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_failed_bump_rolls_back(mock_db):
+    # arrange
+    mock_db.execute.side_effect = SQLAlchemyError('boom')
+
+    # act
+    with pytest.raises(RepositoryError):
+        await CollectionVersions(mock_db).bump([uuid4()], BUDGETS)
+
+    # assert
+    mock_db.rollback.assert_awaited_once()
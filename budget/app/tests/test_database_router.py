@@ -0,0 +1,123 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from ..infrastructure.cache import BUDGETS
+from ..infrastructure.database.routing import DatabaseRouter, REPLICA_LAG, Replica, get_read_db
+
+def make_replica(name: str, healthy: bool | None = True, lag: float | None = 0) -> Replica:
+    replica = Replica(name, MagicMock(), MagicMock(name=f'{name}_sessions'))
+    replica.healthy, replica.lag = healthy, lag
+    return replica
+
+def engine_returning(lag = None, error: Exception | None = None):
+    connection = AsyncMock()
+    if error is not None:
+        connection.execute.side_effect = error
+    else:
+        connection.execute.return_value.scalar_one = MagicMock(return_value=lag)
+    engine = MagicMock()
+    engine.connect.return_value.__aenter__ = AsyncMock(return_value=connection)
+    engine.connect.return_value.__aexit__ = AsyncMock(return_value=False)
+    return engine
+
+@pytest.mark.asyncio
+async def test_reads_rotate_over_healthy_replicas(versions):
+    # arrange
+    first, down, second = make_replica('first'), make_replica('down', healthy=False), make_replica('second')
+    router = DatabaseRouter([first, down, second])
+    user_id = uuid4()
+
+    # act
+    chosen = [await router.read_session_maker(versions, user_id) for _ in range(4)]
+
+    # assert
+    assert chosen == [first.session_maker, second.session_maker] * 2
+
+@pytest.mark.asyncio
+async def test_reads_fall_back_to_primary_without_healthy_replica():
+    # arrange
+    router = DatabaseRouter([make_replica('down', healthy=False), make_replica('new', healthy=None)])
+    versions = AsyncMock()
+
+    # act, assert
+    assert await router.read_session_maker(versions, uuid4()) is None
+    # Nothing to choose, the user's writes are not looked up
+    versions.seconds_since_write.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_user_is_pinned_to_primary_after_write(versions):
+    # arrange
+    router = DatabaseRouter([make_replica('replica')], pin_window=10)
+    writer, reader = uuid4(), uuid4()
+
+    # act
+    # Made by any worker, the versions are shared
+    await versions.bump([writer], BUDGETS)
+
+    # assert
+    assert await router.read_session_maker(versions, writer) is None
+    assert await router.read_session_maker(versions, reader) is not None
+
+@pytest.mark.asyncio
+async def test_pin_expires_after_window(versions):
+    # arrange
+    router = DatabaseRouter([make_replica('replica')], pin_window=0)
+    user_id = uuid4()
+
+    # act
+    await versions.bump([user_id], BUDGETS)
+
+    # assert
+    assert await router.read_session_maker(versions, user_id) is not None
+
+@pytest.mark.asyncio
+async def test_check_marks_lagging_and_failing_replicas_unhealthy():
+    # arrange
+    fresh = Replica('fresh', engine_returning(lag=0.5), MagicMock())
+    lagging = Replica('lagging', engine_returning(lag=30), MagicMock())
+    failing = Replica('failing', engine_returning(error=OSError('connection refused')), MagicMock())
+    router = DatabaseRouter([fresh, lagging, failing], max_lag=2)
+
+    # act
+    await router.check()
+
+    # assert
+    assert (fresh.healthy, fresh.lag) == (True, 0.5)
+    assert (lagging.healthy, lagging.lag) == (False, 30)
+    assert (failing.healthy, failing.lag) == (False, None)
+
+@pytest.mark.asyncio
+async def test_check_marks_replica_without_wal_receiver_unhealthy(versions):
+    # arrange
+    disconnected = Replica('disconnected', engine_returning(lag=None), MagicMock())
+    router = DatabaseRouter([disconnected], max_lag=2)
+    disconnected.healthy = True
+
+    # act
+    await router.check()
+
+    # assert
+    assert (disconnected.healthy, disconnected.lag) == (False, None)
+    assert await router.read_session_maker(versions, uuid4()) is None
+
+def test_replica_lag_requires_streaming_wal_receiver():
+    # assert
+    sql = str(REPLICA_LAG)
+    assert "pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL" in sql
+    assert sql.index('pg_stat_wal_receiver') < sql.index('pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()')
+
+@pytest.mark.asyncio
+async def test_read_db_reuses_request_session_without_router(mock_db):
+    # arrange
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+    user = SimpleNamespace(user_id=uuid4())
+
+    # act
+    generator = get_read_db(request, mock_db, user, AsyncMock())
+    session = await generator.__anext__()
+
+    # assert
+    assert session is mock_db
+    await generator.aclose()
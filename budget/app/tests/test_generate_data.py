@@ -0,0 +1,65 @@
+import pytest
+from collections import Counter
+
+from ..domain.schemas import CategoryBudget, PercentageBudget, SimpleBudget
+from ..infrastructure.database.models.budget import BudgetType
+from ..utils.generate_data import DefaultTree, Scale, TenantGenerator
+
+DEFAULTS = DefaultTree(parents=[(1, 1), (2, 3)], leaves=[10, 11, 12, 13, 14, 15])
+
+@pytest.fixture
+def generator():
+    return TenantGenerator(42, Scale(users=3, budgets_per_user=300, envelopes_per_budget=4, categories_per_user=2), DEFAULTS)
+
+def test_same_seed_generates_same_data(generator):
+    # arrange
+    again = TenantGenerator(42, generator.scale, DEFAULTS)
+
+    # act
+    first = [budget.model_dump() for budget in generator.budgets(1, [100, 101])]
+    second = [budget.model_dump() for budget in again.budgets(1, [100, 101])]
+
+    # assert
+    assert first == second
+    assert generator.user_id(1) == again.user_id(1)
+    assert generator.categories(1) == again.categories(1)
+
+def test_users_and_seeds_differ(generator):
+    # arrange
+    other_seed = TenantGenerator(7, generator.scale, DEFAULTS)
+
+    # act
+    user_ids = {generator.user_id(index) for index in range(3)}
+
+    # assert
+    assert len(user_ids) == 3
+    assert generator.user_id(0) != other_seed.user_id(0)
+
+def test_categories_hang_under_default_main_categories(generator):
+    # act
+    rows = generator.categories(0)
+
+    # assert
+    assert len(rows) == 2
+    for user_id, name, type, parent_id, favicon in rows:
+        assert user_id == generator.user_id(0)
+        assert (parent_id, type) in DEFAULTS.parents
+        assert 0 < len(name) <= 50
+
+def test_budgets_follow_the_mix_and_are_valid(generator):
+    # act
+    budgets = list(generator.budgets(0, [100, 101]))
+
+    # assert
+    types = Counter(budget.type for budget in budgets)
+    assert len(budgets) == 300
+    assert types[BudgetType.SIMPLE] > types[BudgetType.PERCENTAGE] > 0
+    assert types[BudgetType.ENVELOPE] > 0
+    for budget in budgets:
+        assert isinstance(budget, (SimpleBudget, PercentageBudget, CategoryBudget))
+        assert budget.user_id == generator.user_id(0)
+        assert budget.start_date <= budget.end_date
+        if isinstance(budget, CategoryBudget):
+            ids = [item.category_id for item in budget.categories]
+            assert len(ids) == len(set(ids)) == 4
+            assert set(ids) <= {*DEFAULTS.leaves, 100, 101}
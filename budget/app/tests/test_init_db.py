@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
+
+from ..domain.configs import DEFAULT_CATEGORIES
+from ..utils.init_db import init_db, default_category_rows, SEED_LOCK_KEY
+
+def compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+@pytest.fixture
+def statements(mock_db):
+    executed = []
+
+    async def execute(statement):
+        executed.append(statement)
+        result = MagicMock()
+        result.all.return_value = [(1,)]
+        return result
+    mock_db.execute.side_effect = execute
+    return executed
+
+def test_default_rows_cover_the_whole_tree():
+    # act
+    parents, children = default_category_rows()
+
+    # assert
+    assert len(parents) == sum(len(categories) for categories in DEFAULT_CATEGORIES.values())
+    assert {parent for parent, *_ in children} == {name for name, *_ in parents}
+
+@pytest.mark.asyncio
+async def test_seeds_under_advisory_lock_with_two_upserts(mock_db, statements):
+    # act
+    written = await init_db(mock_db)
+
+    # assert
+    assert len(statements) == 3
+    assert 'pg_advisory_xact_lock' in compile(statements[0])
+    assert list(statements[0].compile().params.values()) == [SEED_LOCK_KEY]
+    for statement in statements[1:]:
+        sql = compile(statement)
+        assert sql.startswith('INSERT INTO categories')
+        assert 'ON CONFLICT (coalesce(parent_category_id, 0), name) WHERE user_id = ' in sql
+        assert 'IS DISTINCT FROM excluded.type' in sql
+    assert 'JOIN categories AS categories_1' in compile(statements[2])
+    assert written == 2
+    mock_db.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_rolls_back_on_error(mock_db):
+    # arrange
+    mock_db.execute.side_effect = RuntimeError('boom')
+
+    # act, assert
+    with pytest.raises(RuntimeError):
+        await init_db(mock_db)
+    mock_db.rollback.assert_awaited_once()
+    mock_db.commit.assert_not_awaited()
@@ -0,0 +1,116 @@
+import asyncio
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from jwt.exceptions import PyJWKClientError
+
+from ..infrastructure.auth.jwks import JWKSCache
+
+TEST_JWKS_URL = "http://keycloak:8080/auth/realms/test/protocol/openid-connect/certs"
+
+def make_jwk(kid: str) -> tuple[rsa.RSAPrivateKey, dict]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update(kid=kid, use='sig', alg='RS256')
+    return private_key, jwk
+
+class FakeIdP:
+    def __init__(self, *jwks: dict):
+        self.jwks = list(jwks)
+        self.calls = 0
+        self.down = False
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.down:
+            return httpx.Response(503)
+        return httpx.Response(200, json={'keys': self.jwks})
+
+    def cache(self, **kwargs) -> JWKSCache:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return JWKSCache(TEST_JWKS_URL, client=client, **kwargs)
+
+@pytest.mark.asyncio
+async def test_known_kid_is_served_without_network():
+    # arrange
+    private_key, jwk = make_jwk('key-1')
+    idp = FakeIdP(jwk)
+    cache = idp.cache()
+    await cache.refresh()
+    token = jwt.encode({'sub': 'x'}, private_key, algorithm='RS256', headers={'kid': 'key-1'})
+
+    # act
+    keys = [await cache.get_signing_key_from_jwt(token) for _ in range(5)]
+
+    # assert
+    assert idp.calls == 1
+    assert all(key.key_id == 'key-1' for key in keys)
+    assert (cache.hits, cache.misses) == (5, 0)
+    assert jwt.decode(token, keys[0].key, algorithms=['RS256'])['sub'] == 'x'
+
+@pytest.mark.asyncio
+async def test_unknown_kid_triggers_single_refetch():
+    # arrange
+    _, old_jwk = make_jwk('old')
+    _, new_jwk = make_jwk('new')
+    idp = FakeIdP(old_jwk)
+    cache = idp.cache(min_refetch_interval=0)
+    await cache.refresh()
+    idp.jwks = [old_jwk, new_jwk]
+
+    # act
+    keys = await asyncio.gather(*(cache.get_signing_key('new') for _ in range(10)))
+
+    # assert
+    assert idp.calls == 2
+    assert all(key.key_id == 'new' for key in keys)
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refetch_is_rate_limited():
+    # arrange
+    _, jwk = make_jwk('key-1')
+    idp = FakeIdP(jwk)
+    cache = idp.cache(min_refetch_interval=60)
+    await cache.refresh()
+
+    # act, assert
+    for _ in range(3):
+        with pytest.raises(PyJWKClientError):
+            await cache.get_signing_key('missing')
+    assert idp.calls == 1
+
+@pytest.mark.asyncio
+async def test_keeps_last_good_keys_when_idp_is_down():
+    # arrange
+    _, jwk = make_jwk('key-1')
+    idp = FakeIdP(jwk)
+    cache = idp.cache()
+    assert await cache.refresh()
+    idp.down = True
+
+    # act
+    refreshed = await cache.refresh()
+
+    # assert
+    assert refreshed is False
+    assert (await cache.get_signing_key('key-1')).key_id == 'key-1'
+
+@pytest.mark.asyncio
+async def test_background_refresh_picks_up_rotated_keys():
+    # arrange
+    _, old_jwk = make_jwk('old')
+    _, new_jwk = make_jwk('new')
+    idp = FakeIdP(old_jwk)
+    cache = idp.cache(ttl=0.05, refresh_margin=0.04, min_refetch_interval=0.01)
+    await cache.start()
+    idp.jwks = [new_jwk]
+
+    # act
+    await asyncio.sleep(0.1)
+    await cache.stop()
+
+    # assert
+    assert idp.calls >= 2
+    assert 'new' in cache.keys
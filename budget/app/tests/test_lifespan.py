@@ -0,0 +1,61 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from ..main import lifespan
+
+@pytest.fixture
+def app():
+    """The process-wide state `create_app` leaves for the lifespan"""
+    return SimpleNamespace(state=SimpleNamespace(
+        statement_stats=MagicMock(),
+        query_tracker=MagicMock(),
+        metrics=MagicMock(),
+        default_categories=MagicMock(get=AsyncMock()),
+        tracer_provider=MagicMock()
+    ))
+
+@pytest.mark.asyncio
+async def test_failed_startup_releases_what_was_acquired(app):
+    # arrange
+    engine = MagicMock(dispose=AsyncMock())
+    jwks_cache = MagicMock(start=AsyncMock(), stop=AsyncMock())
+    router = MagicMock(replicas=[], start=AsyncMock(), stop=AsyncMock())
+
+    with patch('app.main.create_engine_and_session', return_value=(engine, MagicMock())), \
+            patch('app.main.warm_up_pool', AsyncMock()), \
+            patch('app.main.trace_engine'), \
+            patch('app.main.JWKSCache.from_settings', return_value=jwks_cache), \
+            patch('app.main.DatabaseRouter.from_settings', return_value=router), \
+            patch('app.main.init_db', AsyncMock(side_effect=OSError('connection refused'))):
+        # act
+        with pytest.raises(OSError):
+            async with lifespan(app):
+                pass
+
+    # assert
+    router.stop.assert_awaited_once()
+    jwks_cache.stop.assert_awaited_once()
+    engine.dispose.assert_awaited_once()
+    app.state.tracer_provider.shutdown.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_failed_jwks_start_still_disposes_the_engine(app):
+    # arrange
+    engine = MagicMock(dispose=AsyncMock())
+    jwks_cache = MagicMock(start=AsyncMock(side_effect=TimeoutError()), stop=AsyncMock())
+
+    with patch('app.main.create_engine_and_session', return_value=(engine, MagicMock())), \
+            patch('app.main.warm_up_pool', AsyncMock()), \
+            patch('app.main.trace_engine'), \
+            patch('app.main.JWKSCache.from_settings', return_value=jwks_cache), \
+            patch('app.main.DatabaseRouter.from_settings') as router_from_settings:
+        # act
+        with pytest.raises(TimeoutError):
+            async with lifespan(app):
+                pass
+
+    # assert
+    jwks_cache.stop.assert_awaited_once()
+    engine.dispose.assert_awaited_once()
+    router_from_settings.assert_not_called()
@@ -0,0 +1,94 @@
+import io
+import logging
+import queue
+from unittest.mock import patch
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from ..infrastructure.logging.log_queue import BoundedQueueHandler, LogWriter
+from ..infrastructure.logging.logging_middleware import StructLogMiddleware
+from ..infrastructure.logging.sampling import AccessLogSampler
+
+def make_record(msg: str) -> logging.LogRecord:
+    return logging.makeLogRecord({'name': 'test', 'levelno': logging.INFO, 'levelname': 'INFO', 'msg': msg})
+
+def test_drop_policy_counts_records_that_do_not_fit():
+    # arrange
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), overflow='drop')
+
+    # act
+    for i in range(5):
+        handler.handle(make_record(f'line {i}'))
+
+    # assert
+    assert handler.records.qsize() == 2
+    assert handler.dropped == 3
+
+def test_writer_flushes_queued_records_and_reports_drops():
+    # arrange
+    records = queue.Queue(maxsize=10)
+    handler = BoundedQueueHandler(records, overflow='drop')
+    stream = io.StringIO()
+    writer = LogWriter(records, logging.Formatter('%(message)s'), handler, stream=stream, batch_size=2)
+    for i in range(3):
+        handler.handle(make_record(f'line {i}'))
+    handler.dropped = 4
+
+    # act
+    writer.start()
+    writer.stop()
+
+    # assert
+    lines = stream.getvalue().splitlines()
+    assert [line for line in lines if line.startswith('line')] == ['line 0', 'line 1', 'line 2']
+    assert 'Log queue full, dropped 4 records' in lines
+    assert not writer.is_alive()
+
+def test_sampler_always_keeps_server_errors_and_slow_requests():
+    # arrange
+    sampler = AccessLogSampler(default_rate=0, slow_ms=100, random=lambda: 0.99)
+
+    # act, assert
+    assert sampler.sample('GET', '/budget', 503, 1) == 1.0
+    assert sampler.sample('GET', '/budget', 200, 150) == 1.0
+    assert sampler.sample('GET', '/budget', 200, 1) is None
+
+def test_sampler_prefers_route_and_class_rates():
+    # arrange
+    sampler = AccessLogSampler(
+        default_rate=1.0,
+        rates={'GET /budget 2xx': 0.01, 'GET /budget/{id}': 0.5, '4xx': 0.25},
+        random=lambda: 0.1
+    )
+
+    # act, assert
+    assert sampler.rate('GET', '/budget', 200) == 0.01
+    assert sampler.rate('GET', '/budget', 404) == 0.25
+    assert sampler.rate('GET', '/budget/{id}', 200) == 0.5
+    assert sampler.rate('POST', '/budget', 201) == 1.0
+    assert sampler.sample('GET', '/budget', 200, 1) is None
+    assert sampler.sample('GET', '/budget/{id}', 200, 1) == 0.5
+
+def test_middleware_logs_sampled_requests_with_route_template():
+    # arrange
+    app = FastAPI()
+
+    @app.get('/items/{id}')
+    async def get_item(id: int):
+        if id == 0:
+            raise HTTPException(status_code=500)
+        return {'id': id}
+
+    app.add_middleware(StructLogMiddleware, sampler=AccessLogSampler(rates={'GET /items/{id} 2xx': 0}))
+    client = TestClient(app)
+
+    # act
+    with patch('app.infrastructure.logging.logging_middleware.logger') as logger:
+        client.get('/items/1')
+        client.get('/items/0')
+
+    # assert
+    logger.info.assert_called_once()
+    assert logger.info.call_args.kwargs['http']['status_code'] == 500
+    assert logger.info.call_args.kwargs['sample_rate'] == 1.0
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ..infrastructure.metrics import AppMetrics, EventLoopMonitor, MetricsMiddleware, MetricsRegistry
+from ..infrastructure.metrics.app_metrics import sql_operation
+from ..infrastructure.metrics.registry import Metric
+from ..routers import metrics as metrics_router
+
+def test_histogram_renders_cumulative_buckets():
+    # arrange
+    registry = MetricsRegistry()
+    histogram = registry.histogram('latency_seconds', 'Latency', ('route',), (0.1, 1))
+
+    # act
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, '/budget')
+
+    # assert
+    lines = registry.render().splitlines()
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{route="/budget",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/budget",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/budget",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/budget"} 3.65' in lines
+    assert 'latency_seconds_count{route="/budget"} 4' in lines
+
+def test_label_combinations_beyond_limit_fold_into_other():
+    # arrange
+    registry = MetricsRegistry()
+    counter = registry.counter('requests_total', 'Requests', ('path',))
+    counter.max_series = 2
+
+    # act
+    for path in ('/a', '/b', '/c', '/d', '/a'):
+        counter.inc(path)
+
+    # assert
+    samples = {labels['path']: value for _, labels, value in counter.collect().samples}
+    assert samples == {'/a': 2, '/b': 1, 'other': 2}
+
+def test_metric_without_collect_cannot_be_created():
+    # arrange
+    class Gauge(Metric):
+        type = 'gauge'
+
+    # act & assert
+    with pytest.raises(TypeError):
+        Gauge('queue_size', 'Queue size')
+
+def test_sql_operation_is_bounded():
+    assert sql_operation('  select 1') == 'SELECT'
+    assert sql_operation('WITH new_budget AS (INSERT ...') == 'WITH'
+    assert sql_operation('VACUUM budgets') == 'OTHER'
+
+def test_cache_and_pool_collectors_read_current_values():
+    # arrange
+    metrics = AppMetrics()
+    metrics.watch_cache('claims', SimpleNamespace(hits=3, misses=1))
+    pool = SimpleNamespace(size=lambda: 10, checkedout=lambda: 4, overflow=lambda: -6)
+    metrics._pools['primary'] = SimpleNamespace(sync_engine=SimpleNamespace(pool=pool))
+
+    # act
+    lines = metrics.registry.render().splitlines()
+
+    # assert
+    assert 'cache_hit_ratio{cache="claims"} 0.75' in lines
+    assert 'cache_misses_total{cache="claims"} 1' in lines
+    assert 'db_pool_checked_out{database="primary"} 4' in lines
+    assert 'db_pool_overflow{database="primary"} 0' in lines
+
+def test_requests_are_recorded_by_route_template():
+    # arrange
+    app = FastAPI()
+    app.state.metrics = AppMetrics()
+
+    @app.get('/items/{id}')
+    async def get_item(id: int):
+        return {'id': id}
+
+    app.include_router(metrics_router.router)
+    app.add_middleware(MetricsMiddleware, metrics=app.state.metrics)
+    client = TestClient(app)
+
+    # act
+    client.get('/items/1')
+    client.get('/items/2')
+    response = client.get('/metrics')
+
+    # assert
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    lines = response.text.splitlines()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{id}",status_class="2xx"} 2' in lines
+    assert 'http_requests_in_flight 1' in lines
+
+@pytest.mark.asyncio
+async def test_event_loop_monitor_observes_lag():
+    # arrange
+    metrics = AppMetrics()
+    monitor = EventLoopMonitor(metrics.event_loop_lag, interval=0.01)
+
+    # act
+    await monitor.start()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    # assert
+    _, _, count = metrics.event_loop_lag.collect().samples[-1]
+    assert count >= 1
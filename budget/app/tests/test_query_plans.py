@@ -0,0 +1,161 @@
+"""Query plans of the repository and service reads, on a seeded Postgres.
+
+Skipped unless PLAN_DATABASE_URL points at a database migrated to head and loaded with
+`python -m app.utils.generate_data`. Each read runs for real, every statement it sends
+is captured from the engine and explained with the same parameters. Sequential scans
+are disabled for the EXPLAIN, so a Seq Scan left in a plan means no index can serve the
+statement, whatever the size of the tables. PLAN_COST_BUDGET caps the estimated cost.
+"""
+import json
+import os
+from datetime import date
+from typing import Any, Awaitable, Callable, Iterator
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from ..application.services import CategoryService, DefaultCategoriesCache
+from ..domain.schemas import BudgetFilterParams
+from ..domain.schemas.pagination import encode_cursor
+from ..domain.specifications import AuthorSpec, budget_filter_spec
+from ..infrastructure.cache import CollectionVersions, BUDGETS
+from ..infrastructure.database.models import Budget
+from ..infrastructure.database.models.budget import BudgetType
+from ..infrastructure.database.repositories import BudgetRepository
+from ..infrastructure.database.resolvers.spec_resolver import BudgetSpecificationResolver
+from ..infrastructure.metrics.app_metrics import sql_operation
+
+PLAN_DATABASE_URL = os.environ.get('PLAN_DATABASE_URL')
+COST_BUDGET = float(os.environ.get('PLAN_COST_BUDGET', 10_000))
+
+pytestmark = pytest.mark.skipif(not PLAN_DATABASE_URL, reason='PLAN_DATABASE_URL is not set')
+
+class StatementRecorder:
+    """Reads sent on the engine, as SQL text and driver parameters"""
+    def __init__(self, engine):
+        self.statements: list[tuple[str, Any]] = []
+        event.listen(engine.sync_engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # EXPLAIN and SET are `OTHER`, the checks don't record themselves
+        if sql_operation(statement) in ('SELECT', 'WITH'):
+            self.statements.append((statement, parameters))
+
+def nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from nodes(child)
+
+class PlanChecker:
+    def __init__(self, db: AsyncSession, recorder: StatementRecorder):
+        self.db = db
+        self.recorder = recorder
+
+    async def explain(self, statement: str, parameters: Any) -> dict:
+        connection = await self.db.connection()
+        await connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        # Positional parameters may be recorded as a list, which would mean executemany here
+        if isinstance(parameters, list):
+            parameters = tuple(parameters)
+        plan = (await connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters)).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']
+
+    async def assert_indexed(self, read: Callable[[], Awaitable[Any]]) -> None:
+        self.recorder.statements.clear()
+        await read()
+        statements = list(self.recorder.statements)
+        assert statements, 'The read sent no statement'
+        for statement, parameters in statements:
+            plan = await self.explain(statement, parameters)
+            scans = [node['Relation Name'] for node in nodes(plan) if node['Node Type'] == 'Seq Scan']
+            assert not scans, f'Sequential scan on {scans} for:\n{statement}'
+            assert plan['Total Cost'] <= COST_BUDGET, f"Cost {plan['Total Cost']} over {COST_BUDGET} for:\n{statement}"
+
+@pytest_asyncio.fixture
+async def plans():
+    engine = create_async_engine(PLAN_DATABASE_URL, poolclass=NullPool)
+    recorder = StatementRecorder(engine)
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            yield PlanChecker(db, recorder)
+    finally:
+        await engine.dispose()
+
+@pytest_asyncio.fixture
+async def envelope_budget(plans) -> Budget:
+    budget = (await plans.db.scalars(
+        select(Budget).where(Budget.type == BudgetType.ENVELOPE).order_by(Budget.id).limit(1)
+    )).first()
+    if budget is None:
+        pytest.skip('No envelope budget, load data with app.utils.generate_data')
+    return budget
+
+@pytest.fixture
+def repository(plans) -> BudgetRepository:
+    return BudgetRepository(plans.db, BudgetSpecificationResolver())
+
+def consume(stream) -> Callable[[], Awaitable[None]]:
+    async def read():
+        async for _ in stream:
+            pass
+    return read
+
+@pytest.mark.asyncio
+async def test_find_by_author(plans, repository, envelope_budget):
+    await plans.assert_indexed(lambda: repository.find(AuthorSpec(envelope_budget.user_id)))
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('filters', [
+    {},
+    {'type': BudgetType.ENVELOPE, 'currency': 'USD'},
+    {'date_from': date(2023, 1, 1), 'date_to': date(2024, 12, 31)},
+], ids=['first_page', 'type_currency', 'date_range'])
+async def test_find_page(plans, repository, envelope_budget, filters):
+    # arrange
+    params = BudgetFilterParams(limit=20, **filters)
+    spec = budget_filter_spec(envelope_budget.user_id, params)
+
+    # act & assert
+    await plans.assert_indexed(lambda: repository.find_page(spec, params))
+
+@pytest.mark.asyncio
+async def test_find_page_after_cursor(plans, repository, envelope_budget):
+    # arrange
+    params = BudgetFilterParams(limit=20, cursor=encode_cursor(envelope_budget.start_date, envelope_budget.id))
+
+    # act & assert
+    await plans.assert_indexed(lambda: repository.find_page(AuthorSpec(envelope_budget.user_id), params))
+
+@pytest.mark.asyncio
+async def test_find_detailed_with_envelopes(plans, repository, envelope_budget):
+    await plans.assert_indexed(lambda: repository.find_detailed(AuthorSpec(envelope_budget.user_id)))
+
+@pytest.mark.asyncio
+async def test_stream(plans, repository, envelope_budget):
+    await plans.assert_indexed(consume(repository.stream(AuthorSpec(envelope_budget.user_id))))
+
+@pytest.mark.asyncio
+async def test_get_by_id(plans, repository, envelope_budget):
+    await plans.assert_indexed(lambda: repository.get_by_id(envelope_budget.id))
+
+@pytest.mark.asyncio
+async def test_user_categories(plans, envelope_budget):
+    # arrange
+    service = CategoryService(plans.db, MagicMock(), DefaultCategoriesCache(), CollectionVersions(plans.db))
+
+    # act & assert
+    await plans.assert_indexed(lambda: service._load_user_categories(envelope_budget.user_id))
+
+@pytest.mark.asyncio
+async def test_collection_versions(plans, envelope_budget):
+    await plans.assert_indexed(lambda: CollectionVersions(plans.db).get(envelope_budget.user_id, BUDGETS))
+
+@pytest.mark.asyncio
+async def test_default_categories(plans):
+    await plans.assert_indexed(lambda: DefaultCategoriesCache().get(plans.db))
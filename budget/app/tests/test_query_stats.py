@@ -0,0 +1,89 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from ..infrastructure.database.query_stats import QueryTracker, RepeatedQueryError
+from ..infrastructure.logging.logging_middleware import StructLogMiddleware
+
+def make_engine(tracker: QueryTracker):
+    engine = create_engine('sqlite://')
+    tracker.instrument(SimpleNamespace(sync_engine=engine))
+    return engine
+
+def test_statements_are_counted_for_the_tracked_request_only():
+    # arrange
+    tracker = QueryTracker()
+    engine = make_engine(tracker)
+
+    # act
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        with tracker.track() as queries:
+            connection.execute(text('SELECT 1'))
+            connection.execute(text('SELECT 2'))
+
+    # assert
+    assert queries.count == 2
+    assert queries.seconds >= queries.slowest_seconds > 0
+    assert queries.slowest in ('SELECT 1', 'SELECT 2')
+    assert queries.as_log()['queries'] == 2
+    assert queries.server_timing().endswith('desc="2 queries"')
+
+def test_raise_mode_fails_statement_repeated_beyond_limit():
+    # arrange
+    tracker = QueryTracker(repeat_limit=2, repeat_mode='raise')
+    engine = make_engine(tracker)
+
+    # act
+    with engine.connect() as connection, tracker.track() as queries:
+        for id in range(2):
+            connection.execute(text('SELECT :id'), {'id': id})
+        with pytest.raises(RepeatedQueryError):
+            connection.execute(text('SELECT :id'), {'id': 2})
+
+    # assert
+    assert queries.count == 2
+
+def test_warn_mode_logs_once_per_statement():
+    # arrange
+    tracker = QueryTracker(repeat_limit=1, repeat_mode='warn')
+    engine = make_engine(tracker)
+
+    # act
+    with patch('app.infrastructure.database.query_stats.logger') as logger:
+        with engine.connect() as connection, tracker.track() as queries:
+            for id in range(4):
+                connection.execute(text('SELECT :id'), {'id': id})
+
+    # assert
+    logger.warning.assert_called_once()
+    assert queries.count == 4
+
+def test_middleware_reports_queries_in_header_and_access_log():
+    # arrange
+    tracker = QueryTracker()
+    engine = make_engine(tracker)
+    app = FastAPI()
+
+    @app.get('/items')
+    async def get_items():
+        with engine.connect() as connection:
+            for id in range(3):
+                connection.execute(text('SELECT :id'), {'id': id})
+        return []
+
+    app.add_middleware(StructLogMiddleware, queries=tracker)
+    client = TestClient(app)
+
+    # act
+    with patch('app.infrastructure.logging.logging_middleware.logger') as logger:
+        response = client.get('/items')
+
+    # assert
+    assert response.headers['server-timing'].startswith('db;dur=')
+    assert response.headers['server-timing'].endswith('desc="3 queries"')
+    assert logger.info.call_args.kwargs['db']['queries'] == 3
@@ -0,0 +1,163 @@
+import asyncio
+import uuid
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from ..infrastructure.cache import BUDGETS, CATEGORIES, CacheKey, LRUBackend, LocalStore, ResponseCache, SharedBackend
+
+USER_ID = uuid.uuid4()
+ADAPTER = TypeAdapter(List[int])
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def key(query: str, user_id: uuid.UUID = USER_ID, collection: str = BUDGETS, version: str = '1') -> CacheKey:
+    return CacheKey(user_id, collection, version, query)
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used_beyond_max_entries():
+    # arrange
+    backend = LRUBackend(max_entries=2)
+    await backend.set(key('a'), b'1', 60)
+    await backend.set(key('b'), b'2', 60)
+    await backend.get(key('a'))
+
+    # act
+    await backend.set(key('c'), b'3', 60)
+
+    # assert
+    assert await backend.get(key('b')) is None
+    assert await backend.get(key('a')) == b'1'
+    assert len(backend) == 2
+    assert backend.evictions == 1
+
+@pytest.mark.asyncio
+async def test_lru_bounds_bytes_and_skips_oversized_values():
+    # arrange
+    backend = LRUBackend(max_bytes=10)
+    await backend.set(key('a'), b'x' * 6, 60)
+
+    # act
+    await backend.set(key('b'), b'y' * 6, 60)
+    await backend.set(key('c'), b'z' * 11, 60)
+
+    # assert
+    assert await backend.get(key('a')) is None
+    assert await backend.get(key('c')) is None
+    assert backend.memory_bytes == 6
+
+@pytest.mark.asyncio
+async def test_lru_expires_entries_after_ttl():
+    # arrange
+    clock = Clock()
+    backend = LRUBackend(clock=clock)
+    await backend.set(key('a'), b'1', 60)
+
+    # act
+    clock.now = 60
+
+    # assert
+    assert await backend.get(key('a')) is None
+    assert backend.memory_bytes == 0
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('make_backend', [LRUBackend, lambda: SharedBackend(LocalStore())], ids=['lru', 'shared'])
+async def test_invalidate_drops_only_the_scope(make_backend):
+    # arrange
+    backend = make_backend()
+    other_user = uuid.uuid4()
+    await backend.set(key('all'), b'1', 60)
+    await backend.set(key('id:1'), b'2', 60)
+    await backend.set(key('own', collection=CATEGORIES), b'3', 60)
+    await backend.set(key('all', user_id=other_user), b'4', 60)
+
+    # act
+    await backend.invalidate(USER_ID, BUDGETS)
+
+    # assert
+    assert await backend.get(key('all')) is None
+    assert await backend.get(key('id:1')) is None
+    assert await backend.get(key('own', collection=CATEGORIES)) == b'3'
+    assert await backend.get(key('all', user_id=other_user)) == b'4'
+
+@pytest.mark.asyncio
+async def test_shared_backend_expires_with_the_store():
+    # arrange
+    clock = Clock()
+    backend = SharedBackend(LocalStore(clock))
+    await backend.set(key('all'), b'1', 30)
+
+    # act
+    clock.now = 30
+
+    # assert
+    assert await backend.get(key('all')) is None
+
+@pytest.mark.asyncio
+async def test_get_or_load_serves_hits_from_cache():
+    # arrange
+    cache = ResponseCache(LRUBackend())
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return [1, 2]
+
+    # act
+    first = await cache.get_or_load(key('all'), ADAPTER, load)
+    second = await cache.get_or_load(key('all'), ADAPTER, load)
+
+    # assert
+    assert first == second == b'[1,2]'
+    assert len(loads) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache) == 1
+    assert cache.memory_bytes == len(b'[1,2]')
+
+@pytest.mark.asyncio
+async def test_read_after_a_write_misses_reads_of_older_version():
+    # arrange
+    # Another worker's cache, it never sees the invalidation of the write
+    cache = ResponseCache(LRUBackend())
+    await cache.get_or_load(key('all', version='1'), ADAPTER, lambda: asyncio.sleep(0, [1]))
+
+    # act
+    result = await cache.get_or_load(key('all', version='2'), ADAPTER, lambda: asyncio.sleep(0, [1, 2]))
+
+    # assert
+    assert result == b'[1,2]'
+    assert (cache.hits, cache.misses) == (0, 2)
+
+@pytest.mark.asyncio
+async def test_read_loading_none_is_not_stored():
+    # arrange
+    cache = ResponseCache(LRUBackend())
+
+    # act
+    result = await cache.get_or_load(key('id:1'), ADAPTER, lambda: asyncio.sleep(0, None))
+
+    # assert
+    assert result is None
+    assert len(cache) == 0
+
+@pytest.mark.asyncio
+async def test_without_backend_every_read_loads():
+    # arrange
+    cache = ResponseCache(None)
+
+    async def load():
+        return [1]
+
+    # act
+    await cache.get_or_load(key('all'), ADAPTER, load)
+    await cache.get_or_load(key('all'), ADAPTER, load)
+
+    # assert
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert cache.memory_bytes is None
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from ..infrastructure.cache import SingleFlight
+
+class SlowLoad:
+    """Counts calls, each blocks until `release` is set"""
+    def __init__(self, value=None, error: Exception | None = None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+async def start(flights: SingleFlight, key, load, count: int) -> list[asyncio.Task]:
+    tasks = [asyncio.create_task(flights.do(key, load)) for _ in range(count)]
+    # Let every task reach the flight before the load completes
+    await asyncio.sleep(0)
+    return tasks
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    # arrange
+    flights = SingleFlight()
+    load = SlowLoad(value=[1, 2])
+    tasks = await start(flights, 'key', load, 100)
+
+    # act
+    load.release.set()
+    results = await asyncio.gather(*tasks)
+
+    # assert
+    assert load.calls == 1
+    assert all(result is results[0] for result in results)
+    assert (flights.hits, flights.misses) == (99, 1)
+    assert len(flights) == 0
+
+@pytest.mark.asyncio
+async def test_different_keys_load_separately():
+    # arrange
+    flights = SingleFlight()
+    load = SlowLoad(value=1)
+    tasks = [*await start(flights, 'a', load, 5), *await start(flights, 'b', load, 5)]
+
+    # act
+    load.release.set()
+    await asyncio.gather(*tasks)
+
+    # assert
+    assert load.calls == 2
+
+@pytest.mark.asyncio
+async def test_error_is_raised_to_every_waiter():
+    # arrange
+    flights = SingleFlight()
+    load = SlowLoad(error=LookupError('gone'))
+    tasks = await start(flights, 'key', load, 10)
+
+    # act
+    load.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # assert
+    assert load.calls == 1
+    assert all(isinstance(result, LookupError) for result in results)
+
+@pytest.mark.asyncio
+async def test_calls_after_completion_load_again():
+    # arrange
+    flights = SingleFlight()
+    load = SlowLoad(value=1)
+    load.release.set()
+
+    # act
+    await flights.do('key', load)
+    await flights.do('key', load)
+
+    # assert
+    assert load.calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_call_running():
+    # arrange
+    flights = SingleFlight()
+    load = SlowLoad(value=1)
+    leader, waiter = await start(flights, 'key', load, 2)
+
+    # act
+    waiter.cancel()
+    await asyncio.sleep(0)
+    load.release.set()
+
+    # assert
+    assert await leader == 1
+    assert waiter.cancelled()
+
+@pytest.mark.asyncio
+async def test_waiters_load_again_when_the_leader_is_cancelled():
+    # arrange
+    flights = SingleFlight()
+    load = SlowLoad(value=1)
+    leader, *waiters = await start(flights, 'key', load, 3)
+
+    # act
+    leader.cancel()
+    # Until a waiter has started the load again
+    while load.calls < 2:
+        await asyncio.sleep(0)
+    load.release.set()
+    results = await asyncio.gather(*waiters)
+
+    # assert
+    assert leader.cancelled()
+    assert results == [1, 1]
+    # The cancelled load and one retry shared by both waiters
+    assert load.calls == 2
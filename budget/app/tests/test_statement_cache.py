@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.engine.interfaces import CacheStats
+
+from ..infrastructure.database.models import Budget
+from ..infrastructure.database.statement_cache import StatementCache
+from ..infrastructure.database.statement_stats import StatementStats
+
+def connection_with(prepared):
+    return SimpleNamespace(connection=SimpleNamespace(dbapi_connection=SimpleNamespace(_prepared_statement_cache=prepared)))
+
+def test_statement_is_built_once_per_key():
+    # arrange
+    cache = StatementCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return select(Budget)
+
+    # act
+    first = cache.get_or_build('key', build)
+    second = cache.get_or_build('key', build)
+
+    # assert
+    assert first is second
+    assert len(builds) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_least_recently_used_statement_is_evicted():
+    # arrange
+    cache = StatementCache(maxsize=2)
+    a = cache.get_or_build('a', lambda: select(Budget.id))
+    cache.get_or_build('b', lambda: select(Budget.name))
+
+    # act
+    cache.get_or_build('a', lambda: select(Budget.id))
+    cache.get_or_build('c', lambda: select(Budget.type))
+
+    # assert
+    assert len(cache) == 2
+    assert cache.get_or_build('a', lambda: select(Budget.id)) is a
+    assert cache.misses == 3
+
+def test_stats_count_compiled_and_prepared_hits():
+    # arrange
+    stats = StatementStats(StatementCache())
+    prepared = {'SELECT 1': object()}
+
+    # act
+    stats._before_cursor_execute(connection_with(prepared), None, 'SELECT 1', (), SimpleNamespace(cache_hit=CacheStats.CACHE_HIT), False)
+    stats._before_cursor_execute(connection_with(prepared), None, 'SELECT 2', (), SimpleNamespace(cache_hit=CacheStats.CACHE_MISS), False)
+    stats._before_cursor_execute(connection_with(None), None, 'SELECT 3', (), SimpleNamespace(cache_hit=CacheStats.NO_CACHE_KEY), False)
+
+    # assert
+    snapshot = stats.snapshot()
+    assert snapshot['compiled'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    assert snapshot['prepared'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    assert snapshot['statements']['size'] == 0
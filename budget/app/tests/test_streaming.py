@@ -0,0 +1,65 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from ..domain.schemas import CategoryResponse, CategoryType, FileFormat
+from ..routers.streaming import encode_chunks
+
+USER_ID = '123e4567-e89b-12d3-a456-426614174000'
+
+def category(id: int) -> CategoryResponse:
+    return CategoryResponse(id=id, name=f'c{id}', type=CategoryType.EXPENSE, user_id=USER_ID)
+
+class Source:
+    def __init__(self, count: int):
+        self.count = count
+        self.produced = 0
+        self.closed = False
+
+    async def items(self):
+        try:
+            for id in range(self.count):
+                self.produced += 1
+                yield category(id)
+        finally:
+            self.closed = True
+
+def request(disconnected: bool):
+    return SimpleNamespace(is_disconnected=AsyncMock(return_value=disconnected))
+
+@pytest.mark.asyncio
+async def test_chunks_group_lines_up_to_chunk_size():
+    # arrange
+    source = Source(10)
+
+    # act
+    chunks = [chunk async for chunk in encode_chunks(request(False), source.items(), FileFormat.NDJSON, (), 200)]
+
+    # assert
+    assert len(chunks) < 10
+    assert b''.join(chunks).count(b'\n') == 10
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+
+@pytest.mark.asyncio
+async def test_disconnect_stops_reading_and_closes_source():
+    # arrange
+    source = Source(1000)
+
+    # act
+    chunks = [chunk async for chunk in encode_chunks(request(True), source.items(), FileFormat.NDJSON, (), 1)]
+
+    # assert
+    assert len(chunks) == 1
+    assert source.produced == 1
+    assert source.closed
+
+@pytest.mark.asyncio
+async def test_csv_starts_with_header():
+    # arrange
+    source = Source(2)
+
+    # act
+    chunks = [chunk async for chunk in encode_chunks(request(False), source.items(), FileFormat.CSV, ('id', 'name'), 1024)]
+
+    # assert
+    assert b''.join(chunks).decode().splitlines() == ['id,name', '0,c0', '1,c1']
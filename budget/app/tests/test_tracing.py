@@ -0,0 +1,166 @@
+import json
+import pytest
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind, StatusCode
+from sqlalchemy import create_engine, text
+
+from ..domain.configs.config import Settings
+from ..infrastructure.auth.auth import get_current_user
+from ..infrastructure.auth.claims_cache import ClaimsCache
+from ..infrastructure.tracing import add_trace_ids, cache_span, configure_tracing, trace_engine, tracer
+from ..infrastructure.tracing.tracing import create_exporter
+
+TEST_USER_ID = "9c699f45-8099-40e3-aca9-f023606cd5bb"
+
+_exporter = InMemorySpanExporter()
+
+@pytest.fixture(scope='module', autouse=True)
+def tracer_provider():
+    # The global provider can be set once per process, the module tracer proxies to it
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(_exporter))
+    trace.set_tracer_provider(provider)
+    return provider
+
+@pytest.fixture
+def spans():
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+def make_settings(**kwargs) -> Settings:
+    return Settings(DATABASE_URL=None, auth_authority=None, auth_token_url=None, auth_url=None,
+                    auth_audience=None, jwks_url=None, **kwargs)
+
+def test_no_provider_without_exporter():
+    # arrange
+    app = MagicMock()
+
+    # act
+    provider = configure_tracing(app, make_settings(tracing_exporter='none'))
+
+    # assert
+    assert provider is None
+
+def test_file_exporter_writes_one_span_per_line(tmp_path):
+    # arrange
+    path = tmp_path / 'traces.jsonl'
+    settings = make_settings(tracing_exporter='file', tracing_file=str(path), tracing_sample_ratio=1.0)
+    app = MagicMock(version='1.0.0')
+
+    # act
+    with patch('opentelemetry.trace.set_tracer_provider'):
+        provider = configure_tracing(app, settings)
+    with provider.get_tracer('test').start_as_current_span('work'):
+        pass
+    provider.shutdown()
+
+    # assert
+    lines = path.read_text().splitlines()
+    span = json.loads(lines[0])
+    assert span['name'] == 'work'
+    assert span['resource']['attributes']['service.name'] == settings.SERVICE_NAME
+
+def test_file_exporter_closes_the_file_on_shutdown(tmp_path):
+    # arrange
+    exporter = create_exporter(make_settings(tracing_exporter='file', tracing_file=str(tmp_path / 'traces.jsonl')))
+
+    # act
+    exporter.shutdown()
+
+    # assert
+    assert exporter.out.closed
+
+def test_sample_ratio_zero_drops_new_traces(tmp_path):
+    # arrange
+    settings = make_settings(tracing_exporter='file', tracing_file=str(tmp_path / 'traces.jsonl'),
+                             tracing_sample_ratio=0.0)
+
+    # act
+    with patch('opentelemetry.trace.set_tracer_provider'):
+        provider = configure_tracing(MagicMock(version='1.0.0'), settings)
+    with provider.get_tracer('test').start_as_current_span('work') as span:
+        sampled = span.get_span_context().trace_flags.sampled
+    provider.shutdown()
+
+    # assert
+    assert not sampled
+
+def test_statements_get_client_spans(spans):
+    # arrange
+    sync_engine = create_engine('sqlite://')
+    trace_engine(SimpleNamespace(url=sync_engine.url, sync_engine=sync_engine), 'primary')
+
+    # act
+    with tracer.start_as_current_span('request'):
+        with sync_engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+    # assert
+    statement, request = spans.get_finished_spans()
+    assert statement.kind == SpanKind.CLIENT
+    assert statement.parent.span_id == request.context.span_id
+    assert statement.attributes['db.system'] == 'postgresql'
+    assert statement.attributes['db.operation'] == 'SELECT'
+    assert statement.attributes['db.statement'] == 'SELECT 1'
+
+def test_failed_statement_span_records_error(spans):
+    # arrange
+    sync_engine = create_engine('sqlite://')
+    trace_engine(SimpleNamespace(url=sync_engine.url, sync_engine=sync_engine), 'primary')
+
+    # act
+    with pytest.raises(Exception):
+        with sync_engine.connect() as connection:
+            connection.execute(text('SELECT * FROM missing'))
+
+    # assert
+    span, = spans.get_finished_spans()
+    assert span.status.status_code == StatusCode.ERROR
+    assert span.events[0].name == 'exception'
+
+@pytest.mark.asyncio
+async def test_token_verification_spans(spans, mock_logger):
+    # arrange
+    jwks_cache = MagicMock()
+    jwks_cache.get_signing_key_from_jwt = AsyncMock(return_value=MagicMock(key='key'))
+    claims_cache = ClaimsCache(max_size=10)
+    settings = MagicMock(auth_audience='test-api')
+
+    # act
+    with patch('jwt.decode', return_value={'sub': TEST_USER_ID, 'email': 'test@example.com', 'exp': time.time() + 60}):
+        await get_current_user(settings, mock_logger, 'token', jwks_cache, claims_cache)
+        await get_current_user(settings, mock_logger, 'token', jwks_cache, claims_cache)
+
+    # assert
+    names = [(span.name, span.attributes.get('cache.hit')) for span in spans.get_finished_spans()]
+    assert names == [('cache.get claims', False), ('jwt.verify', None), ('cache.get claims', True)]
+
+def test_cache_span_is_current(spans):
+    # act
+    with cache_span('claims') as span:
+        span.set_attribute('cache.hit', True)
+        current = trace.get_current_span()
+
+    # assert
+    assert current is span
+    finished, = spans.get_finished_spans()
+    assert finished.attributes == {'cache.name': 'claims', 'cache.hit': True}
+
+def test_log_events_carry_trace_ids(spans):
+    # act
+    with tracer.start_as_current_span('request') as span:
+        event = add_trace_ids(None, 'info', {'event': 'hello'})
+    outside = add_trace_ids(None, 'info', {'event': 'hello'})
+
+    # assert
+    assert event['trace_id'] == format(span.get_span_context().trace_id, '032x')
+    assert event['span_id'] == format(span.get_span_context().span_id, '016x')
+    assert 'trace_id' not in outside
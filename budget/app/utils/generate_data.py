@@ -0,0 +1,196 @@
+"""Generate a reproducible synthetic dataset for capacity and query-plan testing.
+
+Every user gets custom categories under the default tree and a mix of simple,
+percentage and envelope budgets. The data of user `i` only depends on the seed and
+`i`, so the same arguments load the same users, categories and budgets; ids come
+from the sequences and match between runs on a fresh database. Rows are loaded
+with COPY, categories directly and budgets through `BudgetImporter`. Needs the
+default categories, start the service once or run `init_db` first. Usage:
+
+    python -m app.utils.generate_data --seed 42 --users 10000 --budgets-per-user 200
+    python -m app.utils.generate_data --users 100 --envelopes-per-budget 8 --categories-per-user 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterator, Sequence
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..domain.configs import ADMIN_USER_ID, get_settings
+from ..domain.schemas import SimpleBudget, PercentageBudget, CategoryBudget
+from ..infrastructure.database.bulk_import import BudgetImporter, reserve_ids
+from ..infrastructure.database.database import create_engine_and_session
+from ..infrastructure.database.loader import TypedBudget
+from ..infrastructure.database.models import Category
+from ..infrastructure.database.models.budget import BudgetType
+
+logger = structlog.stdlib.get_logger('generate_data')
+
+# In the order of `Scale.mix`
+BUDGET_TYPES = (BudgetType.SIMPLE, BudgetType.PERCENTAGE, BudgetType.ENVELOPE)
+CURRENCIES = ('USD', 'HUF', 'UAH')
+CURRENCY_WEIGHTS = (0.6, 0.25, 0.15)
+BUDGET_NAMES = ('Monthly', 'Household', 'Groceries', 'Vacation', 'Holidays', 'Family', 'Car', 'Side project', 'Renovation', 'Wedding')
+CATEGORY_NAMES = ('Pets', 'Hobbies', 'Gifts', 'Gym', 'Subscriptions', 'Kids', 'Garden', 'Books', 'Games', 'Charity')
+FAVICONS = ('star', 'tag', 'heart', 'gift', None)
+PERCENTAGE_SPLITS = ((50, 30, 20), (60, 20, 20), (70, 20, 10), (40, 30, 30), (50, 20, 30))
+FIRST_MONTH = date(2022, 1, 1)
+MONTHS = 48
+# Numeric(10, 2)
+MAX_AMOUNT = 99_999_999.99
+CATEGORY_COLUMNS = ('id', 'user_id', 'name', 'type', 'parent_category_id', 'favicon')
+
+@dataclass(frozen=True)
+class Scale:
+    users: int = 1000
+    budgets_per_user: int = 100
+    envelopes_per_budget: int = 5
+    categories_per_user: int = 3
+    # Weights of simple, percentage and envelope budgets
+    mix: tuple[float, float, float] = (0.4, 0.3, 0.3)
+
+@dataclass(frozen=True)
+class DefaultTree:
+    """Ids and types of the seeded default categories, ordered by id"""
+    parents: Sequence[tuple[int, int]]
+    leaves: Sequence[int]
+
+class TenantGenerator:
+    """Deterministic users, categories and budgets for a seed and a scale"""
+    def __init__(self, seed: int, scale: Scale, defaults: DefaultTree):
+        self.seed = seed
+        self.scale = scale
+        self.defaults = defaults
+
+    def _random(self, index: int, stream: str) -> random.Random:
+        # String seeds are hashed with SHA-512, stable across processes unlike hash()
+        return random.Random(f'{self.seed}:{index}:{stream}')
+
+    def user_id(self, index: int) -> uuid.UUID:
+        return uuid.UUID(int=self._random(index, 'user').getrandbits(128), version=4)
+
+    def categories(self, index: int) -> list[tuple]:
+        """`(user_id, name, type, parent_category_id, favicon)` rows under default main categories"""
+        rng = self._random(index, 'categories')
+        user_id = self.user_id(index)
+        rows = []
+        for number in range(self.scale.categories_per_user):
+            parent_id, type = rng.choice(self.defaults.parents)
+            rows.append((user_id, f'{rng.choice(CATEGORY_NAMES)} {number + 1}', type, parent_id, rng.choice(FAVICONS)))
+        return rows
+
+    def budgets(self, index: int, category_ids: Sequence[int]) -> Iterator[TypedBudget]:
+        """Budgets of user `index`, envelopes use default leaves and `category_ids`, the user's own"""
+        rng = self._random(index, 'budgets')
+        user_id = self.user_id(index)
+        pool = [*self.defaults.leaves, *category_ids]
+        types = rng.choices(BUDGET_TYPES, weights=self.scale.mix, k=self.scale.budgets_per_user)
+        for type in types:
+            start = _add_months(FIRST_MONTH, rng.randrange(MONTHS))
+            # Mostly monthly budgets, some yearly
+            end = _add_months(start, 12 if rng.random() < 0.1 else 1) - timedelta(days=1)
+            common = dict(
+                user_id=user_id,
+                name=f'{rng.choice(BUDGET_NAMES)} {start:%b %Y}',
+                currency=rng.choices(CURRENCIES, CURRENCY_WEIGHTS)[0],
+                start_date=start,
+                end_date=end,
+            )
+            match type:
+                case BudgetType.SIMPLE:
+                    yield SimpleBudget(type=type, total_amount=_amount(rng, 7.5), **common)
+                case BudgetType.PERCENTAGE:
+                    needs, wants, savings = rng.choice(PERCENTAGE_SPLITS)
+                    yield PercentageBudget(type=type, needs_percent=needs, wants_percent=wants, savings_percent=savings, **common)
+                case BudgetType.ENVELOPE:
+                    envelopes = rng.sample(pool, min(self.scale.envelopes_per_budget, len(pool)))
+                    categories = [{'category_id': id, 'amount': _amount(rng, 5.5)} for id in envelopes]
+                    yield CategoryBudget(type=type, categories=categories, **common)
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def _amount(rng: random.Random, mu: float) -> float:
+    """Log-normal amount, e^mu is the median"""
+    return max(min(round(rng.lognormvariate(mu, 1), 2), MAX_AMOUNT), 0.01)
+
+async def load_default_tree(db: AsyncSession) -> DefaultTree:
+    rows = (await db.execute(
+        select(Category.id, Category.type, Category.parent_category_id)
+        .where(Category.user_id == ADMIN_USER_ID)
+        .order_by(Category.id)
+    )).all()
+    parents = [(row.id, row.type) for row in rows if row.parent_category_id is None]
+    if not parents:
+        raise RuntimeError('No default categories, run the service or init_db first')
+    return DefaultTree(parents=parents, leaves=[row.id for row in rows if row.parent_category_id is not None])
+
+async def copy_categories(db: AsyncSession, rows: Sequence[tuple]) -> list[int]:
+    """COPY category rows with ids taken from the sequence, returns the ids in order"""
+    if not rows:
+        return []
+    ids = await reserve_ids(db, Category.__tablename__, len(rows))
+    connection = await db.connection()
+    raw = (await connection.get_raw_connection()).driver_connection
+    await raw.copy_records_to_table(
+        Category.__tablename__,
+        records=[(id, *row) for id, row in zip(ids, rows)],
+        columns=CATEGORY_COLUMNS
+    )
+    return list(ids)
+
+async def run(seed: int, scale: Scale, batch_size: int) -> dict[str, float]:
+    settings = get_settings()
+    engine, session_maker = create_engine_and_session(settings)
+    totals = {'users': 0, 'categories': 0, 'budgets': 0, 'envelopes': 0}
+    started = time.perf_counter()
+    try:
+        async with session_maker() as db:
+            generator = TenantGenerator(seed, scale, await load_default_tree(db))
+            importer = BudgetImporter(db)
+            pending: list[TypedBudget] = []
+            for index in range(scale.users):
+                # Joins the transaction of the next budget batch, committed with it
+                category_ids = await copy_categories(db, generator.categories(index))
+                pending.extend(generator.budgets(index, category_ids))
+                totals['users'] += 1
+                totals['categories'] += len(category_ids)
+                if len(pending) >= batch_size or index == scale.users - 1:
+                    totals['budgets'] += await importer.import_batch(pending)
+                    totals['envelopes'] += sum(len(b.categories) for b in pending if b.type == BudgetType.ENVELOPE)
+                    pending = []
+                    await logger.ainfo('Loaded batch', users=totals['users'], budgets=totals['budgets'])
+            # Categories of users without budgets
+            await db.commit()
+    finally:
+        await engine.dispose()
+    return totals | {'seconds': round(time.perf_counter() - started, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--users', type=int, default=Scale.users)
+    parser.add_argument('--budgets-per-user', type=int, default=Scale.budgets_per_user)
+    parser.add_argument('--envelopes-per-budget', type=int, default=Scale.envelopes_per_budget)
+    parser.add_argument('--categories-per-user', type=int, default=Scale.categories_per_user)
+    parser.add_argument('--mix', type=float, nargs=3, default=Scale.mix, metavar=('SIMPLE', 'PERCENTAGE', 'ENVELOPE'),
+                        help='relative weights of the budget types')
+    parser.add_argument('--batch-size', type=int, default=get_settings().import_batch_size,
+                        help='budgets per COPY transaction')
+    args = parser.parse_args()
+
+    scale = Scale(args.users, args.budgets_per_user, args.envelopes_per_budget, args.categories_per_user, tuple(args.mix))
+    totals = asyncio.run(run(args.seed, scale, args.batch_size))
+    print(json.dumps({'seed': args.seed, **totals}))
+
+if __name__ == '__main__':
+    main()
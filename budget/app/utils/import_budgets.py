@@ -0,0 +1,60 @@
+"""Bulk import budgets from a CSV or NDJSON file in the export layout.
+
+Rejected records are written as NDJSON to the error report. The collection versions
+of the imported users are bumped with each batch, running workers serve fresh ETags
+and cached reads right away. Usage:
+
+    python -m app.utils.import_budgets budgets.ndjson --errors rejected.ndjson
+    python -m app.utils.import_budgets budgets.csv --format csv --user-id <uuid>
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from pathlib import Path
+from typing import AsyncIterator
+
+import structlog
+
+from ..application.services import ImportService
+from ..application.services.import_service import iter_lines
+from ..domain.configs import get_settings
+from ..domain.schemas import FileFormat, ImportRejection, ImportReport
+from ..infrastructure.cache import CollectionVersions
+from ..infrastructure.database.database import create_engine_and_session
+
+CHUNK_SIZE = 1024 * 1024
+
+async def read_chunks(path: Path) -> AsyncIterator[bytes]:
+    with path.open('rb') as f:
+        while chunk := await asyncio.to_thread(f.read, CHUNK_SIZE):
+            yield chunk
+
+async def run(path: Path, format: FileFormat, errors: Path, user_id: uuid.UUID | None) -> ImportReport:
+    settings = get_settings()
+    engine, session_maker = create_engine_and_session(settings)
+    try:
+        with errors.open('w') as report_file:
+            async def write_rejection(rejection: ImportRejection) -> None:
+                report_file.write(rejection.model_dump_json() + '\n')
+
+            async with session_maker() as db:
+                service = ImportService(db, settings, structlog.stdlib.get_logger('import_service'), CollectionVersions(db))
+                return await service.import_budgets(iter_lines(read_chunks(path)), format, write_rejection, user_id)
+    finally:
+        await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--format', type=FileFormat, help='ndjson or csv, defaults to the file extension')
+    parser.add_argument('--errors', type=Path, default=Path('rejected.ndjson'), help='error report, one JSON object per rejected record')
+    parser.add_argument('--user-id', type=uuid.UUID, help='owner of every imported budget')
+    args = parser.parse_args()
+
+    format = args.format or FileFormat(args.path.suffix.lstrip('.').lower())
+    report = asyncio.run(run(args.path, format, args.errors, args.user_id))
+    print(json.dumps({'imported': report.imported, 'rejected': report.rejected, 'errors': str(args.errors)}))
+
+if __name__ == '__main__':
+    main()
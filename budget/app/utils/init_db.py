@@ -1,37 +1,93 @@
+import hashlib
+
 from ..domain.configs import DEFAULT_CATEGORIES, ADMIN_USER_ID
 from ..infrastructure.database.models import Category
-from sqlalchemy import text
+from sqlalchemy import Integer, String, and_, column, func, literal, null, or_, select, text, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+# Every worker takes this transaction-level lock before seeding, so concurrent startups
+# run one after another and all but the first find nothing to change
+SEED_LOCK_KEY = int.from_bytes(hashlib.sha256(b'budget.init_db.default_categories').digest()[:8], 'big', signed=True)
+
+def default_category_rows() -> tuple[list[tuple], list[tuple]]:
+    """`(name, type, favicon)` of main categories and `(parent, name, type, favicon)` of subcategories"""
+    parents, children = [], []
+    for category_type, categories in DEFAULT_CATEGORIES.items():
+        for category_name, category_data in categories.items():
+            parents.append((category_name, int(category_type), category_data["favicon"]))
+            children.extend(
+                (category_name, sub["name"], int(category_type), sub["favicon"])
+                for sub in category_data["subcategories"]
+            )
+    return parents, children
+
+def upsert_default_categories(rows):
+    """INSERT ... SELECT of `(user_id, name, type, parent_category_id, favicon)` rows keyed on
+    `uq_categories_default_key`, only rows whose type or favicon changed are rewritten"""
+    statement = insert(Category).from_select(
+        ['user_id', 'name', 'type', 'parent_category_id', 'favicon'], rows
+    )
+    return statement.on_conflict_do_update(
+        # Inline constants: bound parameters would not match the partial expression index
+        index_elements=[text('coalesce(parent_category_id, 0)'), Category.name],
+        index_where=text(f"user_id = '{ADMIN_USER_ID}'"),
+        set_={'type': statement.excluded.type, 'favicon': statement.excluded.favicon},
+        where=or_(
+            Category.type.is_distinct_from(statement.excluded.type),
+            Category.favicon.is_distinct_from(statement.excluded.favicon)
+        )
+    ).returning(Category.id)
 
-async def init_db(db):
-    """Create default categories for all users"""
+async def init_db(db: AsyncSession) -> int:
+    """Create or update the default categories, returns the number of rows written.
+
+    Two set-based upserts (main categories, then subcategories joined to their parent
+    by name) keyed on the natural key (parent, name), so entries added or changed in
+    `DEFAULT_CATEGORIES` are applied on the next start without reseeding. Defaults
+    removed from the config are kept, budgets may still reference them.
+    """
+    parents, children = default_category_rows()
     try:
-        query = text('SELECT COUNT(*) FROM categories WHERE user_id= :admin_id')
-        result = await db.execute(query, {'admin_id': ADMIN_USER_ID})
-        count = result.scalar()
-        if count > 0:
-            return
-
-        for category_type, categories in DEFAULT_CATEGORIES.items():
-            for category_name, category_data in categories.items():
-                main_category = Category(
-                    name=category_name,
-                    type=category_type,
-                    user_id=ADMIN_USER_ID,
-                    favicon=category_data["favicon"]
-                )
-                db.add(main_category)
-                await db.flush()
-                for sub in category_data["subcategories"]:
-                    subcategory = Category(
-                        name=sub["name"],
-                        type=category_type,
-                        user_id=ADMIN_USER_ID,
-                        parent_category_id=main_category.id,
-                        favicon=sub["favicon"]
-                    )
-                    db.add(subcategory)
-    
+        await db.execute(select(func.pg_advisory_xact_lock(SEED_LOCK_KEY)))
+
+        parent_values = values(
+            column('name', String), column('type', Integer), column('favicon', String),
+            name='default_parents'
+        ).data(parents)
+        parent_rows = select(
+            literal(ADMIN_USER_ID, Category.user_id.type),
+            parent_values.c.name,
+            parent_values.c.type,
+            null(),
+            parent_values.c.favicon
+        )
+        written = len((await db.execute(upsert_default_categories(parent_rows))).all())
+
+        child_values = values(
+            column('parent', String), column('name', String), column('type', Integer), column('favicon', String),
+            name='default_children'
+        ).data(children)
+        parent = aliased(Category)
+        child_rows = (
+            select(
+                literal(ADMIN_USER_ID, Category.user_id.type),
+                child_values.c.name,
+                child_values.c.type,
+                parent.id,
+                child_values.c.favicon
+            )
+            .join(parent, and_(
+                parent.name == child_values.c.parent,
+                parent.parent_category_id.is_(None),
+                parent.user_id == ADMIN_USER_ID
+            ))
+        )
+        written += len((await db.execute(upsert_default_categories(child_rows))).all())
+
         await db.commit()
+        return written
     except Exception as e:
         await db.rollback()
         raise e
@@ -0,0 +1,140 @@
+"""Round-trips and latency of BudgetRepository.create against the previous ORM write path.
+
+Needs a migrated Postgres at DATABASE_URL (seeded default categories are used for
+envelope budgets). Usage:
+
+    python -m benchmarks.create_budget --iterations 200 --output create_budget.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.configs import ADMIN_USER_ID, get_settings
+from app.domain.schemas import BudgetBase, SimpleBudget, PercentageBudget, CategoryBudget
+from app.infrastructure.database.database import create_engine_and_session
+from app.infrastructure.database.models import Budget, Category, EnvelopBudget, PercentageBudget as PercentageModel, SimpleBudget as SimpleModel
+from app.infrastructure.database.models.budget import BudgetType
+from app.infrastructure.database.repositories import BudgetRepository
+
+class RoundTripCounter:
+    """Counts statements plus BEGIN/COMMIT/ROLLBACK sent on the engine"""
+    def __init__(self, engine):
+        self.count = 0
+        for name in ('before_cursor_execute', 'begin', 'commit', 'rollback'):
+            event.listen(engine.sync_engine, name, self._increment)
+
+    def _increment(self, *args, **kwargs):
+        self.count += 1
+
+async def legacy_create(db: AsyncSession, schema: BudgetBase) -> Budget:
+    """The flush/commit/refresh path BudgetRepository.create used before the CTE"""
+    db_budget = Budget(
+        user_id=schema.user_id,
+        name=schema.name,
+        type=schema.type,
+        currency=schema.currency,
+        start_date=schema.start_date,
+        end_date=schema.end_date
+    )
+    db.add(db_budget)
+    await db.flush()
+    match schema.type:
+        case BudgetType.SIMPLE:
+            db.add(SimpleModel(id=db_budget.id, total_amount=schema.total_amount))
+        case BudgetType.PERCENTAGE:
+            db.add(PercentageModel(
+                id=db_budget.id,
+                needs_percent=schema.needs_percent,
+                wants_percent=schema.wants_percent,
+                savings_percent=schema.savings_percent
+            ))
+        case BudgetType.ENVELOPE:
+            db.add_all([
+                EnvelopBudget(budget_id=db_budget.id, category_id=c.category_id, allocated_amount=c.amount)
+                for c in schema.categories
+            ])
+    await db.commit()
+    await db.refresh(db_budget)
+    return db_budget
+
+def make_schemas(user_id: uuid.UUID, category_ids: list[int]) -> dict[str, BudgetBase]:
+    common = dict(user_id=user_id, name='bench', currency='USD', start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))
+    schemas = {
+        'simple': SimpleBudget(type=BudgetType.SIMPLE, total_amount=1500, **common),
+        'percentage': PercentageBudget(type=BudgetType.PERCENTAGE, **common),
+    }
+    if category_ids:
+        schemas['envelope'] = CategoryBudget(
+            type=BudgetType.ENVELOPE,
+            categories=[{'category_id': id, 'amount': 100} for id in category_ids],
+            **common
+        )
+    return schemas
+
+def summarize(latencies: list[float], round_trips: int, iterations: int) -> dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        'round_trips_per_create': round_trips / iterations,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+    }
+
+async def run(iterations: int) -> dict:
+    settings = get_settings()
+    engine, session_maker = create_engine_and_session(settings)
+    counter = RoundTripCounter(engine)
+    user_id = uuid.uuid4()
+    results = {}
+    try:
+        async with session_maker() as db:
+            category_ids = (await db.scalars(
+                select(Category.id).where(Category.user_id == ADMIN_USER_ID).limit(3)
+            )).all()
+
+        for budget_type, schema in make_schemas(user_id, list(category_ids)).items():
+            for variant in ('legacy', 'cte'):
+                latencies = []
+                counter.count = 0
+                for _ in range(iterations):
+                    async with session_maker() as db:
+                        started = time.perf_counter()
+                        if variant == 'legacy':
+                            await legacy_create(db, schema)
+                        else:
+                            await BudgetRepository(db).create(schema)
+                        latencies.append(time.perf_counter() - started)
+                results[f'{budget_type}.{variant}'] = summarize(latencies, counter.count, iterations)
+    finally:
+        async with session_maker() as db:
+            budget_ids = select(Budget.id).where(Budget.user_id == user_id)
+            for model, key in ((SimpleModel, SimpleModel.id), (PercentageModel, PercentageModel.id), (EnvelopBudget, EnvelopBudget.budget_id)):
+                await db.execute(delete(model).where(key.in_(budget_ids)))
+            await db.execute(delete(Budget).where(Budget.user_id == user_id))
+            await db.commit()
+        await engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.iterations))
+    print(f"{'case':<22}{'round-trips':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for case, stats in results.items():
+        print(f"{case:<22}{stats['round_trips_per_create']:>12.1f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
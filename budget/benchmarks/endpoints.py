@@ -0,0 +1,253 @@
+"""Throughput and latency of the HTTP endpoints, driven in process.
+
+Requests go through the whole ASGI stack of `create_app()` (middleware, auth, services,
+serialization) over httpx's ASGITransport, so there is no server or network in the
+numbers, only the app and the database. Tokens are signed with an RSA key pair made for
+the run, the JWKS cache is served its public key instead of calling the IdP.
+
+Reads served by the response cache are measured twice. `cold` runs without it: every
+request goes through the service, the repository and the database, not even joining an
+identical read in flight. `warm` runs with the app's cache after the warmup filled it.
+Writes and /health have one run. The client sends no If-None-Match, ETags never turn
+a read into a 304.
+
+Needs a migrated Postgres at DATABASE_URL (seeded default categories are used for
+envelope budgets). Access lines go to stderr, redirect them for a readable report.
+Usage:
+
+    python -m benchmarks.endpoints --requests 500 --concurrency 1 10 50 --output endpoints.json 2>/dev/null
+    python -m benchmarks.endpoints --cache cold
+    python -m benchmarks.endpoints --compare endpoints.json --threshold 0.1
+    python -m benchmarks.endpoints --compare endpoints.json --results candidate.json
+
+With --compare the exit status is 1 when a case lost more than `threshold` of its
+req/s or its p50/p95 latency grew by more than `threshold`.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from sqlalchemy import delete, select
+
+from app.domain.configs import get_settings
+from app.infrastructure.auth.auth import get_jwks_cache
+from app.infrastructure.auth.jwks import JWKSCache
+from app.infrastructure.cache import get_response_cache
+from app.infrastructure.database.models import Budget, CollectionVersion, EnvelopBudget, PercentageBudget, SimpleBudget
+from app.main import create_app
+
+KEY_ID = 'benchmark'
+BASE_URL = 'http://benchmark'
+# Regression checks, the higher the better for req/s and the lower for latencies
+HIGHER_IS_BETTER = ('rps',)
+LOWER_IS_BETTER = ('p50_ms', 'p95_ms')
+CACHE_MODES = ('cold', 'warm')
+
+class LocalIdentity:
+    """RSA key pair standing in for the IdP"""
+    def __init__(self, audience: str | None):
+        self.audience = audience
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def jwks(self) -> dict[str, Any]:
+        public = json.loads(RSAAlgorithm.to_jwk(self._private_key.public_key()))
+        return {'keys': [public | {'kid': KEY_ID, 'use': 'sig', 'alg': 'RS256'}]}
+
+    def token(self, user_id: uuid.UUID, ttl: float = 3600) -> str:
+        claims = {'sub': str(user_id), 'email': f'{user_id}@benchmark.local', 'exp': int(time.time() + ttl)}
+        if self.audience:
+            claims['aud'] = self.audience
+        return jwt.encode(claims, self._private_key, algorithm='RS256', headers={'kid': KEY_ID})
+
+    def jwks_cache(self) -> JWKSCache:
+        jwks = self.jwks()
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=jwks))
+        return JWKSCache(f'{BASE_URL}/jwks', client=httpx.AsyncClient(transport=transport))
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    url: str
+    json: dict[str, Any] | None = None
+    # Served by the response cache, measured cold and warm
+    cached: bool = False
+
+def budget_payload(type: str, **fields) -> dict[str, Any]:
+    return {'type': type, 'name': 'bench', 'currency': 'USD', 'start_date': '2025-01-01', 'end_date': '2025-01-31', **fields}
+
+async def make_scenarios(client: httpx.AsyncClient) -> list[Scenario]:
+    """The endpoints to measure. Creates the budget read back by `GET /budget/{id}`"""
+    categories = (await client.get('/category')).raise_for_status().json()
+    payloads = {
+        'simple': budget_payload('simple', total_amount=1500),
+        'percentage': budget_payload('percentage', needs_percent=50, wants_percent=30, savings_percent=20),
+    }
+    if categories:
+        payloads['envelope'] = budget_payload(
+            'envelope', categories=[{'category_id': c['id'], 'amount': 100} for c in categories[:3]]
+        )
+    budget = (await client.post('/budget', json=payloads['simple'])).raise_for_status().json()
+    return [
+        *(Scenario(f'POST /budget {type}', 'POST', '/budget', payload) for type, payload in payloads.items()),
+        Scenario('GET /budget', 'GET', '/budget', cached=True),
+        Scenario('GET /budget/{id}', 'GET', f"/budget/{budget['id']}", cached=True),
+        Scenario('GET /category', 'GET', '/category', cached=True),
+        Scenario('GET /health', 'GET', '/health'),
+    ]
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, float]:
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentiles[49] * 1000,
+        'p95_ms': percentiles[94] * 1000,
+        'p99_ms': percentiles[98] * 1000,
+        'max_ms': max(latencies) * 1000,
+    }
+
+async def measure(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict[str, float]:
+    """Send `requests` requests from `concurrency` workers, each waiting for its previous response"""
+    latencies: list[float] = []
+    errors = 0
+    # Shared by the workers, each takes the next request number
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.request(scenario.method, scenario.url, json=scenario.json)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+async def delete_budgets(session_maker, user_id: uuid.UUID) -> None:
+    async with session_maker() as db:
+        budget_ids = select(Budget.id).where(Budget.user_id == user_id)
+        for model, key in ((SimpleBudget, SimpleBudget.id), (PercentageBudget, PercentageBudget.id), (EnvelopBudget, EnvelopBudget.budget_id)):
+            await db.execute(delete(model).where(key.in_(budget_ids)))
+        await db.execute(delete(Budget).where(Budget.user_id == user_id))
+        await db.execute(delete(CollectionVersion).where(CollectionVersion.user_id == user_id))
+        await db.commit()
+
+def use_response_cache(app, enabled: bool) -> None:
+    """Without it the services fall back to an uncached instance of their own"""
+    if enabled:
+        app.dependency_overrides.pop(get_response_cache, None)
+    else:
+        app.dependency_overrides[get_response_cache] = lambda: None
+
+async def run(requests: int, levels: list[int], warmup: int, modes: list[str]) -> dict[str, Any]:
+    identity = LocalIdentity(get_settings().auth_audience)
+    user_id = uuid.uuid4()
+    app = create_app()
+    jwks_cache = identity.jwks_cache()
+    app.dependency_overrides[get_jwks_cache] = lambda: jwks_cache
+    results: dict[str, dict[str, dict[str, float]]] = {}
+
+    async with app.router.lifespan_context(app):
+        await jwks_cache.start()
+        transport = httpx.ASGITransport(app=app)
+        headers = {'Authorization': f'Bearer {identity.token(user_id)}'}
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url=BASE_URL, headers=headers) as client:
+                for scenario in await make_scenarios(client):
+                    runs = [(f'{scenario.name} ({mode})', mode) for mode in modes] if scenario.cached else [(scenario.name, 'cold')]
+                    for case, mode in runs:
+                        use_response_cache(app, mode == 'warm')
+                        await measure(client, scenario, warmup, 1)
+                        for concurrency in levels:
+                            results.setdefault(case, {})[str(concurrency)] = await measure(
+                                client, scenario, requests, concurrency
+                            )
+        finally:
+            await jwks_cache.stop()
+            await delete_budgets(app.state.session_maker, user_id)
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'requests': requests,
+            'concurrency': levels,
+            'cache': modes,
+        },
+        'results': results,
+    }
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Cases that got worse than the baseline by more than `threshold`, as report lines"""
+    regressions = []
+    for case, levels in current['results'].items():
+        for concurrency, stats in levels.items():
+            before = baseline['results'].get(case, {}).get(concurrency)
+            if before is None:
+                continue
+            for key in HIGHER_IS_BETTER:
+                if stats[key] < before[key] * (1 - threshold):
+                    regressions.append(f'{case} c={concurrency}: {key} {before[key]:.1f} -> {stats[key]:.1f}')
+            for key in LOWER_IS_BETTER:
+                if stats[key] > before[key] * (1 + threshold):
+                    regressions.append(f'{case} c={concurrency}: {key} {before[key]:.2f} -> {stats[key]:.2f}')
+    return regressions
+
+def print_report(results: dict[str, Any]) -> None:
+    print(f"{'case':<28}{'conc':>5}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for case, levels in results['results'].items():
+        for concurrency, stats in levels.items():
+            print(f"{case:<28}{concurrency:>5}{stats['rps']:>10.1f}{stats['p50_ms']:>9.2f}"
+                  f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['errors']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='requests per case and concurrency level')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--warmup', type=int, default=20, help='requests sent per case before measuring')
+    parser.add_argument('--cache', nargs='+', choices=CACHE_MODES, default=list(CACHE_MODES),
+                        help='measure cached reads without (cold) and with (warm) the response cache')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='flag regressions against these results')
+    parser.add_argument('--results', help='compare these saved results instead of running the benchmark')
+    parser.add_argument('--threshold', type=float, default=0.1, help='tolerated relative change, default 10%%')
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            results = json.load(f)
+    else:
+        results = asyncio.run(run(args.requests, args.concurrency, args.warmup, args.cache))
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regression beyond {args.threshold:.0%}')
+
+if __name__ == '__main__':
+    main()
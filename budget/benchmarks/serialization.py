@@ -0,0 +1,93 @@
+"""CPU spent serializing list responses: FastAPI's response_model path against `json_response`.
+
+The FastAPI path is what a route returning models goes through: validation against
+`response_model`, `jsonable_encoder` and `json.dumps` in JSONResponse. The fast path
+is a single `TypeAdapter.dump_json`. No database is needed. Usage:
+
+    python -m benchmarks.serialization --sizes 20 100 1000 --output serialization.json
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import date
+from typing import List, Union
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.domain.schemas import BudgetBase, Pagination, SimpleBudget, PercentageBudget, CategoryBudget
+from app.domain.schemas.adapters import budget_list_adapter, budget_page_adapter
+from app.infrastructure.database.models.budget import BudgetType
+from app.routers.serialization import json_response
+
+def make_budgets(size: int) -> list:
+    common = dict(user_id=uuid.uuid4(), name='bench', currency='USD', start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))
+    budgets = []
+    for id in range(size):
+        match id % 3:
+            case 0:
+                budgets.append(SimpleBudget(id=id, type=BudgetType.SIMPLE, total_amount=1500, **common))
+            case 1:
+                budgets.append(PercentageBudget(id=id, type=BudgetType.PERCENTAGE, **common))
+            case 2:
+                categories = [{'category_id': c, 'amount': 100} for c in range(5)]
+                budgets.append(CategoryBudget(id=id, type=BudgetType.ENVELOPE, categories=categories, **common))
+    return budgets
+
+def cpu_per_call(fn, repeat: int) -> float:
+    fn()
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat
+
+def fastapi_path(loop: asyncio.AbstractEventLoop, response_model, content):
+    field = create_model_field(name='Response', type_=response_model, mode='serialization')
+
+    def serialize():
+        encoded = loop.run_until_complete(serialize_response(field=field, response_content=content, is_coroutine=True))
+        return JSONResponse(encoded).body
+    return serialize
+
+def run(sizes: list[int], repeat: int) -> dict:
+    loop = asyncio.new_event_loop()
+    results = {}
+    for size in sizes:
+        budgets = make_budgets(size)
+        page = Pagination[BudgetBase](items=[BudgetBase.model_validate(b.model_dump() | {'user_id': b.user_id}) for b in budgets], limit=size)
+        cases = {
+            'page': (Pagination[BudgetBase], page, budget_page_adapter),
+            'details': (List[Union[SimpleBudget, PercentageBudget, CategoryBudget]], budgets, budget_list_adapter),
+        }
+        for name, (response_model, content, adapter) in cases.items():
+            baseline = cpu_per_call(fastapi_path(loop, response_model, content), repeat)
+            fast = cpu_per_call(lambda: json_response(adapter, content).body, repeat)
+            results[f'{name}.{size}'] = {
+                'fastapi_us': baseline * 1e6,
+                'dump_json_us': fast * 1e6,
+                'saved_us': (baseline - fast) * 1e6,
+                'speedup': baseline / fast,
+            }
+    loop.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print(f"{'case':<16}{'fastapi us':>12}{'dump_json us':>14}{'saved us':>10}{'speedup':>9}")
+    for case, stats in results.items():
+        print(f"{case:<16}{stats['fastapi_us']:>12.1f}{stats['dump_json_us']:>14.1f}{stats['saved_us']:>10.1f}{stats['speedup']:>8.1f}x")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()